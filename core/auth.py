@@ -0,0 +1,137 @@
+from typing import Any, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import models
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "KEY_PREFIX": "auth",
+    "TIMEOUT": 60,
+    "ALLOW_LOCAL": False,
+}
+
+
+class UserAccess(NamedTuple):
+    """
+    The group names and the ``"app_label.codename"`` permissions of a user,
+    directly or through their groups.
+    """
+
+    groups: frozenset[str]
+    permissions: frozenset[str]
+
+
+class AccessCache:
+    """
+    Cache of the groups and permissions of users.
+
+    The first lookup of a request stores the access on the user object, so
+    the request does at most one lookup. Across requests, entries are kept
+    in the Django cache configured by the ``AUTH_CACHE`` setting for
+    ``TIMEOUT`` seconds (0 disables it) under a generation that
+    ``invalidate`` bumps whenever groups or permissions change.
+
+    The generation only reaches the processes that share the cache, and a
+    revoked permission must not outlive it elsewhere. With a process-local
+    backend such as locmem, ``TIMEOUT`` is therefore 0 and access is only
+    kept for the request, unless ``ALLOW_LOCAL`` declares a single-process
+    deployment.
+    """
+
+    def __init__(self) -> None:
+        self._options = {**DEFAULTS, **getattr(settings, "AUTH_CACHE", {})}
+        self._cache = caches[self._options["ALIAS"]]
+        shared = self._options["ALLOW_LOCAL"] or not isinstance(
+            self._cache, (LocMemCache, DummyCache)
+        )
+        self._timeout = self._options["TIMEOUT"] if shared else 0
+
+    def get(self, user: Any) -> UserAccess:
+        """
+        Access of ``user``; empty for anonymous and inactive users.
+        """
+        if not user.is_active or user.is_anonymous:
+            return UserAccess(frozenset(), frozenset())
+
+        if not hasattr(user, "_access"):
+            user._access = self._cached(user.pk)
+        return user._access
+
+    def invalidate(self) -> None:
+        if not self._timeout:
+            return
+
+        key = self._key("generation")
+        if not self._cache.add(key, 1, None):
+            try:
+                self._cache.incr(key)
+            except ValueError:
+                self._cache.set(key, 1, None)
+
+    def _cached(self, user_id: Any) -> UserAccess:
+        if not self._timeout:
+            return self._load(user_id)
+
+        generation = self._cache.get_or_set(self._key("generation"), 0, None)
+        key = self._key("user", str(generation), str(user_id))
+        access = self._cache.get(key)
+        if access is None:
+            access = self._load(user_id)
+            self._cache.set(key, tuple(access), self._timeout)
+            return access
+        return UserAccess(*access)
+
+    def _load(self, user_id: Any) -> UserAccess:
+        # Group names with their permissions and the user's own permissions,
+        # in one query. Annotations come last in the SELECT, so does the name.
+        through_groups = Group.objects.filter(user=user_id).values_list(
+            "permissions__content_type__app_label",
+            "permissions__codename",
+            "name",
+        )
+        direct = (
+            Permission.objects.filter(user=user_id)
+            .order_by()
+            .values_list(
+                "content_type__app_label",
+                "codename",
+                models.Value(None, output_field=models.CharField()),
+            )
+        )
+
+        groups, permissions = set(), set()
+        for app_label, codename, group in through_groups.union(direct, all=True):
+            if group is not None:
+                groups.add(group)
+            if codename is not None:
+                permissions.add(f"{app_label}.{codename}")
+        return UserAccess(frozenset(groups), frozenset(permissions))
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self._options["KEY_PREFIX"], *parts))
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` answering permission checks from ``AccessCache``.
+    """
+
+    def get_all_permissions(self, user_obj: Any, obj: Optional[Any] = None) -> set:
+        if user_obj.is_superuser or obj is not None:
+            return super().get_all_permissions(user_obj, obj)
+
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = set(AccessCache().get(user_obj).permissions)
+        return user_obj._perm_cache
+
+
+def in_groups(user: Any, names: list[str]) -> bool:
+    """
+    Whether ``user`` belongs to any of the groups ``names``.
+    """
+    return not AccessCache().get(user).groups.isdisjoint(names)
@@ -0,0 +1,213 @@
+import base64
+import json
+from functools import cached_property
+from typing import Any, Optional, Sequence
+
+from django.contrib.admin.views.main import ChangeList
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.db import connections, models
+from django.http import HttpRequest
+
+CURSOR_VAR = "cursor"
+
+
+class KeysetPaginator(Paginator):
+    """
+    Paginator that seeks from the last row of the previous page.
+
+    When the queryset is ordered exactly by ``ordering``, pages are read with
+    a ``WHERE (created_at, id) < (...)`` condition instead of an ``OFFSET``,
+    so every page costs the same whatever its depth. Any other ordering falls
+    back to numbered pages.
+
+    On PostgreSQL, tables larger than ``estimate_threshold`` rows report the
+    planner estimate instead of running ``COUNT(*)``; ``estimated`` tells the
+    template the count is approximate.
+    """
+
+    estimate_threshold = 100_000
+
+    def __init__(
+        self,
+        object_list: models.QuerySet,
+        per_page: int,
+        ordering: Sequence[str],
+        cursor: Optional[str] = None,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(object_list, per_page, **kwargs)
+        self.ordering = tuple(ordering)
+        self.cursor = cursor
+        self.next_cursor: Optional[str] = None
+        self.estimated = False
+
+    @cached_property
+    def keyset(self) -> bool:
+        """
+        Whether the queryset is ordered by the keyset ``ordering``.
+        """
+        pk = self.object_list.model._meta.pk.name
+        ordering = dict.fromkeys(
+            {"pk": pk, "-pk": f"-{pk}"}.get(field, field)
+            for field in self.object_list.query.order_by
+        )
+        return tuple(ordering) == self.ordering
+
+    @cached_property
+    def count(self) -> int:
+        estimate = self._estimate()
+        if estimate is None:
+            return super().count
+
+        self.estimated = True
+        return estimate
+
+    def page(self, number: Any) -> Page:
+        """
+        Return the page after ``cursor``. Numbered pages are served with an
+        ``OFFSET`` when the ordering does not match or no cursor is given.
+        Raises:
+            InvalidPage: If the cursor cannot be decoded.
+        """
+        if not self.keyset or (not self.cursor and str(number) != "1"):
+            return super().page(number)
+
+        queryset = self.object_list
+        if self.cursor:
+            queryset = queryset.filter(self._after(self._decode(self.cursor)))
+
+        rows = list(queryset[: self.per_page + 1])
+        if len(rows) > self.per_page:
+            rows = rows[: self.per_page]
+            self.next_cursor = self._encode(rows[-1])
+
+        return self._get_page(rows, 1, self)
+
+    def _fields(self) -> list[tuple[models.Field, bool]]:
+        opts = self.object_list.model._meta
+        return [
+            (opts.get_field(name.lstrip("-")), name.startswith("-"))
+            for name in self.ordering
+        ]
+
+    def _encode(self, obj: models.Model) -> str:
+        values = [field.value_to_string(obj) for field, _ in self._fields()]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def _decode(self, cursor: str) -> list[Any]:
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+            return [
+                field.to_python(value)
+                for (field, _), value in zip(self._fields(), values, strict=True)
+            ]
+        except (ValueError, TypeError) as error:
+            raise InvalidPage("Cursor inválido") from error
+
+    def _after(self, values: list[Any]) -> models.Q:
+        """
+        Rows that sort after ``values``: ``(a, b) < (x, y)`` expanded to
+        ``a < x OR (a = x AND b < y)`` so each column keeps its direction.
+        """
+        condition = models.Q(pk__in=[])
+        equal = models.Q()
+
+        for (field, descending), value in zip(self._fields(), values):
+            lookup = "lt" if descending else "gt"
+            condition |= equal & models.Q(**{f"{field.name}__{lookup}": value})
+            equal &= models.Q(**{field.name: value})
+
+        return condition
+
+    def _estimate(self) -> Optional[int]:
+        queryset = self.object_list
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return None
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)",
+                [connection.ops.quote_name(queryset.model._meta.db_table)],
+            )
+            row = cursor.fetchone()
+            estimate = row[0] if row else None
+
+            if estimate is None or estimate < self.estimate_threshold:
+                return None
+            if not queryset.query.where:
+                return estimate
+
+            sql, params = queryset.order_by().query.sql_with_params()
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        return estimate if estimate >= self.estimate_threshold else None
+
+
+class KeysetChangeList(ChangeList):
+    """
+    Change list that reads the page cursor and keeps it out of the filters.
+    """
+
+    def get_filters_params(self, params: Optional[dict] = None) -> dict:
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(
+        self,
+        new_params: Optional[dict] = None,
+        remove: Optional[list] = None,
+    ) -> str:
+        # Sorting, filtering and searching start again from the first page.
+        return super().get_query_string(new_params, [*(remove or ()), CURSOR_VAR])
+
+    @property
+    def next_page_url(self) -> Optional[str]:
+        if not self.paginator.next_cursor:
+            return None
+        return self.get_query_string({CURSOR_VAR: self.paginator.next_cursor})
+
+    @property
+    def first_page_url(self) -> str:
+        return self.get_query_string()
+
+
+class KeysetPaginationMixin:
+    """
+    Admin mixin for append-only tables ordered by creation.
+
+    Pages are navigated with a cursor, large tables show an estimated count
+    and the unfiltered total is never counted.
+    Attributes:
+        ordering (tuple): Default ordering, also used as the keyset.
+    """
+
+    ordering = ("-created_at", "-id")
+    paginator = KeysetPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request: HttpRequest, **kwargs: Any) -> type:
+        return KeysetChangeList
+
+    def get_paginator(
+        self,
+        request: HttpRequest,
+        queryset: models.QuerySet,
+        per_page: int,
+        orphans: int = 0,
+        allow_empty_first_page: bool = True,
+    ) -> KeysetPaginator:
+        return self.paginator(
+            queryset,
+            per_page,
+            ordering=self.ordering,
+            cursor=request.GET.get(CURSOR_VAR),
+            orphans=orphans,
+            allow_empty_first_page=allow_empty_first_page,
+        )
@@ -0,0 +1,36 @@
+"""
+Signal receivers that invalidate the ``AccessCache`` when groups, group
+memberships or permissions change, and create the database cache tables
+after ``migrate``.
+"""
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from core.auth import AccessCache
+
+User = get_user_model()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_access_for_links(sender, action: str, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        transaction.on_commit(AccessCache().invalidate)
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_access(sender, **kwargs):
+    transaction.on_commit(AccessCache().invalidate)
+
+
+# Connected by CoreConfig.ready, as post_migrate is sent per app config.
+def create_cache_tables(sender, using: str, **kwargs):
+    call_command("createcachetable", database=using, verbosity=0)
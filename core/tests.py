@@ -1,3 +1,59 @@
-from django.test import TestCase
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from core.auth import AccessCache
+from core.utils import generate_codes
+
+User = get_user_model()
+
+
+class AccessCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("operador", "operador@example.com")
+        self.user.groups.add(Group.objects.create(name="Estoquistas"))
+
+    def groups_after_leaving(self):
+        AccessCache().get(User.objects.get(pk=self.user.pk))
+        # Without m2m_changed, as if another process had made the change.
+        User.groups.through.objects.filter(user=self.user).delete()
+        return AccessCache().get(User.objects.get(pk=self.user.pk)).groups
+
+    def test_process_local_cache_only_lasts_for_the_request(self):
+        self.assertEqual(self.groups_after_leaving(), frozenset())
+
+    @override_settings(AUTH_CACHE={"ALLOW_LOCAL": True})
+    def test_single_process_keeps_access_across_requests(self):
+        self.assertEqual(self.groups_after_leaving(), {"Estoquistas"})
+
+
+class GenerateCodesTests(TestCase):
+    def test_codes_of_one_millisecond_are_unique_and_increasing(self):
+        # A millisecond later than any code generated so far.
+        now = time.time_ns() + 1_000_000_000
+        codes = []
+
+        def generate():
+            for _ in range(50):
+                codes.append(generate_codes(100))
+
+        with mock.patch("time.time_ns", return_value=now):
+            threads = [threading.Thread(target=generate) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            later = generate_codes(1)[0]
+
+        self.assertEqual(len({code for batch in codes for code in batch}), 20_000)
+        for batch in codes:
+            self.assertEqual(batch, sorted(batch))
+            self.assertTrue(all(len(code) == 16 for code in batch))
+        self.assertEqual(len({code[:10] for batch in codes for code in batch}), 1)
+        self.assertGreater(later, max(max(batch) for batch in codes))
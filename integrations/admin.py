@@ -1,3 +1,41 @@
-from django.contrib import admin
+from typing import Any
 
-# Register your models here.
+from django.contrib import admin, messages
+from django.db.models.query import QuerySet
+from django.http import HttpRequest
+from unfold.admin import ModelAdmin
+
+from core.pagination import KeysetPaginationMixin
+from integrations.models import OutboxMessage
+from integrations.services.notification import OutboxService
+
+
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(KeysetPaginationMixin, ModelAdmin):
+    list_display = (
+        "channel",
+        "status",
+        "attempts",
+        "created_at",
+        "sent_at",
+        "last_error",
+    )
+    list_filter = ("status",)
+    actions = ("retry_messages",)
+
+    @admin.action(description="Reenviar mensagens selecionadas")
+    def retry_messages(self, request: HttpRequest, queryset: QuerySet) -> None:
+        count = OutboxService().retry(queryset)
+        self.message_user(
+            request,
+            f"{count} mensagem(ns) colocada(s) na fila novamente.",
+            messages.SUCCESS,
+        )
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(
+        self, request: HttpRequest, obj: Any | None = ...
+    ) -> bool:
+        return False
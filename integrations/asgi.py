@@ -0,0 +1,84 @@
+import asyncio
+import io
+import re
+from importlib import import_module
+from typing import Any, Awaitable, Callable
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import aget_user
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponseBase
+
+from integrations.views import events
+
+EVENTS_PATH = re.compile(r"^/events/(?P<channel>[^/]+)/$")
+
+
+class EventStreamApplication:
+    """
+    ASGI application serving ``/events/<channel>/`` itself and every other
+    request with ``application``.
+
+    Django's ASGI handler gives each request a thread for its
+    ``sync_to_async`` calls, kept until the response ends, so each open
+    stream would hold one. Here the session, the user and the event reads
+    run on the thread ``sync_to_async`` shares outside of requests, and an
+    idle stream only waits on its listener, so the thread count does not
+    grow with the streams. The middleware does not run for these requests:
+    the session is read from its cookie and ``events`` adds the headers.
+    """
+
+    def __init__(self, application: Callable[..., Awaitable[None]]) -> None:
+        self.application = application
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        match = scope["type"] == "http" and EVENTS_PATH.match(scope["path"])
+        if not match:
+            await self.application(scope, receive, send)
+            return
+
+        request = ASGIRequest(scope, io.BytesIO())
+        engine = import_module(settings.SESSION_ENGINE)
+        request.session = engine.SessionStore(
+            request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+        )
+        request.auser = lambda: aget_user(request)
+
+        # Django closes the connections around each request; the shared
+        # thread keeps its own, closed here once when broken or too old.
+        await sync_to_async(close_old_connections)()
+        response = await events(request, channel=match["channel"])
+
+        stream = asyncio.ensure_future(self._send_response(response, send))
+        disconnect = asyncio.ensure_future(self._wait_disconnect(receive))
+        await asyncio.wait([stream, disconnect], return_when=asyncio.FIRST_COMPLETED)
+        for task in (stream, disconnect):
+            task.cancel()
+        await asyncio.gather(stream, disconnect, return_exceptions=True)
+
+    async def _send_response(self, response: HttpResponseBase, send: Callable) -> None:
+        await send(
+            {
+                "type": "http.response.start",
+                "status": response.status_code,
+                "headers": [
+                    (name.encode("latin1"), value.encode("latin1"))
+                    for name, value in response.items()
+                ],
+            }
+        )
+        if response.streaming:
+            async for chunk in response:
+                await send(
+                    {"type": "http.response.body", "body": chunk, "more_body": True}
+                )
+            await send({"type": "http.response.body", "body": b""})
+        else:
+            await send({"type": "http.response.body", "body": response.content})
+
+    async def _wait_disconnect(self, receive: Callable) -> Any:
+        while (message := await receive())["type"] != "http.disconnect":
+            pass
+        return message
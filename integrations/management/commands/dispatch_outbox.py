@@ -0,0 +1,61 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.utils import timezone
+
+from integrations.services.notification import OutboxService
+
+
+class Command(BaseCommand):
+    help = (
+        "Publish the pending notifications of the outbox. Runs until "
+        "interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Publish the messages that are due and exit.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Only print the delivery metrics.",
+        )
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            help="Delete the messages sent more than this many days ago.",
+        )
+
+    def handle(self, *args, **options):
+        service = OutboxService()
+
+        if options["purge_days"] is not None:
+            deleted = service.purge(
+                timezone.now() - timedelta(days=options["purge_days"])
+            )
+            self.stdout.write(f"{deleted} mensagem(ns) removida(s).")
+
+        if not options["stats"]:
+            while True:
+                while result := service.dispatch().total:
+                    self.stdout.write(f"{result} mensagem(ns) processada(s).")
+                if options["once"]:
+                    break
+                connections.close_all()
+                time.sleep(service.poll_interval)
+
+        stats = service.stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pendentes: {stats['pending']} "
+                f"(mais antiga há {stats['oldest_pending']:.0f}s), "
+                f"falhas: {stats['failed']}, "
+                f"enviadas na última hora: {stats['sent']} "
+                f"(latência média {stats['latency']:.2f}s)."
+            )
+        )
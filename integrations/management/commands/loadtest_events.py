@@ -0,0 +1,161 @@
+import asyncio
+import time
+from importlib import import_module
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user_model,
+)
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        "Open idle event streams against a running server as one user, then "
+        "publish one event to them with /stock/sse/. Prints the thread count "
+        "and memory of the server process before and after, and how long the "
+        "event took to reach every stream."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("username", help="User the streams are opened as.")
+        parser.add_argument("--streams", type=int, default=1000)
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=50,
+            help="Streams being opened at the same time.",
+        )
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8000)
+        parser.add_argument(
+            "--pid",
+            type=int,
+            help="Process id of the server, to read its threads and memory.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get_by_natural_key(options["username"])
+        except get_user_model().DoesNotExist as error:
+            raise CommandError(
+                f"Usuário não encontrado: {options['username']}"
+            ) from error
+
+        session = import_module(settings.SESSION_ENGINE).SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+
+        try:
+            asyncio.run(self._run(options, session.session_key, user.pk))
+        finally:
+            session.delete()
+
+    async def _run(self, options, session_key: str, channel: str) -> None:
+        self._report("Antes", options["pid"])
+        semaphore = asyncio.Semaphore(options["concurrency"])
+        opened = [asyncio.Event() for _ in range(options["streams"])]
+        published = asyncio.Event()
+        delivered: list[float] = []
+
+        start = time.perf_counter()
+        streams = [
+            asyncio.create_task(
+                self._stream(
+                    options,
+                    session_key,
+                    channel,
+                    semaphore,
+                    event,
+                    published,
+                    delivered,
+                )
+            )
+            for event in opened
+        ]
+        waiting = asyncio.gather(*(event.wait() for event in opened))
+        done, _ = await asyncio.wait(
+            [waiting, *streams], return_when=asyncio.FIRST_COMPLETED
+        )
+        if waiting not in done:
+            for task in streams:
+                task.cancel()
+            raise CommandError(f"Stream encerrado: {done.pop().exception()}")
+        self.stdout.write(
+            f"{len(opened)} stream(s) aberto(s) em {time.perf_counter() - start:.1f}s."
+        )
+
+        await asyncio.sleep(3)
+        self._report("Depois", options["pid"])
+
+        start = time.perf_counter()
+        published.set()
+        await self._request(options, session_key, "/stock/sse/")
+        await asyncio.wait(streams, timeout=120)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Evento entregue a {len(delivered)} stream(s) em "
+                f"{(max(delivered) - start) if delivered else 0:.2f}s."
+            )
+        )
+
+    async def _stream(
+        self, options, session_key, channel, semaphore, opened, published, delivered
+    ) -> None:
+        async with semaphore:
+            reader, writer = await self._send(
+                options, session_key, f"/events/{channel}/", keep_alive=True
+            )
+            await self._read_until(reader, b"stream-open")
+            opened.set()
+
+        try:
+            await published.wait()
+            await self._read_until(reader, b"event: message")
+            delivered.append(time.perf_counter())
+        finally:
+            writer.close()
+
+    async def _request(self, options, session_key: str, path: str) -> None:
+        reader, writer = await self._send(options, session_key, path)
+        await reader.read()
+        writer.close()
+
+    async def _send(self, options, session_key, path, keep_alive=False):
+        reader, writer = await asyncio.open_connection(options["host"], options["port"])
+        writer.write(
+            (
+                f"GET {path} HTTP/1.1\r\nHost: {options['host']}\r\n"
+                f"Cookie: {settings.SESSION_COOKIE_NAME}={session_key}\r\n"
+                + ("" if keep_alive else "Connection: close\r\n")
+                + "\r\n"
+            ).encode()
+        )
+        await writer.drain()
+        return reader, writer
+
+    async def _read_until(self, reader, marker: bytes) -> None:
+        received = b""
+        while marker not in received:
+            data = await reader.read(65536)
+            if not data:
+                raise ConnectionError(received[:200])
+            received = received[-len(marker) :] + data
+
+    def _report(self, label: str, pid) -> None:
+        if not pid:
+            return
+        status = dict(
+            line.split(":", 1)
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines()
+        )
+        self.stdout.write(
+            f"{label}: {status['Threads'].strip()} thread(s), "
+            f"{status['VmRSS'].strip()} de memória."
+        )
@@ -0,0 +1,102 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:26
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("stock", "0022_partition_movements"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboxMessage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("channel", models.CharField(max_length=64, verbose_name="Canal")),
+                (
+                    "event_type",
+                    models.CharField(
+                        default="message", max_length=32, verbose_name="Tipo de evento"
+                    ),
+                ),
+                ("payload", models.JSONField(default=dict, verbose_name="Conteúdo")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("pending", "Pendente"),
+                            ("sent", "Enviada"),
+                            ("failed", "Falhou"),
+                        ],
+                        default="pending",
+                        max_length=7,
+                        verbose_name="Situação",
+                    ),
+                ),
+                (
+                    "attempts",
+                    models.PositiveIntegerField(default=0, verbose_name="Tentativas"),
+                ),
+                (
+                    "last_error",
+                    models.TextField(
+                        blank=True, default="", verbose_name="Último erro"
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Criado em"
+                    ),
+                ),
+                (
+                    "available_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Disponível em"
+                    ),
+                ),
+                (
+                    "sent_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Enviado em"
+                    ),
+                ),
+                (
+                    "notification",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="outbox_messages",
+                        to="stock.notification",
+                        verbose_name="Notificação",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Mensagem de saída",
+                "verbose_name_plural": "Caixa de saída",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["available_at", "id"],
+                        name="outbox_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
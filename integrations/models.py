@@ -1,3 +1,82 @@
 from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
 
-# Create your models here.
+
+class OutboxMessage(models.Model):
+    """
+    An event waiting to be published over the event stream.
+
+    Rows are written in the same transaction as the notification they carry,
+    so a rolled back transaction publishes nothing, and are sent after the
+    commit by ``integrations.services.notification.OutboxService``.
+    """
+
+    class Meta:
+        verbose_name = _("Mensagem de saída")
+        verbose_name_plural = _("Caixa de saída")
+        indexes = [
+            models.Index(
+                fields=["available_at", "id"],
+                condition=models.Q(status="pending"),
+                name="outbox_pending_idx",
+            ),
+        ]
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pendente")
+        SENT = "sent", _("Enviada")
+        FAILED = "failed", _("Falhou")
+
+    notification = models.ForeignKey(
+        verbose_name=_("Notificação"),
+        to="stock.Notification",
+        on_delete=models.CASCADE,
+        related_name="outbox_messages",
+        blank=True,
+        null=True,
+    )
+    channel = models.CharField(
+        verbose_name=_("Canal"),
+        max_length=64,
+    )
+    event_type = models.CharField(
+        verbose_name=_("Tipo de evento"),
+        max_length=32,
+        default="message",
+    )
+    payload = models.JSONField(
+        verbose_name=_("Conteúdo"),
+        default=dict,
+    )
+    status = models.CharField(
+        verbose_name=_("Situação"),
+        max_length=7,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name=_("Tentativas"),
+        default=0,
+    )
+    last_error = models.TextField(
+        verbose_name=_("Último erro"),
+        blank=True,
+        default="",
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Criado em"),
+        default=timezone.now,
+    )
+    available_at = models.DateTimeField(
+        verbose_name=_("Disponível em"),
+        default=timezone.now,
+    )
+    sent_at = models.DateTimeField(
+        verbose_name=_("Enviado em"),
+        blank=True,
+        null=True,
+    )
+
+    def __str__(self) -> str:
+        return f"{self.channel} ({self.get_status_display()})"
@@ -0,0 +1,121 @@
+import json
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django_eventstream.channelmanager import DefaultChannelManager
+from django_eventstream.event import Event
+from django_eventstream.models import Event as StoredEvent
+from django_eventstream.storage import DjangoModelStorage, EventDoesNotExist
+
+DEFAULTS = {
+    "MAX_EVENTS": 100,
+    "MAX_AGE": 24 * 60 * 60,
+    "TRIM_INTERVAL": 60,
+}
+
+
+def retention_options() -> dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "EVENT_RETENTION", {})}
+
+
+class RetainedEventStorage(DjangoModelStorage):
+    """
+    django-eventstream storage keeping the last events of each channel so a
+    reconnecting client receives what it missed after its ``Last-Event-ID``.
+
+    Event ids are the per-channel counters of ``DjangoModelStorage``, which
+    increase monotonically. Retention is capped both by count, the last
+    ``MAX_EVENTS`` of a channel, trimmed on every append, and by age,
+    ``MAX_AGE`` seconds, trimmed at most every ``TRIM_INTERVAL`` seconds per
+    process. Both trims are single ``DELETE`` statements over the
+    ``(channel, eid)`` and ``created`` indexes. Options come from the
+    ``EVENT_RETENTION`` setting.
+    """
+
+    _lock = threading.Lock()
+    _trimmed_at = 0.0
+
+    def __init__(self) -> None:
+        self._options = retention_options()
+
+    def append_event(self, channel: str, event_type: str, data: Any) -> Event:
+        stored = StoredEvent(
+            channel=channel,
+            type=event_type,
+            data=json.dumps(data, cls=DjangoJSONEncoder),
+        )
+        stored.save()
+
+        if stored.eid > self._options["MAX_EVENTS"]:
+            StoredEvent.objects.filter(
+                channel=channel,
+                eid__lte=stored.eid - self._options["MAX_EVENTS"],
+            ).delete()
+        self.trim_event_log()
+
+        return Event(channel, event_type, data, id=stored.eid)
+
+    def get_events(self, channel: str, last_id: int, limit: int = 100) -> list:
+        """
+        Events of ``channel`` after ``last_id``, read with a single range
+        query.
+        Raises:
+            EventDoesNotExist: If events after ``last_id`` were already
+                trimmed, or ``last_id`` was never issued; the client is sent
+                a ``stream-reset``.
+        """
+        # The referenced event is fetched too, to tell a gap from a
+        # trimmed event that was the last one the client received.
+        events = list(
+            StoredEvent.objects.filter(channel=channel, eid__gte=last_id)
+            .order_by("eid")
+            .values_list("eid", "type", "data")[: limit + 1]
+        )
+        if events and events[0][0] == last_id:
+            events = events[1:]
+        elif events and events[0][0] == last_id + 1:
+            events = events[:limit]
+        else:
+            current_id = self.get_current_id(channel)
+            if events or last_id != current_id:
+                raise EventDoesNotExist(f"No such event {last_id}", current_id)
+
+        return [
+            Event(channel, event_type, json.loads(data), id=eid)
+            for eid, event_type, data in events
+        ]
+
+    def trim_event_log(self, force: bool = False) -> Optional[int]:
+        """
+        Delete the events older than ``MAX_AGE``.
+        Args:
+            force (bool): Trim even if the last trim of this process was less
+                than ``TRIM_INTERVAL`` seconds ago.
+        Returns:
+            int: The number of events deleted, or None if skipped.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._trimmed_at < self._options["TRIM_INTERVAL"]:
+                return None
+            RetainedEventStorage._trimmed_at = now
+
+        deleted, _ = StoredEvent.objects.filter(
+            created__lt=timezone.now() - timedelta(seconds=self._options["MAX_AGE"])
+        ).delete()
+        return deleted
+
+
+class UserChannelManager(DefaultChannelManager):
+    """
+    Lets each user read only the channel named after their primary key, the
+    one returned by ``stock.views.register``.
+    """
+
+    def can_read_channel(self, user: Any, channel: str) -> bool:
+        return user is not None and user.is_authenticated and channel == str(user.pk)
@@ -0,0 +1,381 @@
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.utils import timezone
+
+from integrations.models import OutboxMessage
+from stock.models import Notification
+
+logger = logging.getLogger(__name__)
+
+ALERT_DEFAULTS = {
+    "WINDOW": 30 * 60,
+}
+
+DEFAULTS = {
+    "BATCH_SIZE": 200,
+    "MAX_ATTEMPTS": 8,
+    "BACKOFF": 1,
+    "MAX_BACKOFF": 5 * 60,
+    "POLL_INTERVAL": 5,
+    "LINGER": 0.05,
+    "WORKER": True,
+}
+
+
+@dataclass
+class DispatchResult:
+    """
+    Outcome of one ``OutboxService.dispatch`` call.
+    """
+
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+    channels: int = 0
+    latencies: list[float] = field(default_factory=list)
+
+    @property
+    def total(self) -> int:
+        return self.sent + self.retried + self.failed
+
+
+class OutboxService:
+    """
+    Transactional outbox for the notifications sent over django-eventstream.
+
+    ``enqueue`` stores the event with the notification and wakes the
+    dispatcher of the process once the transaction commits. ``dispatch``
+    claims the due messages with ``SELECT ... FOR UPDATE SKIP LOCKED`` and
+    publishes them as one event per channel; failed channels are retried
+    with exponential backoff until ``MAX_ATTEMPTS``. Delivery is at least
+    once. Options come from the ``NOTIFICATION_OUTBOX`` setting.
+    """
+
+    def __init__(self) -> None:
+        self._options = {**DEFAULTS, **getattr(settings, "NOTIFICATION_OUTBOX", {})}
+
+    @property
+    def poll_interval(self) -> float:
+        return self._options["POLL_INTERVAL"]
+
+    @property
+    def linger(self) -> float:
+        return self._options["LINGER"]
+
+    def enqueue(self, notification: Notification) -> Optional[OutboxMessage]:
+        """
+        Queue ``notification`` for its destination, in the current
+        transaction.
+        Returns:
+            OutboxMessage: The queued message, if the notification has a
+                destination.
+        """
+        if not notification.destination_id:
+            return None
+
+        message = OutboxMessage.objects.create(
+            notification=notification,
+            channel=str(notification.destination_id),
+            payload={"id": notification.pk, "text": notification.body},
+        )
+        if self._options["WORKER"]:
+            transaction.on_commit(dispatcher.wake)
+        return message
+
+    def dispatch(self) -> DispatchResult:
+        """
+        Publish up to ``BATCH_SIZE`` due messages.
+        Returns:
+            DispatchResult: Counters of the messages handled.
+        """
+        from django_eventstream import send_event
+
+        result = DispatchResult()
+        now = timezone.now()
+
+        with transaction.atomic():
+            messages = list(
+                OutboxMessage.objects.select_for_update(skip_locked=True)
+                .filter(
+                    status=OutboxMessage.Status.PENDING,
+                    available_at__lte=now,
+                )
+                .order_by("available_at", "id")[: self._options["BATCH_SIZE"]]
+            )
+
+            channels: dict[tuple[str, str], list[OutboxMessage]] = defaultdict(list)
+            for message in messages:
+                channels[(message.channel, message.event_type)].append(message)
+
+            sent, unsent = [], []
+            for (channel, event_type), batch in channels.items():
+                try:
+                    # The event is stored for replay; a savepoint keeps a
+                    # failed write from aborting the batch.
+                    with transaction.atomic():
+                        send_event(
+                            channel,
+                            event_type,
+                            {"messages": [message.payload for message in batch]},
+                        )
+                except Exception as error:  # pylint: disable=broad-exception-caught
+                    logger.warning(
+                        "Could not publish to channel %s: %s", channel, error
+                    )
+                    self._failed(batch, error, now, result)
+                    unsent += batch
+                else:
+                    sent += batch
+
+            sent_at = timezone.now()
+            OutboxMessage.objects.filter(
+                pk__in=[message.pk for message in sent]
+            ).update(
+                status=OutboxMessage.Status.SENT,
+                attempts=models.F("attempts") + 1,
+                sent_at=sent_at,
+            )
+            OutboxMessage.objects.bulk_update(
+                unsent,
+                ("status", "attempts", "available_at", "last_error"),
+            )
+
+        result.sent = len(sent)
+        result.channels = len(channels)
+        result.latencies = [
+            (sent_at - message.created_at).total_seconds() for message in sent
+        ]
+        if result.total:
+            metrics.record(result)
+            logger.info(
+                "Outbox: %d sent, %d retried, %d failed on %d channel(s)",
+                result.sent,
+                result.retried,
+                result.failed,
+                result.channels,
+            )
+        return result
+
+    def retry(self, messages: models.QuerySet) -> int:
+        """
+        Queue failed messages again.
+        Returns:
+            int: The number of messages queued.
+        """
+        count = messages.exclude(status=OutboxMessage.Status.SENT).update(
+            status=OutboxMessage.Status.PENDING,
+            attempts=0,
+            available_at=timezone.now(),
+        )
+        if count and self._options["WORKER"]:
+            transaction.on_commit(dispatcher.wake)
+        return count
+
+    def purge(self, before: datetime) -> int:
+        """
+        Delete the messages sent before ``before``.
+        Returns:
+            int: The number of messages deleted.
+        """
+        deleted, _ = OutboxMessage.objects.filter(
+            status=OutboxMessage.Status.SENT,
+            sent_at__lt=before,
+        ).delete()
+        return deleted
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Delivery metrics read from the outbox table.
+        Returns:
+            dict: ``pending``, ``failed``, ``oldest_pending`` (seconds) and the
+                ``sent`` count and ``latency`` (average seconds between
+                enqueue and send) of the last hour.
+        """
+        now = timezone.now()
+        pending = OutboxMessage.objects.filter(status=OutboxMessage.Status.PENDING)
+        sent = OutboxMessage.objects.filter(
+            status=OutboxMessage.Status.SENT,
+            sent_at__gte=now - timedelta(hours=1),
+        ).aggregate(
+            count=models.Count("id"),
+            latency=models.Avg(models.F("sent_at") - models.F("created_at")),
+        )
+        oldest = pending.aggregate(oldest=models.Min("created_at"))["oldest"]
+
+        return {
+            "pending": pending.count(),
+            "failed": OutboxMessage.objects.filter(
+                status=OutboxMessage.Status.FAILED
+            ).count(),
+            "oldest_pending": (now - oldest).total_seconds() if oldest else 0,
+            "sent": sent["count"],
+            "latency": sent["latency"].total_seconds() if sent["latency"] else 0,
+        }
+
+    def _failed(
+        self,
+        batch: list[OutboxMessage],
+        error: Exception,
+        now: datetime,
+        result: DispatchResult,
+    ) -> None:
+        for message in batch:
+            message.attempts += 1
+            message.last_error = repr(error)
+            if message.attempts >= self._options["MAX_ATTEMPTS"]:
+                message.status = OutboxMessage.Status.FAILED
+                result.failed += 1
+            else:
+                message.available_at = now + self._backoff(message.attempts)
+                result.retried += 1
+
+    def _backoff(self, attempts: int) -> timedelta:
+        delay = min(
+            self._options["MAX_BACKOFF"],
+            self._options["BACKOFF"] * 2 ** (attempts - 1),
+        )
+        # Jitter spreads the retries of channels that failed together.
+        return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+class AlertService:
+    """
+    Raises notifications that coalesce while they repeat.
+
+    An alert raised again for the same destination and ``key`` within
+    ``WINDOW`` seconds of the previous occurrence, while that notification
+    is unread, increments its ``count`` instead of creating and publishing
+    another notification. Options come from the ``NOTIFICATION_ALERTS``
+    setting.
+    """
+
+    def __init__(self) -> None:
+        self._options = {
+            **ALERT_DEFAULTS,
+            **getattr(settings, "NOTIFICATION_ALERTS", {}),
+        }
+
+    @transaction.atomic
+    def alert(self, destination: Any, key: str, body: str) -> Notification:
+        """
+        Raise the alert ``key`` for ``destination``.
+        Returns:
+            Notification: The new or the coalesced notification.
+        """
+        now = timezone.now()
+        notification = (
+            Notification.objects.select_for_update()
+            .filter(
+                destination=destination,
+                key=key,
+                read=False,
+                updated_at__gte=now - timedelta(seconds=self._options["WINDOW"]),
+            )
+            .order_by("-updated_at")
+            .first()
+        )
+
+        if notification:
+            notification.count += 1
+            notification.body = body
+            notification.updated_at = now
+            notification.save(update_fields=("count", "body", "updated_at"))
+            return notification
+
+        notification = Notification.objects.create(
+            destination=destination,
+            key=key,
+            body=body,
+            read=False,
+            created_at=now,
+            updated_at=now,
+        )
+        OutboxService().enqueue(notification)
+        return notification
+
+
+class OutboxMetrics:
+    """
+    Delivery counters of the current process, since it started.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.batches = 0
+        self.max_latency = 0.0
+        self._latency_total = 0.0
+
+    @property
+    def average_latency(self) -> float:
+        return self._latency_total / self.sent if self.sent else 0.0
+
+    def record(self, result: DispatchResult) -> None:
+        with self._lock:
+            self.sent += result.sent
+            self.retried += result.retried
+            self.failed += result.failed
+            self.batches += 1
+            self._latency_total += sum(result.latencies)
+            self.max_latency = max([self.max_latency, *result.latencies])
+
+
+class OutboxDispatcher:
+    """
+    Background thread publishing the outbox of the current process.
+
+    django-eventstream delivers to the listeners connected to the process
+    that sends the event unless ``EVENTSTREAM_REDIS`` is configured, so the
+    worker runs next to the server. It is started by the first commit that
+    enqueues a message, drains the outbox ``LINGER`` seconds after it is
+    woken up, so bursts are sent as one batch per channel, and polls every
+    ``POLL_INTERVAL`` seconds for retries.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def wake(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="outbox-dispatcher",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._event.set()
+
+    def _run(self) -> None:
+        service = OutboxService()
+        woken = True
+        while True:
+            if woken:
+                # Let the transactions committing meanwhile join the batch.
+                time.sleep(service.linger)
+            self._event.clear()
+            try:
+                while service.dispatch().total:
+                    pass
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Could not dispatch the notification outbox")
+            finally:
+                connections.close_all()
+            woken = self._event.wait(service.poll_interval)
+
+
+metrics = OutboxMetrics()
+dispatcher = OutboxDispatcher()
@@ -1,3 +1,175 @@
-from django.test import TestCase
+import asyncio
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.testing import ApplicationCommunicator
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+)
+from django.contrib.sessions.backends.db import SessionStore
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from integrations.asgi import EventStreamApplication
+from integrations.models import OutboxMessage
+from integrations.services.events import RetainedEventStorage
+from integrations.services.notification import AlertService, OutboxService
+from stock.models import User
+
+
+async def not_found(scope, receive, send):
+    await send({"type": "http.response.start", "status": 404, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+class EventStreamApplicationTests(TransactionTestCase):
+    STREAMS = 20
+
+    def setUp(self):
+        self.application = EventStreamApplication(not_found)
+        self.user = User.objects.create_user("operador", password="x")
+        session = SessionStore()
+        session[SESSION_KEY] = str(self.user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = self.user.get_session_auth_hash()
+        session.create()
+        self.cookie = f"{settings.SESSION_COOKIE_NAME}={session.session_key}"
+
+    def open(self, path, cookie=""):
+        communicator = ApplicationCommunicator(
+            self.application,
+            {
+                "type": "http",
+                "method": "GET",
+                "path": path,
+                "query_string": b"",
+                "headers": [(b"cookie", cookie.encode())],
+            },
+        )
+        return communicator
+
+    async def read(self, communicator, marker):
+        start = await communicator.receive_output(5)
+        body = b""
+        while marker not in body:
+            body += (await communicator.receive_output(5))["body"]
+        return start, body
+
+    async def test_other_paths_go_to_the_application(self):
+        communicator = self.open("/stock/")
+        await communicator.send_input({"type": "http.request", "body": b""})
+
+        self.assertEqual((await communicator.receive_output(5))["status"], 404)
+
+    async def test_channels_of_other_users_are_refused(self):
+        communicator = self.open("/events/0/", self.cookie)
+        await communicator.send_input({"type": "http.request", "body": b""})
+
+        start, _ = await self.read(communicator, b"forbidden")
+
+        self.assertEqual(start["status"], 200)
+        await communicator.wait(5)
+
+    async def test_idle_streams_add_no_threads(self):
+        # The shared sync_to_async thread is started by a first stream.
+        warm_up = self.open(f"/events/{self.user.pk}/", self.cookie)
+        await warm_up.send_input({"type": "http.request", "body": b""})
+        await self.read(warm_up, b"stream-open")
+        threads = threading.active_count()
+
+        streams = [
+            self.open(f"/events/{self.user.pk}/", self.cookie)
+            for _ in range(self.STREAMS)
+        ]
+        for communicator in streams:
+            await communicator.send_input({"type": "http.request", "body": b""})
+        await asyncio.gather(
+            *(self.read(communicator, b"stream-open") for communicator in streams)
+        )
+
+        self.assertEqual(threading.active_count(), threads)
+        for communicator in [warm_up, *streams]:
+            await communicator.send_input({"type": "http.disconnect"})
+            await communicator.wait(5)
+
+
+@override_settings(
+    NOTIFICATION_OUTBOX={"WORKER": False, "MAX_ATTEMPTS": 2, "BACKOFF": 10}
+)
+class OutboxServiceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="x")
+        self.notification = AlertService().alert(self.user, "baixo", "Estoque baixo")
+
+    def test_dispatch_publishes_and_marks_messages_sent(self):
+        result = OutboxService().dispatch()
+
+        self.assertEqual((result.sent, result.channels), (1, 1))
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ("sent", 1))
+        self.assertIsNotNone(message.sent_at)
+        (event,) = RetainedEventStorage().get_events(str(self.user.pk), 0)
+        self.assertEqual(
+            json.loads(event.data),
+            {"messages": [{"id": self.notification.pk, "text": "Estoque baixo"}]},
+        )
+
+    def test_failed_channel_backs_off_until_max_attempts(self):
+        publish = mock.patch(
+            "django_eventstream.send_event", side_effect=OSError("offline")
+        )
+        with publish, self.assertLogs("integrations.services.notification"):
+            start = timezone.now()
+            result = OutboxService().dispatch()
+
+            self.assertEqual((result.sent, result.retried), (0, 1))
+            message = OutboxMessage.objects.get()
+            self.assertEqual((message.status, message.attempts), ("pending", 1))
+            self.assertIn("offline", message.last_error)
+            # BACKOFF seconds with up to half of jitter.
+            self.assertGreaterEqual(message.available_at, start + timedelta(seconds=5))
+            self.assertLessEqual(
+                message.available_at, timezone.now() + timedelta(seconds=10)
+            )
+            self.assertEqual(OutboxService().dispatch().total, 0)
+
+            OutboxMessage.objects.update(available_at=timezone.now())
+            result = OutboxService().dispatch()
+
+        self.assertEqual(result.failed, 1)
+        message = OutboxMessage.objects.get()
+        self.assertEqual((message.status, message.attempts), ("failed", 2))
+
+
+@override_settings(
+    NOTIFICATION_OUTBOX={"WORKER": False}, NOTIFICATION_ALERTS={"WINDOW": 60}
+)
+class AlertServiceTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="x")
+
+    def test_repeats_within_the_window_are_coalesced(self):
+        first = AlertService().alert(self.user, "baixo", "Restam 3 unidades")
+        second = AlertService().alert(self.user, "baixo", "Restam 2 unidades")
+
+        self.assertEqual(second.pk, first.pk)
+        second.refresh_from_db()
+        self.assertEqual((second.count, second.body), (2, "Restam 2 unidades"))
+        self.assertEqual(OutboxMessage.objects.count(), 1)
+
+    def test_repeats_after_the_window_or_once_read_are_new(self):
+        first = AlertService().alert(self.user, "baixo", "Restam 3 unidades")
+        first.updated_at -= timedelta(seconds=61)
+        first.save(update_fields=("updated_at",))
+        second = AlertService().alert(self.user, "baixo", "Restam 2 unidades")
+        second.read = True
+        second.save(update_fields=("read",))
+        third = AlertService().alert(self.user, "baixo", "Restam 1 unidade")
+
+        self.assertEqual(len({first.pk, second.pk, third.pk}), 3)
+        self.assertEqual(OutboxMessage.objects.count(), 3)
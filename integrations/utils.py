@@ -2,12 +2,10 @@ from stock.models import Notification
 
 
 def notify(notification: Notification):
-    from django_eventstream import send_event
+    """
+    Queue ``notification`` for its destination's event channel. It is
+    published once the current transaction commits.
+    """
+    from integrations.services.notification import OutboxService
 
-    user = notification.destination
-    message = notification.body
-
-    send_event(str(user.pk), "message", {"text": message})
-
-    notification.read = True
-    notification.save(update_fields=("read",))
+    return OutboxService().enqueue(notification)
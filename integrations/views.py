@@ -1,3 +1,35 @@
-from django.shortcuts import render
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
+from django_eventstream.eventrequest import EventRequest
+from django_eventstream.utils import add_default_headers, sse_error_response
+from django_eventstream.views import Listener, stream
 
-# Create your views here.
+
+async def events(request: HttpRequest, **kwargs) -> HttpResponse:
+    """
+    Async version of ``django_eventstream.views.events`` for daphne, where
+    ``integrations.asgi.EventStreamApplication`` serves it.
+
+    The user is loaded with ``request.auser()`` and the stream waits on its
+    listener in the event loop. Requests from a GRIP proxy are not
+    supported.
+    """
+    # EventRequest reads request.user, which would load it synchronously.
+    request.user = await request.auser()
+
+    try:
+        event_request = EventRequest(request, view_kwargs=kwargs)
+    except EventRequest.Error as error:
+        response = sse_error_response("bad-request", f"Invalid request: {error}.")
+        add_default_headers(response, request=request)
+        return response
+
+    listener = Listener()
+    listener.user_id = event_request.user.pk if event_request.user else "anonymous"
+    listener.channels = event_request.channels
+
+    response = StreamingHttpResponse(
+        stream(event_request, listener),
+        content_type="text/event-stream",
+    )
+    add_default_headers(response, request=request)
+    return response
@@ -0,0 +1,35 @@
+const movementsBody = document.getElementById('stock-movements');
+const movementsMore = document.getElementById('stock-movements-more');
+
+function movementRow(movement) {
+    const row = document.createElement('tr');
+    const cell = document.createElement('td');
+    cell.className = movement.operation_type === 1
+        ? 'px-6 py-4 bg-green-100 text-green-500'
+        : 'px-6 py-4 bg-red-100 text-red-500';
+    cell.textContent = movement.text;
+    row.appendChild(cell);
+    return row;
+}
+
+async function loadMoreMovements() {
+    const url = new URL(movementsMore.dataset.url, window.location.origin);
+    url.searchParams.set('cursor', movementsMore.dataset.cursor);
+
+    movementsMore.disabled = true;
+    const response = await fetch(url);
+    const page = await response.json();
+
+    page.results.forEach((movement) => movementsBody.appendChild(movementRow(movement)));
+
+    if (page.next) {
+        movementsMore.dataset.cursor = page.next;
+        movementsMore.disabled = false;
+    } else {
+        movementsMore.remove();
+    }
+}
+
+if (movementsMore) {
+    movementsMore.addEventListener('click', loadMoreMovements);
+}
@@ -4,6 +4,7 @@ const ctxProductsPercentage = document.getElementById('products-percentage');
 const ctxProductsQuantity = document.getElementById('products-quantity');
 const ctxProductsPerSupplier = document.getElementById('products-per-supplier');
 const ctxProductsPerSupplierPercentage = document.getElementById('products-per-supplier-percentage');
+const ctxMovementsPerDay = document.getElementById('movements-per-day');
 
 const productPercentage = dataset.productPercentage;
 const productPercentageLabels = productPercentage.labels;
@@ -158,3 +159,46 @@ new Chart(ctxProductsPerSupplier, {
         }
     }
 });
+
+async function drawMovementsPerDay() {
+    const response = await fetch(ctxMovementsPerDay.dataset.url);
+    const series = await response.json();
+
+    new Chart(ctxMovementsPerDay, {
+        type: 'line',
+        data: {
+            labels: series.labels.map((day) => new Date(day + 'T00:00').toLocaleDateString('pt-BR')),
+            datasets: [
+                {
+                    label: 'Entradas',
+                    data: series.entered,
+                    borderColor: '#22c55e',
+                    backgroundColor: 'rgba(34, 197, 94, 0.2)',
+                    tension: 0.3,
+                },
+                {
+                    label: 'Saídas',
+                    data: series.exited,
+                    borderColor: '#ef4444',
+                    backgroundColor: 'rgba(239, 68, 68, 0.2)',
+                    tension: 0.3,
+                },
+            ],
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'top',
+                },
+                title: {
+                    display: true,
+                    text: 'Movimentações nos últimos 30 dias',
+                },
+            },
+        },
+    });
+}
+
+drawMovementsPerDay();
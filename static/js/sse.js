@@ -28,7 +28,8 @@ async function iniciarSSE() {
     es.addEventListener('message', async function (e) {
         const data = JSON.parse(await e.data)
         console.log(data);
-        exibirNotificacao(data.text)
+        // Notifications are published in batches per channel.
+        data.messages.forEach((message) => exibirNotificacao(message.text))
     }, false);
 }
 
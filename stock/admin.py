@@ -1,17 +1,24 @@
 """
 Admin configuration for the stock application.
 This module contains the admin configurations for the stock application models,
-including User, Product, Category, Stock, StockEntry, StockExit, Notification,
-Supplier, and LogEntry.
+including User, Product, Category, Stock, StockEntry, StockExit, MovementAudit,
+Notification, ScanDevice, ScanEvent, Supplier, and LogEntry.
 Classes:
     UserAdmin: Custom admin interface for the User model.
     StockInlineAdmin: Inline admin interface for the Stock model.
+    ProductSearchMixin: Ranked product search for the changelist search box.
     ProductAdmin: Custom admin interface for the Product model.
     CategoryAdmin: Admin interface for the Category model.
+    StockStateFilter: Changelist filter on the low/normal/high stock state.
     ProductStockAdmin: Custom admin interface for the Stock model.
+    MovementDeletionMixin: Keeps the movement rollups in sync with deletions.
+    MovementExportMixin: Streaming CSV/JSONL export for movement changelists.
     StockEntryAdmin: Custom admin interface for the StockEntry model.
     StockExitAdmin: Custom admin interface for the StockExit model.
+    MovementAuditAdmin: Read-only admin interface for the MovementAudit model.
     NotificationAdmin: Admin interface for the Notification model.
+    ScanDeviceAdmin: Admin interface for the ScanDevice model.
+    ScanEventAdmin: Read-only admin interface for the buffered scans.
     SupplierAdmin: Custom admin interface for the Supplier model.
     LogEntryAdmin: Custom admin interface for the LogEntry model.
 Each class customizes the admin interface for its respective model, including
@@ -24,18 +31,35 @@ from typing import Any
 
 from django.contrib import admin, messages
 from django.contrib.admin.models import LogEntry
+from django.contrib.admin.views.main import ORDER_VAR
 from django.contrib.auth.admin import GroupAdmin as BaseGroupAdmin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.contrib.auth.models import Group
-from django.db.models import Model
+from django.db import transaction
+from django.db.models import DecimalField, ExpressionWrapper, F, Model
+from django.db.models.functions import Coalesce
 from django.db.models.query import QuerySet
 from django.forms import BaseModelFormSet, Form, ModelForm
-from django.http import HttpRequest
+from django.http import HttpRequest, HttpResponseRedirect, StreamingHttpResponse
 from django.template.defaultfilters import floatformat
+from django.template.response import TemplateResponse
+from django.urls import reverse
+from django.utils import timezone
 from django.utils.safestring import mark_safe
 from unfold.admin import ModelAdmin, TabularInline
+from unfold.decorators import action
 
+from core.pagination import KeysetPaginationMixin
 from stock import models
+from stock.forms import StockExitAdminForm
+from stock.services.dashboard_cache import invalidate_dashboard
+from stock.services.export import CSV, JSONL, QuerySetExporter
+from stock.services.ledger import LedgerService
+from stock.services.notification import UnreadCounterService
+from stock.services.rollup import RollupService
+from stock.services.scan import ScanService
+from stock.services.search import ProductSearch
+from stock.services.stock import StockService
 
 admin.site.unregister(Group)
 
@@ -107,8 +131,40 @@ class StockInlineAdmin(TabularInline):
         return False
 
 
+class ProductSearchMixin:
+    """
+    Searches the changelist with ``ProductSearch`` instead of ``icontains``
+    on ``search_fields``, which still enable the search box.
+    Attributes:
+        product_path (str): Lookup from the model to its product, empty for
+            the Product model, whose results are ordered by relevance unless
+            a column is sorted.
+    """
+
+    product_path = ""
+
+    def get_search_results(
+        self, request: HttpRequest, queryset: QuerySet, search_term: str
+    ) -> tuple[QuerySet, bool]:
+        if not search_term.strip():
+            return super().get_search_results(request, queryset, search_term)
+
+        search = ProductSearch()
+        if not self.product_path:
+            products = search.filter(queryset, search_term)
+            if ORDER_VAR not in request.GET:
+                products = products.order_by("-search_rank", *queryset.query.order_by)
+            return products, False
+
+        products = search.filter(models.Product.objects.all(), search_term)
+        return (
+            queryset.filter(**{f"{self.product_path}__in": products.values("pk")}),
+            False,
+        )
+
+
 @admin.register(models.Product)
-class ProductAdmin(ModelAdmin):
+class ProductAdmin(ProductSearchMixin, ModelAdmin):
     """
     Admin interface for the Product model.
     Attributes:
@@ -118,6 +174,10 @@ class ProductAdmin(ModelAdmin):
         save_model(request, obj, form, change):
             Saves the Product instance. If the product does not have a user,
             assigns the current user.
+        save_formset(request, form, formset, change):
+            Records the quantity of the stocks added inline as an opening
+            entry through StockService.
+        save_related(request, form, formsets, change):
             Ensures a Stock instance is created for the product if it does not already exist.
         delete_model(request, obj):
             Deletes the Product instance along with its related stock entries,
@@ -144,6 +204,27 @@ class ProductAdmin(ModelAdmin):
             obj.user = request.user
             obj.save(update_fields=("user",))
 
+    def save_formset(
+        self,
+        request: HttpRequest,
+        form: ModelForm,
+        formset: BaseModelFormSet,
+        change: bool,
+    ) -> None:
+        if formset.model is not models.Stock:
+            super().save_formset(request, form, formset, change)
+            return
+
+        # Stocks added inline start empty and receive their quantity as an
+        # opening entry, so the audit trail records the real balance.
+        for stock in formset.save(commit=False):
+            opening = stock.quantity or 0
+            stock.quantity = 0
+            stock.save()
+            if opening:
+                self._open_stock(request, stock, opening)
+        formset.save_m2m()
+
     def save_related(
         self,
         request: HttpRequest,
@@ -158,41 +239,27 @@ class ProductAdmin(ModelAdmin):
             change,
         )
         # Verify if exists a stock for the product
-        stock = form.instance.stocks.first()
-
-        if not stock:
-            stock, _ = models.Stock.objects.update_or_create(
+        if not form.instance.stocks.exists():
+            models.Stock.objects.create(
                 product=form.instance,
-                defaults={
-                    "quantity": 0,
-                    "minimal_quantity": 1,
-                    "max_quantity": 25,
-                },
-            )
-
-        stock.refresh_from_db()
-
-        if stock and stock.quantity > 0:
-            stock_entry = models.StockEntry.objects.create(
-                stock=stock,
-                product=stock.product,
-                supplier=stock.supplier,
-                quantity=stock.quantity,
-            )
-            stock_entry.save()
-            self.log_change(
-                request,
-                stock_entry,
-                f"Foram adicionadas {stock_entry.quantity} unidades ao estoque",
+                quantity=0,
+                minimal_quantity=1,
+                max_quantity=25,
             )
 
-    def delete_model(self, request: HttpRequest, obj: Any) -> None:
-        # Delete stock, entries and exits
-        obj.stock_entries.all().delete()
-        obj.stock_exits.all().delete()
-        obj.stocks.all().delete()
-
-        super().delete_model(request, obj)
+    def _open_stock(
+        self, request: HttpRequest, stock: models.Stock, quantity: int
+    ) -> None:
+        stock_entry = StockService(
+            stock,
+            actor=request.user,
+            source=models.MovementAudit.Source.ADMIN,
+        ).entry(stock.product, quantity, stock.supplier)
+        self.log_change(
+            request,
+            stock_entry,
+            f"Foram adicionadas {stock_entry.quantity} unidades ao estoque",
+        )
 
 
 @admin.register(models.Category)
@@ -206,16 +273,44 @@ class CategoryAdmin(ModelAdmin):
     list_display = ("name",)
 
 
+class StockStateFilter(admin.SimpleListFilter):
+    """
+    Filters stocks by their stored state, served by partial indexes.
+    """
+
+    title = "Estado do estoque"
+    parameter_name = "state"
+
+    def lookups(self, request: HttpRequest, model_admin: admin.ModelAdmin) -> list:
+        return models.Stock.State.choices
+
+    def queryset(self, request: HttpRequest, queryset: QuerySet) -> QuerySet:
+        if self.value() == models.Stock.State.LOW:
+            return queryset.below_minimum()
+        if self.value() == models.Stock.State.HIGH:
+            return queryset.above_maximum()
+        if self.value() == models.Stock.State.NORMAL:
+            return queryset.within_range()
+        return queryset
+
+
 @admin.register(models.Stock)
-class ProductStockAdmin(ModelAdmin):
+class ProductStockAdmin(ProductSearchMixin, ModelAdmin):
     """
     Admin interface for managing product stock.
+
+    The stock value is computed by the changelist query and the state is a
+    stored column, so both can be sorted and the state can be filtered
+    without per-row queries.
     Attributes:
         readonly_fields (tuple): Fields that are read-only in the admin interface.
         list_display (tuple): Fields to display in the list view of the admin interface.
+        list_filter (tuple): Filters available in the list view.
     Methods:
+        get_queryset(request: HttpRequest) -> QuerySet:
+            Annotates ``total_value`` on every stock.
         stock_state(obj: Model) -> str:
-            Returns the stock state as an HTML formatted string based on the quantity.
+            Returns the stock state as an HTML formatted string.
         save_model(request: HttpRequest, obj: models.Stock, form: Form, change: Any) -> None:
             Overrides the save_model method to handle stock entry and exit logging,
             and to send notifications if the stock quantity is below the minimum
@@ -231,42 +326,53 @@ class ProductStockAdmin(ModelAdmin):
         "stock_state",
     )
 
+    list_filter = (StockStateFilter,)
+
+    list_select_related = ("product",)
+
     search_fields = ("product__name",)
+    product_path = "product"
 
-    @admin.display(description="Estado do estoque")
+    def get_queryset(self, request: HttpRequest) -> QuerySet:
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                total_value=ExpressionWrapper(
+                    Coalesce(F("quantity"), 0) * F("product__base_price"),
+                    output_field=DecimalField(max_digits=20, decimal_places=2),
+                ),
+            )
+        )
+
+    @admin.display(description="Estado do estoque", ordering="state")
     def stock_state(self, obj: Model) -> str:
         """
-        Determines the stock state of a given object based on its quantity.
+        Renders the stored state of a stock.
         Args:
-            obj (Model): The object containing stock information.
+            obj (Model): The stock.
         Returns:
             str: An HTML string representing the stock state with appropriate styling.
                 - "Baixo" (Low) if the quantity is less than the minimal quantity.
                 - "Alto" (High) if the quantity is greater than the maximum quantity.
                 - "Normal" if the quantity is within the acceptable range.
         """
-        if obj.quantity < obj.minimal_quantity:
-            text = mark_safe(
-                "<span class='inline-flex items-center rounded-md bg-red-50 px-2 py-1 text-xs font-medium text-red-700 ring-1 ring-inset ring-red-600/10'>Baixo</span>"
-            )
-            return text
-        if obj.quantity > obj.max_quantity:
+        if obj.state == models.Stock.State.NORMAL:
             text = mark_safe(
-                "<span class='inline-flex items-center rounded-md bg-red-50 px-2 py-1 text-xs font-medium text-red-700 ring-1 ring-inset ring-red-600/10'>Alto</span>"
+                "<span class='inline-flex items-center rounded-md bg-green-50 px-2 py-1 text-xs font-medium text-green-700 ring-1 ring-inset ring-green-600/20'>Normal</span>"
             )
             return text
 
         text = mark_safe(
-            "<span class='inline-flex items-center rounded-md bg-green-50 px-2 py-1 text-xs font-medium text-green-700 ring-1 ring-inset ring-green-600/20'>Normal</span>"
+            "<span class='inline-flex items-center rounded-md bg-red-50 px-2 py-1 text-xs font-medium text-red-700 ring-1 ring-inset ring-red-600/10'>"
+            f"{models.Stock.State(obj.state).label}</span>"
         )
 
         return text
 
-    @admin.display(description="Valor total em estoque")
+    @admin.display(description="Valor total em estoque", ordering="total_value")
     def total_value_in_stock(self, obj: Model) -> str:
-        text = mark_safe(
-            f"R$ {floatformat(obj.quantity * obj.product.base_price, '2g')}"
-        )
+        text = mark_safe(f"R$ {floatformat(obj.total_value, '2g')}")
         return text
 
     def save_model(
@@ -276,60 +382,138 @@ class ProductStockAdmin(ModelAdmin):
         form: Form,
         change: Any,
     ) -> None:
-        from stock.models import Notification
-
-        if change:
-            old_stock = models.Stock.objects.get(pk=obj.pk)
-
-            if obj.quantity != old_stock.quantity:
-                if obj.quantity < old_stock.quantity:
-                    stock_exit = models.StockExit.objects.create(
-                        stock=obj,
-                        product=obj.product,
-                        quantity=old_stock.quantity - obj.quantity,
-                    )
-                    stock_exit.save()
-                    self.log_change(
-                        request,
-                        stock_exit,
-                        f"Foram retiradas {stock_exit.quantity} unidades do estoque",
-                    )
-
-                if obj.quantity > old_stock.quantity:
-                    stock_entry = models.StockEntry.objects.create(
-                        stock=obj,
-                        product=obj.product,
-                        supplier=obj.supplier,
-                        quantity=obj.quantity - old_stock.quantity,
-                    )
-                    stock_entry.save()
-                    self.log_change(
-                        request,
-                        stock_entry,
-                        f"Foram adicionadas {stock_entry.quantity} unidades ao estoque",
-                    )
-
-        super().save_model(request, obj, form, change)
+        service = StockService(
+            obj,
+            actor=request.user,
+            source=models.MovementAudit.Source.ADMIN,
+        )
 
-        if obj.quantity < obj.minimal_quantity:
-            notification = Notification.objects.create(
-                destination=obj.product.user,
-                body=f"A quantidade do produto {obj.product} está abaixo da quantidade mínima!",
-                read=False,
-            )
+        with transaction.atomic():
+            previous_state = service.stored_state() if change else None
+            movement = service.adjust(obj.quantity or 0) if change else None
+
+            if isinstance(movement, models.StockExit):
+                self.log_change(
+                    request,
+                    movement,
+                    f"Foram retiradas {movement.quantity} unidades do estoque",
+                )
+            if isinstance(movement, models.StockEntry):
+                self.log_change(
+                    request,
+                    movement,
+                    f"Foram adicionadas {movement.quantity} unidades ao estoque",
+                )
+
+            super().save_model(request, obj, form, change)
+
+            if not movement:
+                service.check_thresholds(previous_state)
+
+        for notification in service.notifications:
             messages.warning(request=request, message=notification.body)
 
-        if obj.quantity > obj.max_quantity:
-            notification = Notification.objects.create(
-                destination=obj.product.user,
-                body=f"A quantidade do produto {obj.product} está acima da quantidade máxima!",
-                read=False,
-            )
-            messages.warning(request=request, message=notification.body)
+
+class MovementExportMixin:
+    """
+    Streams the movement history as CSV or JSON Lines.
+
+    The "Exportar" buttons above the changelist export every row matching the
+    current filters and search; the admin actions export the selection.
+    Output is produced while the rows are read, so exports of any size run in
+    constant memory.
+    Attributes:
+        export_fields (dict[str, str]): Output columns mapped to lookups.
+    """
+
+    export_fields: dict[str, str] = {}
+    actions = ("export_selected_csv", "export_selected_jsonl")
+    actions_list = ("export_csv", "export_jsonl")
+
+    @action(description="Exportar CSV", url_path="export-csv")
+    def export_csv(self, request: HttpRequest) -> StreamingHttpResponse:
+        return self._export(request, self._changelist_queryset(request), CSV)
+
+    @action(description="Exportar JSONL", url_path="export-jsonl")
+    def export_jsonl(self, request: HttpRequest) -> StreamingHttpResponse:
+        return self._export(request, self._changelist_queryset(request), JSONL)
+
+    @admin.action(description="Exportar selecionados (CSV)")
+    def export_selected_csv(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> StreamingHttpResponse:
+        return self._export(request, queryset, CSV)
+
+    @admin.action(description="Exportar selecionados (JSONL)")
+    def export_selected_jsonl(
+        self, request: HttpRequest, queryset: QuerySet
+    ) -> StreamingHttpResponse:
+        return self._export(request, queryset, JSONL)
+
+    def changelist_view(
+        self, request: HttpRequest, extra_context: dict | None = None
+    ) -> TemplateResponse:
+        response = super().changelist_view(request, extra_context)
+
+        # Carry the changelist filters over to the export buttons.
+        query = request.GET.urlencode()
+        if query and isinstance(response, TemplateResponse):
+            for list_action in response.context_data.get("actions_list", ()):
+                list_action["path"] = f"{list_action['path']}?{query}"
+
+        return response
+
+    def _changelist_queryset(self, request: HttpRequest) -> QuerySet:
+        return self.get_changelist_instance(request).get_queryset(request)
+
+    def _export(
+        self,
+        request: HttpRequest,
+        queryset: QuerySet,
+        file_format: str,
+    ) -> StreamingHttpResponse:
+        filename = f"{self.model._meta.model_name}-{timezone.now():%Y%m%d%H%M%S}"
+        exporter = QuerySetExporter(queryset.order_by("pk"), self.export_fields)
+
+        return exporter.response(request, file_format, filename)
+
+
+class MovementDeletionMixin:
+    """
+    Subtracts deleted entries and exits from the movement rollups, with one
+    update per affected stock and day, and discards the stock checkpoints
+    that included them.
+    """
+
+    def delete_model(self, request: HttpRequest, obj: Model) -> None:
+        movements = self.model.objects.filter(pk=obj.pk)
+        with transaction.atomic():
+            RollupService().remove_movements(movements)
+            LedgerService().discard_checkpoints(movements)
+            super().delete_model(request, obj)
+        transaction.on_commit(invalidate_dashboard)
+
+    def delete_queryset(self, request: HttpRequest, queryset: QuerySet) -> None:
+        with transaction.atomic():
+            RollupService().remove_movements(queryset)
+            LedgerService().discard_checkpoints(queryset)
+            super().delete_queryset(request, queryset)
+        transaction.on_commit(invalidate_dashboard)
 
 
 @admin.register(models.StockEntry)
-class StockEntryAdmin(ModelAdmin):
+class StockEntryAdmin(
+    KeysetPaginationMixin, MovementDeletionMixin, MovementExportMixin, ModelAdmin
+):
+    export_fields = {
+        "codigo": "code",
+        "produto": "product__name",
+        "codigo_produto": "product__code",
+        "estoque": "stock__code",
+        "fornecedor": "supplier__name",
+        "quantidade": "quantity",
+        "criado_em": "created_at",
+    }
     list_display = (
         "code",
         "product",
@@ -337,6 +521,7 @@ class StockEntryAdmin(ModelAdmin):
         "quantity",
         "created_at",
     )
+    list_select_related = ("product", "stock__product")
     readonly_fields = (
         "code",
         "stock",
@@ -361,16 +546,13 @@ class StockEntryAdmin(ModelAdmin):
         form: Form,
         change: Any,
     ) -> None:
-        from stock.models import Notification
-
         # Before save the stock entry, set correct stock to change quantity
-        obj.stock = obj.product.stocks.first()
-
-        super().save_model(request, obj, form, change)
-        obj.refresh_from_db()
-
-        obj.stock.quantity += obj.quantity
-        obj.stock.save(update_fields=("quantity",))
+        service = StockService(
+            obj.product.stocks.first(),
+            actor=request.user,
+            source=models.MovementAudit.Source.ADMIN,
+        )
+        service.register_entry(obj)
 
         self.log_change(
             request,
@@ -378,17 +560,23 @@ class StockEntryAdmin(ModelAdmin):
             f"Foram adicionadas {obj.quantity} unidades ao estoque",
         )
 
-        if obj.stock.quantity > obj.stock.max_quantity:
-            notification = Notification.objects.create(
-                destination=obj.product.user,
-                body=f'A quantidade do produto "{obj.product}" está acima da quantidade máxima!',
-                read=False,
-            )
+        for notification in service.notifications:
             messages.warning(request=request, message=notification.body)
 
 
 @admin.register(models.StockExit)
-class StockExitAdmin(ModelAdmin):
+class StockExitAdmin(
+    KeysetPaginationMixin, MovementDeletionMixin, MovementExportMixin, ModelAdmin
+):
+    form = StockExitAdminForm
+    export_fields = {
+        "codigo": "code",
+        "produto": "product__name",
+        "codigo_produto": "product__code",
+        "estoque": "stock__code",
+        "quantidade": "quantity",
+        "criado_em": "created_at",
+    }
     list_display = (
         "code",
         "product",
@@ -396,6 +584,7 @@ class StockExitAdmin(ModelAdmin):
         "quantity",
         "created_at",
     )
+    list_select_related = ("product", "stock__product")
 
     readonly_fields = (
         "code",
@@ -421,33 +610,150 @@ class StockExitAdmin(ModelAdmin):
         form: Form,
         change: Any,
     ) -> None:
-        from stock.models import Notification
-
-        # Before save the stock entry, set correct stock to change quantity
-        obj.stock = obj.product.stocks.first()
-
-        super().save_model(request, obj, form, change)
+        # Before save the stock exit, set correct stock to change quantity
+        service = StockService(
+            obj.product.stocks.first(),
+            actor=request.user,
+            source=models.MovementAudit.Source.ADMIN,
+        )
+        service.register_exit(obj)
 
-        obj.stock.quantity -= obj.quantity
-        obj.stock.save(update_fields=("quantity",))
         self.log_change(
             request,
             obj,
             f"Foram retiradas {obj.quantity} unidades do estoque",
         )
 
-        if obj.stock.quantity < obj.stock.minimal_quantity:
-            notification = Notification.objects.create(
-                destination=obj.product.user,
-                body=f'A quantidade do produto "{obj.product}" está abaixo da quantidade mínima!',
-                read=False,
-            )
+        for notification in service.notifications:
             messages.warning(request=request, message=notification.body)
 
 
+@admin.register(models.MovementAudit)
+class MovementAuditAdmin(ProductSearchMixin, KeysetPaginationMixin, ModelAdmin):
+    """
+    Read-only timeline of every stock quantity change.
+    Attributes:
+        list_display (tuple): Fields to display in the list view of the admin interface.
+        list_filter (tuple): Filters available in the list view.
+    """
+
+    list_display = (
+        "created_at",
+        "actor",
+        "product",
+        "delta",
+        "before",
+        "after",
+        "source",
+    )
+    list_filter = ("source",)
+    list_select_related = ("actor", "product")
+    search_fields = ("product__name",)
+    product_path = "product"
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(
+        self, request: HttpRequest, obj: Any | None = ...
+    ) -> bool:
+        return False
+
+    def has_delete_permission(
+        self, request: HttpRequest, obj: Any | None = ...
+    ) -> bool:
+        return False
+
+
 @admin.register(models.Notification)
-class NotificationAdmin(ModelAdmin):
-    pass
+class NotificationAdmin(KeysetPaginationMixin, ModelAdmin):
+    ordering = ("-id",)
+    list_display = (
+        "destination",
+        "body",
+        "count",
+        "read",
+        "updated_at",
+    )
+    list_select_related = ("destination",)
+    actions = ("mark_selected_read",)
+    actions_list = ("mark_all_read",)
+
+    @action(description="Marcar todas como lidas", url_path="mark-all-read")
+    def mark_all_read(self, request: HttpRequest) -> HttpResponseRedirect:
+        marked = UnreadCounterService().mark_all_read(request.user)
+        messages.success(request, f"{marked} notificação(ões) marcada(s) como lida(s).")
+        return HttpResponseRedirect(reverse("admin:stock_notification_changelist"))
+
+    @admin.action(description="Marcar selecionadas como lidas")
+    def mark_selected_read(self, request: HttpRequest, queryset: QuerySet) -> None:
+        marked = UnreadCounterService().mark_read(queryset)
+        messages.success(request, f"{marked} notificação(ões) marcada(s) como lida(s).")
+
+
+@admin.register(models.ScanDevice)
+class ScanDeviceAdmin(ModelAdmin):
+    """
+    Handheld devices. Setting ``last_sequence`` back to 0 lets a device that
+    lost its batch counter start over from 1. Tokens are shown once, when
+    issued by the ``issue_tokens`` action.
+    """
+
+    list_display = (
+        "name",
+        "user",
+        "has_token",
+        "last_sequence",
+        "updated_at",
+    )
+    list_select_related = ("user",)
+    search_fields = ("name",)
+    actions = ("issue_tokens",)
+
+    @admin.display(description="Token", boolean=True)
+    def has_token(self, obj: models.ScanDevice) -> bool:
+        return bool(obj.token_hash)
+
+    @admin.action(description="Gerar novo token para os coletores selecionados")
+    def issue_tokens(self, request: HttpRequest, queryset: QuerySet) -> None:
+        service = ScanService()
+        for device in queryset:
+            token = service.issue_token(device)
+            messages.warning(
+                request,
+                f"Token de {device}: {token} (não será exibido novamente).",
+            )
+
+
+@admin.register(models.ScanEvent)
+class ScanEventAdmin(KeysetPaginationMixin, ModelAdmin):
+    ordering = ("-id",)
+    list_display = (
+        "code",
+        "delta",
+        "device",
+        "sequence",
+        "actor",
+        "scanned_at",
+        "status",
+        "error",
+    )
+    list_filter = ("status",)
+    list_select_related = ("device", "actor")
+    actions = ("retry_scans",)
+
+    @admin.action(description="Reprocessar leituras selecionadas")
+    def retry_scans(self, request: HttpRequest, queryset: QuerySet) -> None:
+        count = ScanService().retry(queryset)
+        messages.success(request, f"{count} leitura(s) colocada(s) na fila novamente.")
+
+    def has_add_permission(self, request: HttpRequest) -> bool:
+        return False
+
+    def has_change_permission(
+        self, request: HttpRequest, obj: Any | None = ...
+    ) -> bool:
+        return False
 
 
 @admin.register(models.Supplier)
@@ -483,12 +789,12 @@ class LogEntryAdmin(ModelAdmin):
     def get_queryset(self, request: HttpRequest) -> QuerySet:
         queryset = super().get_queryset(request)
         return queryset.filter(
+            content_type__app_label="stock",
             content_type__model__in=(
                 "product",
                 "stockentry",
                 "stockexit",
             ),
-            change_message__contains="Foram",
         )
 
     def has_change_permission(
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class StockConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "stock"
+
+    def ready(self) -> None:
+        from stock import signals
+
+        post_migrate.connect(signals.create_upcoming_partitions, sender=self)
@@ -0,0 +1,42 @@
+from typing import Any
+
+from django import forms
+
+from stock import models
+
+
+class StockExitAdminForm(forms.ModelForm):
+    """
+    Rejects exits larger than the quantity available in the product stock.
+
+    ``StockService`` enforces the same rule atomically; this check only turns
+    the common case into a form error instead of a failed request.
+    """
+
+    class Meta:
+        model = models.StockExit
+        fields = "__all__"
+
+    def clean(self) -> dict[str, Any]:
+        cleaned_data = super().clean()
+        product = cleaned_data.get("product")
+        quantity = cleaned_data.get("quantity")
+
+        if not product or quantity is None:
+            return cleaned_data
+
+        stock = product.stocks.first()
+        if not stock:
+            self.add_error("product", "O produto não possui estoque.")
+            return cleaned_data
+
+        available = (stock.quantity or 0) + (
+            self.instance.quantity if self.instance.pk else 0
+        )
+        if quantity > available:
+            self.add_error(
+                "quantity",
+                f"O estoque possui apenas {available} unidade(s) disponível(is).",
+            )
+
+        return cleaned_data
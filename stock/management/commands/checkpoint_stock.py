@@ -0,0 +1,54 @@
+import time
+from datetime import datetime, time as day_start
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from stock.services.ledger import LedgerService
+
+
+class Command(BaseCommand):
+    help = (
+        "Store the ledger balance of every stock that moved since its previous "
+        "checkpoint. Meant to run daily, shortly after midnight."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--at",
+            help=(
+                "ISO date or datetime of the checkpoint. Defaults to the start "
+                "of the current day."
+            ),
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        taken_at = self._taken_at(options["at"])
+        started = time.monotonic()
+
+        written = LedgerService(chunk_size=options["chunk_size"]).checkpoint(taken_at)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{written} checkpoint(s) em {taken_at.isoformat()} "
+                f"({time.monotonic() - started:.1f}s)."
+            )
+        )
+
+    def _taken_at(self, value):
+        if not value:
+            return timezone.make_aware(
+                datetime.combine(timezone.localdate(), day_start.min)
+            )
+
+        try:
+            taken_at = datetime.fromisoformat(value)
+        except ValueError as error:
+            raise CommandError(f"Data inválida: {value}") from error
+
+        if timezone.is_naive(taken_at):
+            taken_at = timezone.make_aware(taken_at)
+        if taken_at > timezone.now():
+            raise CommandError("O checkpoint não pode estar no futuro.")
+        return taken_at
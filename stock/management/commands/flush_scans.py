@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from stock.services.scan import ScanService
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the scans buffered by the scan ingestion endpoint. Runs until "
+        "interrupted unless --once is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Apply the buffered scans and exit.",
+        )
+        parser.add_argument(
+            "--stats",
+            action="store_true",
+            help="Only print the buffer counters.",
+        )
+
+    def handle(self, *args, **options):
+        service = ScanService()
+
+        if not options["stats"]:
+            while True:
+                while (result := service.flush()).events:
+                    self.stdout.write(
+                        f"{result.events} leitura(s) em {result.movements} "
+                        f"movimentação(ões), {result.rejected} rejeitada(s)."
+                    )
+                if options["once"]:
+                    break
+                connections.close_all()
+                time.sleep(service.poll_interval)
+
+        stats = service.stats()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Pendentes: {stats['pending']} "
+                f"(mais antiga há {stats['oldest_pending']:.0f}s), "
+                f"rejeitadas: {stats['rejected']}."
+            )
+        )
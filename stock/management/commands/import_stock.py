@@ -0,0 +1,86 @@
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.models import ImportCheckpoint, User
+from stock.services.importer import (
+    CSV,
+    JSONL,
+    ImportRowError,
+    StockImporter,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream products, their stock, opening entries and categories from a "
+        "CSV or JSON Lines file. Reruns resume after the last committed chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format",
+            choices=(CSV, JSONL),
+            help="Source format. Defaults to the file extension.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--user",
+            help="E-mail of the user that will own the imported products.",
+        )
+        parser.add_argument(
+            "--no-copy",
+            action="store_true",
+            help="Use bulk_create even on PostgreSQL.",
+        )
+        parser.add_argument(
+            "--restart",
+            action="store_true",
+            help="Discard the checkpoint and import the file from the start.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"].resolve()
+        if not path.exists():
+            raise CommandError(f"{path} não existe")
+
+        file_format = options["format"] or path.suffix.lstrip(".").lower()
+        if file_format not in (CSV, JSONL):
+            raise CommandError("Informe --format csv ou --format jsonl")
+
+        user = None
+        if options["user"]:
+            user = User.objects.filter(email=options["user"]).first()
+            if not user:
+                raise CommandError(f"Usuário {options['user']} não encontrado")
+
+        source = str(path)
+        if options["restart"]:
+            ImportCheckpoint.objects.filter(source=source).delete()
+
+        importer = StockImporter(
+            user=user,
+            chunk_size=options["chunk_size"],
+            use_copy=False if options["no_copy"] else None,
+        )
+        started = time.monotonic()
+        resumed = (
+            ImportCheckpoint.objects.filter(source=source)
+            .values_list("rows", flat=True)
+            .first()
+            or 0
+        )
+
+        def progress(rows: int) -> None:
+            rate = (rows - resumed) / max(time.monotonic() - started, 1e-6)
+            self.stdout.write(f"{rows} linhas importadas ({rate:.0f} linhas/s)")
+
+        try:
+            rows = importer.run(read_rows(path, file_format), source, progress)
+        except ImportRowError as error:
+            raise CommandError(str(error)) from error
+
+        self.stdout.write(self.style.SUCCESS(f"Importação concluída: {rows} linhas."))
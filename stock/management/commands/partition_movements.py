@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from stock.models import StockEntry, StockExit
+from stock.services.partitions import (
+    PartitionedTable,
+    add_months,
+    partitioning_options,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create the upcoming monthly partitions of the stock entry and exit "
+        "tables, and detach or archive the old ones. Meant to run daily from "
+        "cron; migrate also creates the upcoming partitions."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--convert",
+            action="store_true",
+            help="Convert the tables to partitioned tables first.",
+        )
+        parser.add_argument(
+            "--ahead",
+            type=int,
+            default=partitioning_options()["MONTHS_AHEAD"],
+            help="Number of months after the current one to create.",
+        )
+        parser.add_argument(
+            "--detach-before",
+            help="Detach the partitions of the months before YYYY-MM.",
+        )
+        parser.add_argument(
+            "--archive-dir",
+            help=(
+                "Dump the detached partitions to gzipped CSV files in this "
+                "directory and drop them."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("O particionamento requer PostgreSQL.")
+        if options["archive_dir"] and not options["detach_before"]:
+            raise CommandError("--archive-dir requer --detach-before.")
+
+        detach_before = self._month(options["detach_before"])
+        current = timezone.localdate().replace(day=1)
+
+        for model in (StockEntry, StockExit):
+            table = PartitionedTable(model._meta.db_table)
+
+            with transaction.atomic():
+                if options["convert"]:
+                    table.partition(options["ahead"])
+                if not table.is_partitioned():
+                    raise CommandError(
+                        f"{table.table} não está particionada; use --convert."
+                    )
+
+                created = table.ensure(current, add_months(current, options["ahead"]))
+                detached = table.detach(detach_before) if detach_before else []
+
+            for name in created:
+                self.stdout.write(f"Partição criada: {name}")
+            for name in detached:
+                if options["archive_dir"]:
+                    path = table.archive(name, options["archive_dir"])
+                    self.stdout.write(f"Partição arquivada: {path}")
+                else:
+                    self.stdout.write(f"Partição desanexada: {name}")
+
+        self.stdout.write(self.style.SUCCESS("Partições atualizadas."))
+
+    def _month(self, value):
+        if not value:
+            return None
+
+        try:
+            return date.fromisoformat(f"{value}-01")
+        except ValueError as error:
+            raise CommandError(f"Mês inválido: {value}") from error
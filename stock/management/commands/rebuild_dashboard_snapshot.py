@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.services.snapshot import DashboardSnapshotService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the dashboard snapshot from the stock tables and verify it "
+        "against a full recomputation."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--check",
+            action="store_true",
+            help="Only verify the current snapshot, without rebuilding it.",
+        )
+
+    def handle(self, *args, **options):
+        service = DashboardSnapshotService()
+
+        if not options["check"]:
+            service.rebuild()
+            self.stdout.write("Dashboard snapshot rebuilt.")
+
+        errors = service.verify()
+        if errors:
+            for error in errors:
+                self.stderr.write(error)
+            raise CommandError("Dashboard snapshot does not match the stock tables.")
+
+        self.stdout.write(self.style.SUCCESS("Dashboard snapshot is consistent."))
@@ -0,0 +1,40 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from stock.services.rollup import RollupService
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the daily and monthly movement rollups from the entry and "
+        "exit tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--since",
+            help=(
+                "ISO date of the first day to rebuild; its whole month is "
+                "rebuilt. Defaults to the whole history."
+            ),
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            try:
+                since = date.fromisoformat(options["since"])
+            except ValueError as error:
+                raise CommandError(f"Data inválida: {options['since']}") from error
+
+        started = time.monotonic()
+        written = RollupService().rebuild(since)
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{written} rollup(s) diário(s) recalculado(s) "
+                f"({time.monotonic() - started:.1f}s)."
+            )
+        )
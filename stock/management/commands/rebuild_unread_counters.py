@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from stock.services.notification import UnreadCounterService
+
+
+class Command(BaseCommand):
+    help = "Recount the unread notifications of every user."
+
+    def handle(self, *args, **options):
+        written = UnreadCounterService().rebuild()
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{written} contador(es) de notificações recalculado(s)."
+            )
+        )
@@ -0,0 +1,78 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0014_alter_stock_max_quantity_and_more"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "total_value",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Valor total em estoque",
+                    ),
+                ),
+                (
+                    "stocked_products",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Estoques com produto"
+                    ),
+                ),
+                (
+                    "valued_stocks",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Estoques com valor"
+                    ),
+                ),
+                (
+                    "max_price",
+                    models.DecimalField(
+                        blank=True,
+                        decimal_places=2,
+                        max_digits=10,
+                        null=True,
+                        verbose_name="Maior preço",
+                    ),
+                ),
+                (
+                    "categories",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Produtos por categoria"
+                    ),
+                ),
+                (
+                    "suppliers",
+                    models.JSONField(
+                        blank=True, default=dict, verbose_name="Produtos por fornecedor"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Atualizado em"),
+                ),
+            ],
+            options={
+                "verbose_name": "Resumo do painel",
+                "verbose_name_plural": "Resumos do painel",
+            },
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0015_dashboardsnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ImportCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name="Origem"
+                    ),
+                ),
+                (
+                    "rows",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Linhas importadas"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Atualizado em"),
+                ),
+            ],
+            options={
+                "verbose_name": "Checkpoint de importação",
+                "verbose_name_plural": "Checkpoints de importação",
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:36
+
+import django.db.models.functions.comparison
+import django.db.models.lookups
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0016_importcheckpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="stock",
+            name="state",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        django.db.models.lookups.LessThan(
+                            django.db.models.functions.comparison.Coalesce(
+                                "quantity", 0
+                            ),
+                            django.db.models.functions.comparison.Coalesce(
+                                "minimal_quantity", 0
+                            ),
+                        ),
+                        then=models.Value("low"),
+                    ),
+                    models.When(
+                        django.db.models.lookups.GreaterThan(
+                            django.db.models.functions.comparison.Coalesce(
+                                "quantity", 0
+                            ),
+                            django.db.models.functions.comparison.Coalesce(
+                                "max_quantity", 0
+                            ),
+                        ),
+                        then=models.Value("high"),
+                    ),
+                    default=models.Value("normal"),
+                ),
+                output_field=models.CharField(
+                    choices=[("low", "Baixo"), ("normal", "Normal"), ("high", "Alto")],
+                    max_length=6,
+                ),
+                verbose_name="Estado do estoque",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                condition=models.Q(("state", "low")),
+                fields=["id"],
+                name="stock_below_minimum_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stock",
+            index=models.Index(
+                condition=models.Q(("state", "high")),
+                fields=["id"],
+                name="stock_above_maximum_idx",
+            ),
+        ),
+    ]
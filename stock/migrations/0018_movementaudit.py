@@ -0,0 +1,114 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:41
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0017_stock_state"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovementAudit",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("delta", models.IntegerField(verbose_name="Variação")),
+                (
+                    "before",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Quantidade anterior"
+                    ),
+                ),
+                (
+                    "after",
+                    models.PositiveIntegerField(
+                        blank=True, null=True, verbose_name="Quantidade posterior"
+                    ),
+                ),
+                (
+                    "source",
+                    models.CharField(
+                        choices=[
+                            ("admin", "Painel administrativo"),
+                            ("service", "Serviço"),
+                            ("batch", "Lote"),
+                            ("import", "Importação"),
+                            ("legacy", "Histórico do admin"),
+                        ],
+                        default="service",
+                        max_length=10,
+                        verbose_name="Origem",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Criado em"
+                    ),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="movement_audits",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="movement_audits",
+                        to="stock.product",
+                        verbose_name="Produto",
+                    ),
+                ),
+                (
+                    "stock",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="movement_audits",
+                        to="stock.stock",
+                        verbose_name="Estoque",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Movimentação auditada",
+                "verbose_name_plural": "Auditoria de movimentações",
+                "indexes": [
+                    models.Index(
+                        fields=["product", "-created_at", "-id"],
+                        name="audit_product_timeline_idx",
+                    ),
+                    models.Index(
+                        fields=["actor", "-created_at", "-id"],
+                        name="audit_actor_timeline_idx",
+                    ),
+                    models.Index(
+                        fields=["-created_at", "-id"], name="audit_timeline_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,115 @@
+import re
+
+from django.contrib.auth.management import create_permissions
+from django.db import migrations
+
+BATCH_SIZE = 2000
+
+MESSAGE = re.compile(r"Foram (adicionadas|retiradas) (\d+) unidades")
+
+
+def backfill(apps, schema_editor):
+    """
+    Copy the stock movements logged by the admin as ``LogEntry`` messages.
+    """
+    LogEntry = apps.get_model("admin", "LogEntry")
+    MovementAudit = apps.get_model("stock", "MovementAudit")
+
+    for model_name in ("stockentry", "stockexit"):
+        model = apps.get_model("stock", model_name)
+        entries = (
+            LogEntry.objects.filter(
+                content_type__app_label="stock",
+                content_type__model=model_name,
+                change_message__startswith="Foram ",
+            )
+            .order_by("pk")
+            .values_list("user_id", "object_id", "change_message", "action_time")
+        )
+
+        batch = []
+        for user_id, object_id, message, action_time in entries.iterator(
+            chunk_size=BATCH_SIZE
+        ):
+            match = MESSAGE.match(message)
+            if not match:
+                continue
+
+            quantity = int(match.group(2))
+            batch.append(
+                (
+                    object_id,
+                    MovementAudit(
+                        actor_id=user_id,
+                        delta=(
+                            quantity if match.group(1) == "adicionadas" else -quantity
+                        ),
+                        source="legacy",
+                        created_at=action_time,
+                    ),
+                )
+            )
+            if len(batch) >= BATCH_SIZE:
+                _flush(model, MovementAudit, batch)
+                batch = []
+
+        _flush(model, MovementAudit, batch)
+
+
+def _flush(model, MovementAudit, batch):
+    movements = {
+        str(pk): (stock_id, product_id)
+        for pk, stock_id, product_id in model.objects.filter(
+            pk__in=[object_id for object_id, _ in batch if object_id.isdigit()]
+        ).values_list("pk", "stock_id", "product_id")
+    }
+    for object_id, audit in batch:
+        audit.stock_id, audit.product_id = movements.get(object_id, (None, None))
+
+    MovementAudit.objects.bulk_create(audit for _, audit in batch)
+
+
+def grant_view_permission(apps, schema_editor):
+    """
+    Let the groups that could read the admin log read the audit.
+    """
+    Group = apps.get_model("auth", "Group")
+    Permission = apps.get_model("auth", "Permission")
+
+    # Permissions are only created after every migration ran.
+    app_config = apps.get_app_config("stock")
+    app_config.models_module = True
+    create_permissions(app_config, apps=apps, verbosity=0)
+    app_config.models_module = None
+
+    view_audit = Permission.objects.filter(
+        content_type__app_label="stock",
+        codename="view_movementaudit",
+    ).first()
+    if not view_audit:
+        return
+
+    for group in Group.objects.filter(
+        permissions__content_type__app_label="admin",
+        permissions__codename="view_logentry",
+    ):
+        group.permissions.add(view_audit)
+
+
+def clear(apps, schema_editor):
+    apps.get_model("stock", "MovementAudit").objects.filter(source="legacy").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin", "0003_logentry_add_action_flag_choices"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+        ("contenttypes", "0002_remove_content_type_name"),
+        ("stock", "0018_movementaudit"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, clear),
+        migrations.RunPython(grant_view_permission, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.2 on 2026-10-18 10:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0019_backfill_movementaudit"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StockCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("taken_at", models.DateTimeField(verbose_name="Data de referência")),
+                ("quantity", models.BigIntegerField(verbose_name="Quantidade")),
+            ],
+            options={
+                "verbose_name": "Checkpoint de estoque",
+                "verbose_name_plural": "Checkpoints de estoque",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="stockentry",
+            index=models.Index(
+                fields=["stock", "created_at"], name="stock_entry_ledger_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockexit",
+            index=models.Index(
+                fields=["stock", "created_at"], name="stock_exit_ledger_idx"
+            ),
+        ),
+        migrations.AddField(
+            model_name="stockcheckpoint",
+            name="stock",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="checkpoints",
+                to="stock.stock",
+                verbose_name="Estoque",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="stockcheckpoint",
+            index=models.Index(
+                fields=["stock", "-taken_at"], name="stock_checkpoint_latest_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="stockcheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("stock", "taken_at"), name="stock_checkpoint_unique"
+            ),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0020_stockcheckpoint"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MovementRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "period",
+                    models.CharField(
+                        choices=[("day", "Dia"), ("month", "Mês")],
+                        max_length=5,
+                        verbose_name="Período",
+                    ),
+                ),
+                ("period_start", models.DateField(verbose_name="Início do período")),
+                (
+                    "entered",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Quantidade de entrada"
+                    ),
+                ),
+                (
+                    "exited",
+                    models.BigIntegerField(
+                        default=0, verbose_name="Quantidade de saída"
+                    ),
+                ),
+                (
+                    "stock",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="movement_rollups",
+                        to="stock.stock",
+                        verbose_name="Estoque",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Consolidado de movimentações",
+                "verbose_name_plural": "Consolidados de movimentações",
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("period", "period_start", "stock"),
+                        name="movement_rollup_unique",
+                    )
+                ],
+            },
+        ),
+    ]
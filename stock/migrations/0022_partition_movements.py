@@ -0,0 +1,105 @@
+from django.db import migrations
+
+MODELS = ("stockentry", "stockexit")
+
+
+def unpartition(apps, schema_editor):
+    """
+    Convert the movement tables back to regular tables. They are converted to
+    monthly partitions by ``manage.py partition_movements --convert``, never
+    by the migration, so the schema does not depend on the settings.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for model_name in MODELS:
+        table = apps.get_model("stock", model_name)._meta.db_table
+        unpartition_table(table, schema_editor.connection)
+
+
+def unpartition_table(name, connection):
+    """
+    Frozen copy of ``PartitionedTable.unpartition`` as of this migration:
+    recreate the table as a regular one with the rows, indexes and
+    constraints of its partitions, and ``id`` alone as the primary key.
+    """
+    quote = connection.ops.quote_name
+    table = quote(name)
+    previous = quote(f"{name}_previous")
+    sequence = quote(f"{name}_id_seq")
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table]
+        )
+        row = cursor.fetchone()
+        if not row or row[0] != "p":
+            return
+
+        cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+            "WHERE indrelid = to_regclass(%s) AND NOT indisprimary "
+            "AND indexrelid NOT IN (SELECT conindid FROM pg_constraint)",
+            [table],
+        )
+        indexes = [
+            without_partition_key(definition.replace(" ON ONLY ", " ON "))
+            for definition, in cursor.fetchall()
+        ]
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype IN ('f', 'u')",
+            [table],
+        )
+        constraints = [
+            (constraint, without_partition_key(definition))
+            for constraint, definition in cursor.fetchall()
+        ]
+
+        cursor.execute(f"ALTER TABLE {table} RENAME TO {previous}")
+        cursor.execute(
+            f"CREATE TABLE {table} (LIKE {previous} "
+            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+        )
+        cursor.execute(f"INSERT INTO {table} SELECT * FROM {previous}")
+        cursor.execute(f"DROP TABLE {previous} CASCADE")
+
+        cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+        cursor.execute(
+            f"SELECT setval('{sequence}', coalesce(max(id), 0) + 1, false) "
+            f"FROM {table}"
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')"
+        )
+        cursor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {quote(name + '_pkey')} "
+            "PRIMARY KEY (id)"
+        )
+        for definition in indexes:
+            cursor.execute(definition)
+        for constraint, definition in constraints:
+            cursor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT {quote(constraint)} {definition}"
+            )
+        cursor.execute(f"ANALYZE {table}")
+
+
+def without_partition_key(definition):
+    # Unique indexes and constraints of a partitioned table end with it.
+    unique = " UNIQUE INDEX " in definition or definition.startswith("UNIQUE ")
+    if unique and definition.endswith(", created_at)"):
+        return definition[: -len(", created_at)")] + ")"
+    return definition
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0021_movementrollup"),
+    ]
+
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, unpartition),
+    ]
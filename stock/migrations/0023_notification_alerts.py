@@ -0,0 +1,48 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0022_partition_movements"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="notification",
+            name="count",
+            field=models.PositiveIntegerField(default=1, verbose_name="Ocorrências"),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Criado em"
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="key",
+            field=models.CharField(
+                blank=True, default="", max_length=100, verbose_name="Chave"
+            ),
+        ),
+        migrations.AddField(
+            model_name="notification",
+            name="updated_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, verbose_name="Atualizado em"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notification",
+            index=models.Index(
+                condition=models.Q(("read", False)),
+                fields=["destination", "key", "-updated_at"],
+                name="notification_alert_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def count_unread(apps, schema_editor):
+    Notification = apps.get_model("stock", "Notification")
+    NotificationCounter = apps.get_model("stock", "NotificationCounter")
+
+    NotificationCounter.objects.bulk_create(
+        NotificationCounter(user_id=user_id, unread=total)
+        for user_id, total in Notification.objects.filter(
+            read=False,
+            destination__isnull=False,
+        )
+        .values("destination_id")
+        .annotate(total=models.Count("id"))
+        .order_by()
+        .values_list("destination_id", "total")
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0023_notification_alerts"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NotificationCounter",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="notification_counter",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+                (
+                    "unread",
+                    models.PositiveIntegerField(default=0, verbose_name="Não lidas"),
+                ),
+            ],
+            options={
+                "verbose_name": "Contador de notificações",
+                "verbose_name_plural": "Contadores de notificações",
+            },
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
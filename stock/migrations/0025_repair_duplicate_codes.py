@@ -0,0 +1,73 @@
+import secrets
+import time
+from itertools import islice
+
+from django.db import migrations, models
+
+BATCH_SIZE = 2000
+
+CODE_ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+
+MODELS = ("product", "supplier", "stock", "stockentry", "stockexit")
+
+
+def repair(apps, schema_editor):
+    """
+    Give a new code to every row sharing its code with an older row, so the
+    codes can be made unique.
+    """
+    new_codes = code_generator()
+    for model_name in MODELS:
+        model = apps.get_model("stock", model_name)
+        duplicated = (
+            model.objects.values("code")
+            .annotate(rows=models.Count("id"), first=models.Min("id"))
+            .filter(rows__gt=1)
+            .order_by()
+            .values_list("code", "first")
+        )
+
+        rows = duplicated.iterator()
+        while chunk := list(islice(rows, BATCH_SIZE)):
+            codes, first = zip(*chunk)
+            renamed = [
+                model(pk=pk)
+                for pk in model.objects.filter(code__in=codes)
+                .exclude(pk__in=first)
+                .values_list("pk", flat=True)
+            ]
+            for row, code in zip(renamed, new_codes):
+                row.code = code
+            model.objects.bulk_update(renamed, ("code",), batch_size=BATCH_SIZE)
+
+
+def code_generator():
+    """
+    Frozen copy of ``core.utils.generate_codes`` as of this migration: 16
+    characters of Crockford's base 32, the time in milliseconds followed by
+    a 30-bit counter starting at a random value.
+    """
+    millis = time.time_ns() // 1_000_000
+    counter = secrets.randbits(29)
+    while True:
+        if counter >= 1 << 30:
+            millis, counter = millis + 1, secrets.randbits(29)
+        yield encode(millis, 10) + encode(counter, 6)
+        counter += 1
+
+
+def encode(value, size):
+    return "".join(
+        CODE_ALPHABET[(value >> shift) & 31] for shift in range(5 * (size - 1), -1, -5)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0024_notificationcounter"),
+    ]
+
+    operations = [
+        migrations.RunPython(repair, migrations.RunPython.noop),
+    ]
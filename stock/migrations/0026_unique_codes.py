@@ -0,0 +1,144 @@
+# Generated by Django 5.1.2 on 2026-10-18 11:57
+
+import core.utils
+from django.db import migrations, models
+
+MOVEMENTS = ("stockentry", "stockexit")
+
+
+def code_field(model, unique):
+    field = models.CharField(max_length=25, unique=unique, db_index=not unique)
+    field.set_attributes_from_name("code")
+    field.model = model
+    return field
+
+
+def is_partitioned(model, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return False
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+            [schema_editor.quote_name(model._meta.db_table)],
+        )
+        row = cursor.fetchone()
+    return bool(row) and row[0] == "p"
+
+
+def unique_name(model, schema_editor):
+    return schema_editor._create_index_name(model._meta.db_table, ["code"], "_uniq")
+
+
+def drop_code_index(model, schema_editor):
+    for name in schema_editor._constraint_names(
+        model, ["code"], unique=False, index=True, primary_key=False
+    ):
+        if not name.endswith("_like"):
+            schema_editor.execute(f"DROP INDEX {schema_editor.quote_name(name)}")
+
+
+def make_unique(apps, schema_editor):
+    """
+    Make the movement codes unique. PostgreSQL only accepts unique
+    constraints including the partition key on partitioned tables, so theirs
+    is over ``(code, created_at)``.
+    """
+    for model_name in MOVEMENTS:
+        model = apps.get_model("stock", model_name)
+        if not is_partitioned(model, schema_editor):
+            schema_editor.alter_field(
+                model, code_field(model, False), code_field(model, True)
+            )
+            continue
+
+        table = schema_editor.quote_name(model._meta.db_table)
+        name = schema_editor.quote_name(unique_name(model, schema_editor))
+        schema_editor.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE (code, created_at)"
+        )
+        drop_code_index(model, schema_editor)
+
+
+def make_not_unique(apps, schema_editor):
+    for model_name in MOVEMENTS:
+        model = apps.get_model("stock", model_name)
+        if not is_partitioned(model, schema_editor):
+            schema_editor.alter_field(
+                model, code_field(model, True), code_field(model, False)
+            )
+            continue
+
+        table = schema_editor.quote_name(model._meta.db_table)
+        name = schema_editor.quote_name(unique_name(model, schema_editor))
+        schema_editor.execute(f"ALTER TABLE {table} DROP CONSTRAINT {name}")
+        schema_editor.execute(
+            schema_editor._create_index_sql(model, fields=[code_field(model, False)])
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0025_repair_duplicate_codes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="product",
+            name="code",
+            field=models.CharField(
+                default=core.utils.generate_code,
+                max_length=25,
+                unique=True,
+                verbose_name="Código",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="stock",
+            name="code",
+            field=models.CharField(
+                default=core.utils.generate_code,
+                max_length=25,
+                unique=True,
+                verbose_name="Código",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="supplier",
+            name="code",
+            field=models.CharField(
+                default=core.utils.generate_code,
+                max_length=25,
+                unique=True,
+                verbose_name="Código",
+            ),
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunPython(make_unique, make_not_unique),
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name="stockentry",
+                    name="code",
+                    field=models.CharField(
+                        default=core.utils.generate_code,
+                        max_length=25,
+                        unique=True,
+                        verbose_name="Código",
+                    ),
+                ),
+                migrations.AlterField(
+                    model_name="stockexit",
+                    name="code",
+                    field=models.CharField(
+                        default=core.utils.generate_code,
+                        max_length=25,
+                        unique=True,
+                        verbose_name="Código",
+                    ),
+                ),
+            ],
+        ),
+    ]
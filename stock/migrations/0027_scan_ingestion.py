@@ -0,0 +1,138 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:11
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0026_unique_codes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ScanDevice",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "name",
+                    models.CharField(
+                        max_length=64, unique=True, verbose_name="Identificação"
+                    ),
+                ),
+                (
+                    "last_sequence",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Último lote"
+                    ),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(auto_now=True, verbose_name="Atualizado em"),
+                ),
+            ],
+            options={
+                "verbose_name": "Coletor",
+                "verbose_name_plural": "Coletores",
+            },
+        ),
+        migrations.AlterField(
+            model_name="movementaudit",
+            name="source",
+            field=models.CharField(
+                choices=[
+                    ("admin", "Painel administrativo"),
+                    ("service", "Serviço"),
+                    ("batch", "Lote"),
+                    ("import", "Importação"),
+                    ("scan", "Coletor"),
+                    ("legacy", "Histórico do admin"),
+                ],
+                default="service",
+                max_length=10,
+                verbose_name="Origem",
+            ),
+        ),
+        migrations.CreateModel(
+            name="ScanEvent",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("sequence", models.PositiveBigIntegerField(verbose_name="Lote")),
+                (
+                    "code",
+                    models.CharField(max_length=25, verbose_name="Código do estoque"),
+                ),
+                ("delta", models.IntegerField(verbose_name="Variação")),
+                ("scanned_at", models.DateTimeField(verbose_name="Lido em")),
+                (
+                    "received_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Recebido em"
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Pendente"), ("rejected", "Rejeitada")],
+                        default="pending",
+                        max_length=8,
+                        verbose_name="Situação",
+                    ),
+                ),
+                (
+                    "error",
+                    models.TextField(blank=True, default="", verbose_name="Erro"),
+                ),
+                (
+                    "actor",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="scan_events",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Usuário",
+                    ),
+                ),
+                (
+                    "device",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="events",
+                        to="stock.scandevice",
+                        verbose_name="Coletor",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Leitura",
+                "verbose_name_plural": "Leituras",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "pending")),
+                        fields=["id"],
+                        name="scan_pending_idx",
+                    )
+                ],
+            },
+        ),
+    ]
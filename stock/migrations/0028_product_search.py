@@ -0,0 +1,79 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.db import DatabaseError, migrations, models, transaction
+from django.db.models.functions import Collate, Upper
+
+DOCUMENT = """
+    setweight(to_tsvector('portuguese'::regconfig, coalesce(name, '')), 'A')
+    || setweight(to_tsvector('portuguese'::regconfig, coalesce(code, '')), 'A')
+    || setweight(to_tsvector('portuguese'::regconfig, coalesce(description, '')), 'B')
+"""
+
+PREFIX_INDEX = "product_name_prefix_idx"
+SEARCH_INDEX = "product_search_idx"
+TRIGRAM_INDEX = "product_name_trgm_idx"
+
+
+def create_search(apps, schema_editor):
+    """
+    Add the generated ``search_document`` column with its full-text index,
+    the name prefix index, and the trigram index when the server provides
+    ``pg_trgm``. Other databases use the ``icontains`` fallback of
+    ``ProductSearch`` and get nothing.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Product = apps.get_model("stock", "Product")
+    table = schema_editor.quote_name(Product._meta.db_table)
+    schema_editor.execute(
+        f"ALTER TABLE {table} ADD COLUMN search_document tsvector "
+        f"GENERATED ALWAYS AS ({DOCUMENT}) STORED"
+    )
+    schema_editor.execute(
+        f"CREATE INDEX {SEARCH_INDEX} ON {table} USING gin (search_document)"
+    )
+    # Collated as "C" so prefix matches are index ranges in every locale.
+    schema_editor.add_index(
+        Product, models.Index(Collate(Upper("name"), "C"), name=PREFIX_INDEX)
+    )
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        available = cursor.fetchone() is not None
+    if not available:
+        return
+
+    try:
+        # Installing an extension may require privileges the user lacks.
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    except DatabaseError:
+        return
+    schema_editor.add_index(
+        Product,
+        GinIndex(fields=["name"], opclasses=["gin_trgm_ops"], name=TRIGRAM_INDEX),
+    )
+
+
+def drop_search(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    Product = apps.get_model("stock", "Product")
+    for name in (PREFIX_INDEX, TRIGRAM_INDEX):
+        schema_editor.execute(f"DROP INDEX IF EXISTS {schema_editor.quote_name(name)}")
+    schema_editor.execute(
+        f"ALTER TABLE {schema_editor.quote_name(Product._meta.db_table)} "
+        "DROP COLUMN IF EXISTS search_document"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0027_scan_ingestion"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search, drop_search),
+    ]
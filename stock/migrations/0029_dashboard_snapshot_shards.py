@@ -0,0 +1,93 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:33
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+SNAPSHOT_PK = 1
+SHARDS = 16
+
+
+def create_rows(apps, schema_editor):
+    """
+    Create the snapshot row, computed from the stocks if it does not exist
+    yet, and the shards, so writers never have to insert them.
+    """
+    DashboardSnapshot = apps.get_model("stock", "DashboardSnapshot")
+    DashboardSnapshotShard = apps.get_model("stock", "DashboardSnapshotShard")
+    Category = apps.get_model("stock", "Category")
+    Stock = apps.get_model("stock", "Stock")
+
+    DashboardSnapshotShard.objects.bulk_create(
+        DashboardSnapshotShard(pk=shard) for shard in range(SHARDS)
+    )
+    if DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).exists():
+        return
+
+    stocks = Stock.objects.filter(product__isnull=False)
+    kpis = stocks.annotate(
+        value=models.F("quantity") * models.F("product__base_price")
+    ).aggregate(
+        total=models.Sum("value"),
+        stocked=models.Count("pk"),
+        valued=models.Count("value"),
+        max=models.Max("product__base_price"),
+    )
+    categories = Category.objects.annotate(
+        products_count=models.Count("products")
+    ).values_list("pk", "name", "products_count")
+    suppliers = (
+        stocks.values("supplier_id", supplier_name=models.F("supplier__name"))
+        .annotate(products=models.Count("pk"))
+        .order_by()
+    )
+
+    DashboardSnapshot.objects.create(
+        pk=SNAPSHOT_PK,
+        total_value=kpis["total"] or Decimal(0),
+        stocked_products=kpis["stocked"],
+        valued_stocks=kpis["valued"],
+        max_price=kpis["max"],
+        categories={str(pk): [name, count] for pk, name, count in categories},
+        suppliers={
+            str(row["supplier_id"] or ""): [row["supplier_name"], row["products"]]
+            for row in suppliers
+        },
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0028_product_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardSnapshotShard",
+            fields=[
+                (
+                    "id",
+                    models.PositiveSmallIntegerField(primary_key=True, serialize=False),
+                ),
+                (
+                    "total_value",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=0,
+                        max_digits=20,
+                        verbose_name="Valor em estoque",
+                    ),
+                ),
+                (
+                    "valued_stocks",
+                    models.IntegerField(default=0, verbose_name="Estoques com valor"),
+                ),
+            ],
+            options={
+                "verbose_name": "Parcela do resumo do painel",
+                "verbose_name_plural": "Parcelas do resumo do painel",
+            },
+        ),
+        migrations.RunPython(create_rows, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 12:51
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("stock", "0029_dashboard_snapshot_shards"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scandevice",
+            name="token_hash",
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=64,
+                null=True,
+                unique=True,
+                verbose_name="Token",
+            ),
+        ),
+        migrations.AddField(
+            model_name="scandevice",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="scan_devices",
+                to=settings.AUTH_USER_MODEL,
+                verbose_name="Operador",
+            ),
+        ),
+    ]
@@ -3,8 +3,14 @@ from .category import Category
 from .stock import Stock, StockEntry, StockExit
 from .email import Email
 from .supplier import Supplier
-from .notification import Notification
+from .notification import Notification, NotificationCounter
 from .user import User
+from .dashboard import DashboardSnapshot, DashboardSnapshotShard
+from .imports import ImportCheckpoint
+from .audit import MovementAudit
+from .ledger import StockCheckpoint
+from .rollup import MovementRollup
+from .scan import ScanDevice, ScanEvent
 
 __all__ = (
     "Product",
@@ -16,5 +22,14 @@ __all__ = (
     "Supplier",
     "Email",
     "Notification",
+    "NotificationCounter",
     "User",
+    "DashboardSnapshot",
+    "DashboardSnapshotShard",
+    "ImportCheckpoint",
+    "MovementAudit",
+    "StockCheckpoint",
+    "MovementRollup",
+    "ScanDevice",
+    "ScanEvent",
 )
@@ -0,0 +1,96 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class MovementAudit(models.Model):
+    """
+    Append-only record of a change in the quantity of a stock.
+
+    Rows are written by ``StockService`` and the importer in the same
+    transaction as the movement. ``before`` and ``after`` are empty for the
+    rows backfilled from the admin ``LogEntry`` messages.
+    """
+
+    class Meta:
+        verbose_name = _("Movimentação auditada")
+        verbose_name_plural = _("Auditoria de movimentações")
+        indexes = [
+            models.Index(
+                fields=["product", "-created_at", "-id"],
+                name="audit_product_timeline_idx",
+            ),
+            models.Index(
+                fields=["actor", "-created_at", "-id"],
+                name="audit_actor_timeline_idx",
+            ),
+            models.Index(
+                fields=["-created_at", "-id"],
+                name="audit_timeline_idx",
+            ),
+        ]
+
+    class Source(models.TextChoices):
+        ADMIN = "admin", _("Painel administrativo")
+        SERVICE = "service", _("Serviço")
+        BATCH = "batch", _("Lote")
+        IMPORT = "import", _("Importação")
+        SCAN = "scan", _("Coletor")
+        LEGACY = "legacy", _("Histórico do admin")
+
+    actor = models.ForeignKey(
+        verbose_name=_("Usuário"),
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="movement_audits",
+        blank=True,
+        null=True,
+    )
+    stock = models.ForeignKey(
+        verbose_name=_("Estoque"),
+        to="stock.Stock",
+        on_delete=models.SET_NULL,
+        related_name="movement_audits",
+        blank=True,
+        null=True,
+    )
+    product = models.ForeignKey(
+        verbose_name=_("Produto"),
+        to="stock.Product",
+        on_delete=models.SET_NULL,
+        related_name="movement_audits",
+        blank=True,
+        null=True,
+    )
+    delta = models.IntegerField(
+        verbose_name=_("Variação"),
+    )
+    before = models.PositiveIntegerField(
+        verbose_name=_("Quantidade anterior"),
+        blank=True,
+        null=True,
+    )
+    after = models.PositiveIntegerField(
+        verbose_name=_("Quantidade posterior"),
+        blank=True,
+        null=True,
+    )
+    source = models.CharField(
+        verbose_name=_("Origem"),
+        max_length=10,
+        choices=Source.choices,
+        default=Source.SERVICE,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Criado em"),
+        default=timezone.now,
+    )
+
+    def __str__(self) -> str:
+        return f"{self.product} ({self.delta:+d})"
+
+    def save(self, *args, **kwargs) -> None:
+        if not self._state.adding:
+            raise ValueError("Registros de auditoria não podem ser alterados")
+        super().save(*args, **kwargs)
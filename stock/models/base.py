@@ -1,7 +1,7 @@
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
-from core.utils import random_code
+from core.utils import generate_code
 
 
 class BaseModel(models.Model):
@@ -11,8 +11,8 @@ class BaseModel(models.Model):
     code = models.CharField(
         verbose_name=_("Código"),
         max_length=25,
-        db_index=True,
-        default=random_code,
+        unique=True,
+        default=generate_code,
     )
     created_at = models.DateTimeField(
         verbose_name=_("Criado em"),
@@ -0,0 +1,89 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class DashboardSnapshot(models.Model):
+    """
+    Pre-aggregated figures rendered by the admin dashboard.
+
+    A single row (``pk=1``) is kept up to date with deltas by the
+    ``stock.signals`` receivers and ``StockService``; the
+    ``rebuild_dashboard_snapshot`` command recomputes it from scratch. The
+    stock value changed by quantity movements accumulates in
+    ``DashboardSnapshotShard`` rows instead, so movements do not wait on
+    each other for this row.
+    """
+
+    class Meta:
+        verbose_name = _("Resumo do painel")
+        verbose_name_plural = _("Resumos do painel")
+
+    total_value = models.DecimalField(
+        verbose_name=_("Valor total em estoque"),
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+    )
+    stocked_products = models.PositiveIntegerField(
+        verbose_name=_("Estoques com produto"),
+        default=0,
+    )
+    valued_stocks = models.PositiveIntegerField(
+        verbose_name=_("Estoques com valor"),
+        default=0,
+    )
+    max_price = models.DecimalField(
+        verbose_name=_("Maior preço"),
+        max_digits=10,
+        decimal_places=2,
+        blank=True,
+        null=True,
+    )
+    categories = models.JSONField(
+        verbose_name=_("Produtos por categoria"),
+        default=dict,
+        blank=True,
+    )
+    suppliers = models.JSONField(
+        verbose_name=_("Produtos por fornecedor"),
+        default=dict,
+        blank=True,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Atualizado em"),
+        auto_now=True,
+    )
+
+    def __str__(self) -> str:
+        return str(self.updated_at)
+
+
+class DashboardSnapshotShard(models.Model):
+    """
+    Stock value not yet folded into ``DashboardSnapshot``.
+
+    Quantity movements add their value to one of a fixed set of rows, so
+    concurrent transactions rarely lock the same one. The snapshot figures
+    are the snapshot row plus the sum of the shards.
+    """
+
+    class Meta:
+        verbose_name = _("Parcela do resumo do painel")
+        verbose_name_plural = _("Parcelas do resumo do painel")
+
+    id = models.PositiveSmallIntegerField(
+        primary_key=True,
+    )
+    total_value = models.DecimalField(
+        verbose_name=_("Valor em estoque"),
+        max_digits=20,
+        decimal_places=2,
+        default=0,
+    )
+    valued_stocks = models.IntegerField(
+        verbose_name=_("Estoques com valor"),
+        default=0,
+    )
+
+    def __str__(self) -> str:
+        return str(self.pk)
@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class ImportCheckpoint(models.Model):
+    """
+    Number of rows of a source file already committed by ``import_stock``.
+    It is updated in the same transaction as each imported chunk, so an
+    interrupted import resumes exactly where it stopped.
+    """
+
+    class Meta:
+        verbose_name = _("Checkpoint de importação")
+        verbose_name_plural = _("Checkpoints de importação")
+
+    source = models.CharField(
+        verbose_name=_("Origem"),
+        max_length=255,
+        unique=True,
+    )
+    rows = models.PositiveBigIntegerField(
+        verbose_name=_("Linhas importadas"),
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Atualizado em"),
+        auto_now=True,
+    )
+
+    def __str__(self) -> str:
+        return str(self.source)
@@ -0,0 +1,42 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class StockCheckpoint(models.Model):
+    """
+    Ledger balance of a stock at ``taken_at``: every entry minus every exit
+    created up to that instant. Point-in-time quantities start from the
+    nearest checkpoint and only add the movements after it.
+    """
+
+    class Meta:
+        verbose_name = _("Checkpoint de estoque")
+        verbose_name_plural = _("Checkpoints de estoque")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["stock", "taken_at"],
+                name="stock_checkpoint_unique",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["stock", "-taken_at"],
+                name="stock_checkpoint_latest_idx",
+            ),
+        ]
+
+    stock = models.ForeignKey(
+        verbose_name=_("Estoque"),
+        to="stock.Stock",
+        on_delete=models.CASCADE,
+        related_name="checkpoints",
+    )
+    taken_at = models.DateTimeField(
+        verbose_name=_("Data de referência"),
+    )
+    quantity = models.BigIntegerField(
+        verbose_name=_("Quantidade"),
+    )
+
+    def __str__(self) -> str:
+        return f"{self.stock} @ {self.taken_at}"
@@ -1,12 +1,25 @@
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 
 class Notification(models.Model):
+    """
+    A message for a user. Repeated alerts with the same ``key`` are
+    coalesced into one notification, see ``count``.
+    """
+
     class Meta:
         verbose_name = _("Notificação")
         verbose_name_plural = _("Notificações")
+        indexes = [
+            models.Index(
+                fields=["destination", "key", "-updated_at"],
+                condition=models.Q(read=False),
+                name="notification_alert_idx",
+            ),
+        ]
 
     destination = models.ForeignKey(
         verbose_name=_("Destinatário"),
@@ -26,6 +39,53 @@ class Notification(models.Model):
         blank=True,
         default="",
     )
+    key = models.CharField(
+        verbose_name=_("Chave"),
+        max_length=100,
+        blank=True,
+        default="",
+    )
+    count = models.PositiveIntegerField(
+        verbose_name=_("Ocorrências"),
+        default=1,
+    )
+    created_at = models.DateTimeField(
+        verbose_name=_("Criado em"),
+        default=timezone.now,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Atualizado em"),
+        default=timezone.now,
+    )
 
     def __str__(self) -> str:
         return str(self.destination)
+
+
+class NotificationCounter(models.Model):
+    """
+    Number of unread notifications of a user.
+
+    Kept up to date with ``F()`` updates by the ``stock.signals`` receivers
+    and ``UnreadCounterService`` so the admin badge reads one row instead of
+    counting the notifications; ``rebuild_unread_counters`` recomputes it.
+    """
+
+    class Meta:
+        verbose_name = _("Contador de notificações")
+        verbose_name_plural = _("Contadores de notificações")
+
+    user = models.OneToOneField(
+        verbose_name=_("Usuário"),
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="notification_counter",
+        primary_key=True,
+    )
+    unread = models.PositiveIntegerField(
+        verbose_name=_("Não lidas"),
+        default=0,
+    )
+
+    def __str__(self) -> str:
+        return f"{self.user}: {self.unread}"
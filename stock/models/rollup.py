@@ -0,0 +1,52 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class MovementRollup(models.Model):
+    """
+    Entry and exit quantities of a stock summed per day or per month.
+
+    Rows are incremented as movements are written and can be rebuilt from
+    the movement tables with ``rebuild_movement_rollups``. Product, supplier
+    and category series are read through the stock.
+    """
+
+    class Meta:
+        verbose_name = _("Consolidado de movimentações")
+        verbose_name_plural = _("Consolidados de movimentações")
+        constraints = [
+            models.UniqueConstraint(
+                fields=["period", "period_start", "stock"],
+                name="movement_rollup_unique",
+            ),
+        ]
+
+    class Period(models.TextChoices):
+        DAY = "day", _("Dia")
+        MONTH = "month", _("Mês")
+
+    period = models.CharField(
+        verbose_name=_("Período"),
+        max_length=5,
+        choices=Period.choices,
+    )
+    period_start = models.DateField(
+        verbose_name=_("Início do período"),
+    )
+    stock = models.ForeignKey(
+        verbose_name=_("Estoque"),
+        to="stock.Stock",
+        on_delete=models.CASCADE,
+        related_name="movement_rollups",
+    )
+    entered = models.BigIntegerField(
+        verbose_name=_("Quantidade de entrada"),
+        default=0,
+    )
+    exited = models.BigIntegerField(
+        verbose_name=_("Quantidade de saída"),
+        default=0,
+    )
+
+    def __str__(self) -> str:
+        return f"{self.stock} {self.period} {self.period_start}"
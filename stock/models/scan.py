@@ -0,0 +1,122 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+
+class ScanDevice(models.Model):
+    """
+    A handheld scanner and the sequence number of the last batch it sent.
+    Batches are accepted in sequence order only, so retries are recognized
+    and never applied twice. Devices authenticate with a token issued in the
+    admin, of which only the SHA-256 digest is stored, and their scans are
+    attributed to ``user``.
+    """
+
+    class Meta:
+        verbose_name = _("Coletor")
+        verbose_name_plural = _("Coletores")
+
+    name = models.CharField(
+        verbose_name=_("Identificação"),
+        max_length=64,
+        unique=True,
+    )
+    user = models.ForeignKey(
+        verbose_name=_("Operador"),
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="scan_devices",
+        blank=True,
+        null=True,
+    )
+    token_hash = models.CharField(
+        verbose_name=_("Token"),
+        max_length=64,
+        unique=True,
+        blank=True,
+        null=True,
+        editable=False,
+    )
+    last_sequence = models.PositiveBigIntegerField(
+        verbose_name=_("Último lote"),
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name=_("Atualizado em"),
+        auto_now=True,
+    )
+
+    def __str__(self) -> str:
+        return str(self.name)
+
+
+class ScanEvent(models.Model):
+    """
+    A scan waiting to be applied to its stock.
+
+    Rows are buffered by the scan ingestion endpoint and deleted once
+    ``stock.services.scan.ScanService`` applies them; the ones that cannot
+    be applied are kept as rejected.
+    """
+
+    class Meta:
+        verbose_name = _("Leitura")
+        verbose_name_plural = _("Leituras")
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(status="pending"),
+                name="scan_pending_idx",
+            ),
+        ]
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pendente")
+        REJECTED = "rejected", _("Rejeitada")
+
+    device = models.ForeignKey(
+        verbose_name=_("Coletor"),
+        to="stock.ScanDevice",
+        on_delete=models.CASCADE,
+        related_name="events",
+    )
+    actor = models.ForeignKey(
+        verbose_name=_("Usuário"),
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        related_name="scan_events",
+        blank=True,
+        null=True,
+    )
+    sequence = models.PositiveBigIntegerField(
+        verbose_name=_("Lote"),
+    )
+    code = models.CharField(
+        verbose_name=_("Código do estoque"),
+        max_length=25,
+    )
+    delta = models.IntegerField(
+        verbose_name=_("Variação"),
+    )
+    scanned_at = models.DateTimeField(
+        verbose_name=_("Lido em"),
+    )
+    received_at = models.DateTimeField(
+        verbose_name=_("Recebido em"),
+        default=timezone.now,
+    )
+    status = models.CharField(
+        verbose_name=_("Situação"),
+        max_length=8,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    error = models.TextField(
+        verbose_name=_("Erro"),
+        blank=True,
+        default="",
+    )
+
+    def __str__(self) -> str:
+        return f"{self.code} ({self.delta:+d})"
@@ -1,13 +1,70 @@
+from datetime import datetime, timezone
+from typing import Optional
+
 from django.db import models
+from django.db.models.functions import Coalesce
+from django.db.models.lookups import GreaterThan, LessThan
 from django.utils.translation import gettext_lazy as _
 
 from .base import BaseModel
 
 
+class StockQuerySet(models.QuerySet):
+    def below_minimum(self) -> "StockQuerySet":
+        return self.filter(state=Stock.State.LOW)
+
+    def above_maximum(self) -> "StockQuerySet":
+        return self.filter(state=Stock.State.HIGH)
+
+    def within_range(self) -> "StockQuerySet":
+        return self.filter(state=Stock.State.NORMAL)
+
+    def with_quantity_at(self, when: datetime) -> "StockQuerySet":
+        """
+        Annotate ``ledger_quantity``: the entries minus the exits of each
+        stock created up to ``when``, read from the latest ``StockCheckpoint``
+        at or before ``when`` plus the movements after it.
+        """
+        from .ledger import StockCheckpoint
+
+        checkpoints = StockCheckpoint.objects.filter(
+            stock=models.OuterRef("pk"),
+            taken_at__lte=when,
+        ).order_by("-taken_at")
+
+        return self.annotate(
+            checkpoint_at=models.Subquery(checkpoints.values("taken_at")[:1]),
+            checkpoint_quantity=models.Subquery(checkpoints.values("quantity")[:1]),
+        ).annotate(
+            ledger_quantity=Coalesce("checkpoint_quantity", 0)
+            + _movements_since(StockEntry, when)
+            - _movements_since(StockExit, when)
+        )
+
+
 class Stock(BaseModel):
     class Meta:
         verbose_name = _("Estoque")
         verbose_name_plural = _("Estoques")
+        indexes = [
+            models.Index(
+                fields=["id"],
+                condition=models.Q(state="low"),
+                name="stock_below_minimum_idx",
+            ),
+            models.Index(
+                fields=["id"],
+                condition=models.Q(state="high"),
+                name="stock_above_maximum_idx",
+            ),
+        ]
+
+    class State(models.TextChoices):
+        LOW = "low", _("Baixo")
+        NORMAL = "normal", _("Normal")
+        HIGH = "high", _("Alto")
+
+    objects = StockQuerySet.as_manager()
 
     product = models.ForeignKey(
         verbose_name=_("Produto"),
@@ -42,15 +99,70 @@ class Stock(BaseModel):
         null=True,
         default=0,
     )
+    state = models.GeneratedField(
+        verbose_name=_("Estado do estoque"),
+        expression=models.Case(
+            models.When(
+                LessThan(
+                    Coalesce("quantity", 0),
+                    Coalesce("minimal_quantity", 0),
+                ),
+                then=models.Value("low"),
+            ),
+            models.When(
+                GreaterThan(
+                    Coalesce("quantity", 0),
+                    Coalesce("max_quantity", 0),
+                ),
+                then=models.Value("high"),
+            ),
+            default=models.Value("normal"),
+        ),
+        output_field=models.CharField(max_length=6, choices=State.choices),
+        db_persist=True,
+    )
 
     def __str__(self):
         return str(self.product)
 
+    @classmethod
+    def state_for(
+        cls,
+        quantity: Optional[int],
+        minimal_quantity: Optional[int],
+        max_quantity: Optional[int],
+    ) -> str:
+        """
+        The ``state`` the database computes for these values.
+        """
+        if (quantity or 0) < (minimal_quantity or 0):
+            return cls.State.LOW
+        if (quantity or 0) > (max_quantity or 0):
+            return cls.State.HIGH
+        return cls.State.NORMAL
+
+    def quantity_at(self, when: datetime) -> int:
+        """
+        Ledger quantity of this stock at ``when``.
+        """
+        return (
+            Stock.objects.filter(pk=self.pk)
+            .with_quantity_at(when)
+            .values_list("ledger_quantity", flat=True)
+            .get()
+        )
+
 
 class StockEntry(BaseModel):
     class Meta:
         verbose_name = _("Entrada")
         verbose_name_plural = _("Entradas")
+        indexes = [
+            models.Index(
+                fields=["stock", "created_at"],
+                name="stock_entry_ledger_idx",
+            ),
+        ]
 
     stock = models.ForeignKey(
         verbose_name=_("Estoque"),
@@ -88,6 +200,12 @@ class StockExit(BaseModel):
     class Meta:
         verbose_name = _("Saída")
         verbose_name_plural = _("Saídas")
+        indexes = [
+            models.Index(
+                fields=["stock", "created_at"],
+                name="stock_exit_ledger_idx",
+            ),
+        ]
 
     stock = models.ForeignKey(
         verbose_name=_("Estoque"),
@@ -111,3 +229,24 @@ class StockExit(BaseModel):
 
     def __str__(self):
         return f"{self.product}"
+
+
+def _movements_since(model: type[BaseModel], when: datetime) -> Coalesce:
+    # Sum of the movements between the outer checkpoint and ``when``.
+    movements = (
+        model.objects.filter(
+            stock=models.OuterRef("pk"),
+            created_at__gt=Coalesce(
+                models.OuterRef("checkpoint_at"),
+                models.Value(datetime.min.replace(tzinfo=timezone.utc)),
+            ),
+            created_at__lte=when,
+        )
+        .order_by()
+        .values("stock")
+        .annotate(total=models.Sum("quantity"))
+        .values("total")
+    )
+    return Coalesce(
+        models.Subquery(movements, output_field=models.BigIntegerField()), 0
+    )
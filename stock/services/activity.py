@@ -0,0 +1,131 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from django.db import connection, models
+
+from stock.models import StockEntry, StockExit
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+ENTRY = 1
+EXIT = 0
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def encode_cursor(row: dict[str, Any]) -> str:
+    """
+    Encode the keyset position of a movement row as an opaque string.
+    Args:
+        row (dict): A row returned by ``RecentActivityService``.
+    Returns:
+        str: ``<microseconds since epoch>.<operation type>.<id>``.
+    """
+    microseconds = (row["created_at"] - EPOCH) // timedelta(microseconds=1)
+    return f"{microseconds}.{row['operation_type']}.{row['id']}"
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int, int]:
+    """
+    Decode a cursor produced by ``encode_cursor``.
+    Raises:
+        InvalidCursor: If the cursor is malformed.
+    """
+    try:
+        microseconds, operation_type, pk = (int(part) for part in cursor.split("."))
+    except ValueError as error:
+        raise InvalidCursor(cursor) from error
+
+    return EPOCH + timedelta(microseconds=microseconds), operation_type, pk
+
+
+class RecentActivityService:
+    """
+    Newest-first feed of stock entries and exits.
+
+    Both movement tables are merged in the database with ``UNION ALL`` and
+    ordered by ``(created_at, operation_type, id)``. Pages are fetched with a
+    keyset cursor instead of ``OFFSET``, so each page reads at most
+    ``limit + 1`` rows from each table no matter how long the history is.
+    """
+
+    def __init__(self, limit: int = 4) -> None:
+        self._limit = limit
+
+    def page(self, cursor: Optional[str] = None) -> dict[str, Any]:
+        """
+        Fetch one page of movements.
+        Args:
+            cursor (str, optional): Cursor returned as ``next`` by the previous page.
+        Returns:
+            dict: ``results`` with the formatted movements and ``next`` with the
+            cursor for the following page, or ``None`` when there is none.
+        """
+        position = decode_cursor(cursor) if cursor else None
+
+        queryset = self._movements(StockEntry, ENTRY, position).union(
+            self._movements(StockExit, EXIT, position),
+            all=True,
+        )
+        rows = list(
+            queryset.order_by("-created_at", "-operation_type", "-id")[
+                : self._limit + 1
+            ]
+        )
+
+        next_cursor = None
+        if len(rows) > self._limit:
+            rows = rows[: self._limit]
+            next_cursor = encode_cursor(rows[-1])
+
+        return {
+            "results": [self._format(row) for row in rows],
+            "next": next_cursor,
+        }
+
+    def _movements(
+        self,
+        model: type[models.Model],
+        operation_type: int,
+        position: Optional[tuple[datetime, int, int]],
+    ) -> models.QuerySet:
+        queryset = model.objects.filter(
+            product__isnull=False,
+            stock__isnull=False,
+        )
+
+        if position:
+            created_at, cursor_type, pk = position
+            after = models.Q(created_at__lt=created_at)
+            if operation_type < cursor_type:
+                after |= models.Q(created_at=created_at)
+            elif operation_type == cursor_type:
+                after |= models.Q(created_at=created_at, pk__lt=pk)
+            queryset = queryset.filter(after)
+
+        queryset = queryset.annotate(
+            operation_type=models.Value(operation_type),
+            username=models.F("product__user__username"),
+        ).values("id", "quantity", "created_at", "operation_type", "username")
+
+        # Limiting each side lets PostgreSQL walk the created_at index instead
+        # of merging both tables in full. SQLite rejects it inside a UNION.
+        if connection.features.supports_slicing_ordering_in_compound:
+            queryset = queryset.order_by("-created_at", "-id")[: self._limit + 1]
+
+        return queryset
+
+    def _format(self, row: dict[str, Any]) -> dict[str, Any]:
+        action = "adicionou" if row["operation_type"] == ENTRY else "removeu"
+        created_at = row["created_at"].strftime("%Y/%m/%d %H:%M:%S")
+
+        return {
+            "operation_type": row["operation_type"],
+            "text": (
+                f"O usuário {row['username'] or '-'} {action} {row['quantity']} "
+                f"produto(s) no dia {created_at}"
+            ),
+            "created_at": row["created_at"],
+        }
@@ -0,0 +1,132 @@
+from typing import Any
+
+from django.db import models
+
+from stock.models import Category, Stock
+
+
+def percentage(value: int, total: int) -> int:
+    """Integer percentage of ``value`` over ``total``, ``0`` when total is empty."""
+    if not total:
+        return 0
+    return int((value / total) * 100)
+
+
+def chart_data(
+    categories: list[dict[str, Any]],
+    suppliers: list[dict[str, Any]],
+) -> dict[str, Any]:
+    """
+    Shape category and supplier rows into the datasets read by ``static/js/charts.js``.
+    """
+    return {
+        "productQuantity": {
+            "labels": [row["category"] for row in categories],
+            "data": [row["products"] for row in categories],
+        },
+        "productPercentage": {
+            "labels": [row["category"] for row in categories],
+            "data": [row["percentage"] for row in categories],
+        },
+        "productsPerSupplierQuantity": {
+            "labels": [row["supplier_name"] for row in suppliers],
+            "data": [row["products"] for row in suppliers],
+        },
+        "productsPerSupplierPercentage": {
+            "labels": [row["supplier_name"] for row in suppliers],
+            "data": [row["percentage"] for row in suppliers],
+        },
+    }
+
+
+class DashboardService:
+    """
+    Computes the aggregates shown on the admin dashboard.
+
+    Every method runs a single grouped query, so the cost of the dashboard is
+    a fixed number of queries regardless of how many categories, suppliers or
+    stocks exist.
+    """
+
+    def kpis(self) -> dict[str, Any]:
+        """
+        Stock value indicators.
+        Returns:
+            dict: ``total`` value in stock, ``count`` of stocked products,
+            ``average`` stock value and ``max`` product base price.
+        """
+        return (
+            Stock.objects.all()
+            .annotate(
+                price_product=models.F("quantity") * models.F("product__base_price")
+            )
+            .aggregate(
+                total=models.Sum("price_product"),
+                count=models.Count("product"),
+                average=models.Avg("price_product"),
+                max=models.Max("product__base_price"),
+            )
+        )
+
+    def products_per_category(self) -> list[dict[str, Any]]:
+        """
+        Number of products linked to each category, including empty ones.
+        Returns:
+            list[dict]: ``category``, ``products`` and ``percentage`` per category.
+        """
+        rows = list(
+            Category.objects.annotate(products_count=models.Count("products"))
+            .order_by("pk")
+            .values_list("name", "products_count")
+        )
+        total = sum(count for _, count in rows)
+
+        return [
+            {
+                "category": name,
+                "products": count,
+                "percentage": percentage(count, total),
+            }
+            for name, count in rows
+        ]
+
+    def products_per_supplier(self) -> list[dict[str, Any]]:
+        """
+        Number of stocked products grouped by supplier name.
+        Returns:
+            list[dict]: ``supplier_name``, ``products`` and ``percentage`` per supplier.
+        """
+        rows = list(
+            Stock.objects.filter(product__isnull=False)
+            .values(supplier_name=models.F("supplier__name"))
+            .annotate(products=models.Count("product"))
+            .order_by("supplier_name")
+        )
+        total = sum(row["products"] for row in rows)
+
+        return [
+            {
+                "supplier_name": row["supplier_name"],
+                "products": row["products"],
+                "percentage": percentage(row["products"], total),
+            }
+            for row in rows
+        ]
+
+    def stock_alerts(self) -> dict[str, int]:
+        """
+        Number of stocks outside their configured range.
+        Both counts are answered by the partial indexes on ``Stock.state``.
+        Returns:
+            dict: ``below_minimum`` and ``above_maximum`` stock counts.
+        """
+        return {
+            "below_minimum": Stock.objects.below_minimum().count(),
+            "above_maximum": Stock.objects.above_maximum().count(),
+        }
+
+    def charts(self) -> dict[str, Any]:
+        """
+        Chart datasets consumed by ``static/js/charts.js``.
+        """
+        return chart_data(self.products_per_category(), self.products_per_supplier())
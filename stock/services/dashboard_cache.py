@@ -0,0 +1,184 @@
+import logging
+import threading
+import time
+from typing import Any, Callable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django.http import HttpRequest
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "KEY_PREFIX": "dashboard",
+    "TIMEOUT": 60,
+    "STALE_TIMEOUT": 60 * 60,
+    "LOCK_TIMEOUT": 30,
+    "TENANT": "stock.services.dashboard_cache.default_tenant",
+    "ALLOW_LOCAL": False,
+}
+
+# Backends whose entries other processes cannot see.
+PROCESS_LOCAL = (LocMemCache, DummyCache)
+
+
+def default_tenant(request: HttpRequest) -> str:
+    """
+    Cache namespace of a request. Sites served from the same cache are kept
+    apart by host name.
+    """
+    return request.get_host()
+
+
+def invalidate_dashboard() -> None:
+    """
+    Mark every cached dashboard as stale.
+
+    Entries are not deleted: the next request still serves them while a
+    single worker rebuilds the context in the background.
+    """
+    DashboardCache().invalidate()
+
+
+class DashboardCache:
+    """
+    Stale-while-revalidate cache for the admin dashboard context.
+
+    Entries are stored in the Django cache configured by the
+    ``DASHBOARD_CACHE`` setting together with the generation they were built
+    for. ``invalidate`` bumps the generation, and entries older than
+    ``TIMEOUT`` seconds or built for a previous generation are served as is
+    while the worker that wins a ``cache.add`` lock recomputes them in a
+    background thread. Entries expire from the backend after
+    ``STALE_TIMEOUT`` seconds, after which the context is rebuilt inline.
+
+    Invalidation only reaches the processes that share the cache, so a
+    process-local backend such as locmem would serve stale dashboards from
+    the other daphne and worker processes. With such a backend the cache is
+    bypassed and every request builds the context from the database
+    snapshot, unless ``ALLOW_LOCAL`` declares a single-process deployment.
+    """
+
+    def __init__(self) -> None:
+        self._options = {**DEFAULTS, **getattr(settings, "DASHBOARD_CACHE", {})}
+        self._cache = caches[self._options["ALIAS"]]
+        self._enabled = self._options["ALLOW_LOCAL"] or not isinstance(
+            self._cache, PROCESS_LOCAL
+        )
+
+    def get(
+        self,
+        request: HttpRequest,
+        build: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        """
+        Return the dashboard context for the tenant of ``request``.
+        Args:
+            request (HttpRequest): The admin index request.
+            build (Callable): Computes the context when it is not cached.
+        Returns:
+            dict: The cached or freshly built context.
+        """
+        if not self._enabled:
+            return build()
+
+        tenant = import_string(self._options["TENANT"])(request)
+        key = self._key("context", tenant)
+        generation = self._generation()
+        entry = self._cache.get(key)
+
+        if entry is None:
+            return self._store(key, generation, build)
+
+        fresh = (
+            entry["generation"] == generation
+            and time.time() - entry["built_at"] < self._options["TIMEOUT"]
+        )
+        if not fresh and self._cache.add(
+            self._key("lock", tenant),
+            True,
+            self._options["LOCK_TIMEOUT"],
+        ):
+            threading.Thread(
+                target=self._revalidate,
+                args=(tenant, key, generation, build),
+                daemon=True,
+            ).start()
+
+        return entry["context"]
+
+    def fetch(
+        self,
+        request: HttpRequest,
+        name: str,
+        build: Callable[[], Any],
+    ) -> Any:
+        """
+        Return a value derived from the dashboard data, cached for
+        ``TIMEOUT`` seconds within the current generation.
+        Args:
+            request (HttpRequest): The request, for the tenant namespace.
+            name (str): Identifies the value, including its parameters.
+            build (Callable): Computes the value when it is not cached.
+        """
+        if not self._enabled:
+            return build()
+
+        tenant = import_string(self._options["TENANT"])(request)
+        key = self._key("fetch", tenant, str(self._generation()), name)
+        return self._cache.get_or_set(key, build, self._options["TIMEOUT"])
+
+    def invalidate(self) -> None:
+        if not self._enabled:
+            return
+
+        key = self._key("generation")
+        if not self._cache.add(key, 1, None):
+            try:
+                self._cache.incr(key)
+            except ValueError:
+                self._cache.set(key, 1, None)
+
+    def _generation(self) -> int:
+        return self._cache.get_or_set(self._key("generation"), 0, None)
+
+    def _store(
+        self,
+        key: str,
+        generation: int,
+        build: Callable[[], dict[str, Any]],
+    ) -> dict[str, Any]:
+        context = build()
+        self._cache.set(
+            key,
+            {
+                "generation": generation,
+                "built_at": time.time(),
+                "context": context,
+            },
+            self._options["STALE_TIMEOUT"],
+        )
+        return context
+
+    def _revalidate(
+        self,
+        tenant: str,
+        key: str,
+        generation: int,
+        build: Callable[[], dict[str, Any]],
+    ) -> None:
+        try:
+            self._store(key, generation, build)
+        except Exception:  # pylint: disable=broad-exception-caught
+            logger.exception("Could not rebuild the dashboard for %s", tenant)
+        finally:
+            self._cache.delete(self._key("lock", tenant))
+            connections.close_all()
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self._options["KEY_PREFIX"], *parts))
@@ -0,0 +1,439 @@
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from core.utils import TableNames, chunked, generate_codes
+from stock.models import (
+    Category,
+    ImportCheckpoint,
+    MovementAudit,
+    Product,
+    Stock,
+    StockEntry,
+    Supplier,
+)
+from stock.services.dashboard_cache import invalidate_dashboard
+from stock.services.lookup import CodeLookupService
+from stock.services.rollup import RollupDelta, RollupService
+from stock.services.search import ProductSearch
+from stock.services.snapshot import DashboardSnapshotService
+
+CSV = "csv"
+JSONL = "jsonl"
+
+CATEGORY_SEPARATOR = "|"
+
+
+class ImportRowError(ValueError):
+    """Raised when a source row cannot be imported."""
+
+
+@dataclass
+class ImportRow:
+    name: str
+    base_price: Decimal
+    description: str = ""
+    code: Optional[str] = None
+    categories: list[str] = field(default_factory=list)
+    supplier: Optional[str] = None
+    quantity: int = 0
+    minimal_quantity: int = 1
+    max_quantity: int = 25
+
+    @classmethod
+    def parse(cls, raw: dict[str, Any], line: int) -> "ImportRow":
+        """
+        Build a row from a CSV record or a JSON object.
+        Raises:
+            ImportRowError: If a required value is missing or malformed.
+        """
+        name = (raw.get("name") or "").strip()
+        if not name:
+            raise ImportRowError(f"Linha {line}: o nome do produto é obrigatório")
+
+        categories = raw.get("categories") or []
+        if isinstance(categories, str):
+            categories = categories.split(CATEGORY_SEPARATOR)
+
+        try:
+            return cls(
+                name=name,
+                base_price=Decimal(str(raw["base_price"])),
+                description=raw.get("description") or "",
+                code=raw.get("code") or None,
+                categories=[
+                    category.strip() for category in categories if category.strip()
+                ],
+                supplier=(raw.get("supplier") or "").strip() or None,
+                quantity=_integer(raw, "quantity", 0),
+                minimal_quantity=_integer(raw, "minimal_quantity", 1),
+                max_quantity=_integer(raw, "max_quantity", 25),
+            )
+        except (KeyError, InvalidOperation, ValueError) as error:
+            raise ImportRowError(f"Linha {line}: {error!r}") from error
+
+
+def read_rows(path: Path, file_format: str) -> Iterator[dict[str, Any]]:
+    """
+    Lazily read the records of a CSV or JSON Lines file.
+    """
+    with open(path, encoding="utf-8", newline="") as source:
+        if file_format == CSV:
+            yield from csv.DictReader(source)
+            return
+
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+
+
+class StockImporter:
+    """
+    Loads products with their stock, opening entry and categories in chunks.
+
+    Each chunk is committed in its own transaction together with the
+    ``ImportCheckpoint`` of the source, so memory stays bounded by the chunk
+    size and a rerun skips the rows already committed. On PostgreSQL rows are
+    sent with ``COPY`` into temporary staging tables and merged with
+    ``INSERT ... SELECT``; other databases use ``bulk_create``.
+    """
+
+    def __init__(
+        self,
+        user: Optional[Any] = None,
+        chunk_size: int = 5000,
+        use_copy: Optional[bool] = None,
+    ) -> None:
+        self._user = user
+        self._chunk_size = chunk_size
+        self._use_copy = (
+            connection.vendor == "postgresql" if use_copy is None else use_copy
+        )
+
+    def run(
+        self,
+        rows: Iterable[dict[str, Any]],
+        source: str,
+        progress: Optional[Callable[[int], None]] = None,
+    ) -> int:
+        """
+        Import ``rows``, resuming after the checkpoint stored for ``source``.
+        Returns:
+            int: The number of rows of the source committed so far.
+        """
+        checkpoint, _ = ImportCheckpoint.objects.get_or_create(source=source)
+        imported = checkpoint.rows
+
+        for chunk in chunked(islice(rows, imported, None), self._chunk_size):
+            parsed = [
+                ImportRow.parse(raw, imported + line)
+                for line, raw in enumerate(chunk, start=1)
+            ]
+
+            with transaction.atomic():
+                self._import(parsed)
+                imported += len(chunk)
+                ImportCheckpoint.objects.filter(pk=checkpoint.pk).update(rows=imported)
+
+            if progress:
+                progress(imported)
+
+        # bulk inserts bypass the signals that maintain the dashboard and
+        # the product search cache.
+        DashboardSnapshotService().rebuild()
+        invalidate_dashboard()
+        ProductSearch().invalidate()
+
+        return imported
+
+    def _import(self, rows: list[ImportRow]) -> None:
+        suppliers = self._resolve(
+            Supplier, {row.supplier for row in rows if row.supplier}
+        )
+        categories = self._resolve(
+            Category, {name for row in rows for name in row.categories}
+        )
+        codes = iter(generate_codes(len(rows) * 3))
+        staged = [
+            (row, row.code or next(codes), next(codes), next(codes)) for row in rows
+        ]
+
+        if self._use_copy:
+            self._copy(staged, suppliers, categories)
+        else:
+            self._bulk_create(staged, suppliers, categories)
+
+        # Bulk inserts bypass the signals that maintain the lookup cache,
+        # which may hold the product codes given in the file as unknown.
+        CodeLookupService().invalidate(code for _, code, _, _ in staged)
+
+        # Bulk inserts bypass the signals that maintain the rollups.
+        RollupService().add(
+            RollupDelta(stock_id, created_at, entered=quantity)
+            for stock_id, created_at, quantity in StockEntry.objects.filter(
+                code__in=[
+                    entry_code for row, _, _, entry_code in staged if row.quantity
+                ]
+            ).values_list("stock_id", "created_at", "quantity")
+        )
+
+    def _resolve(self, model: type[models.Model], names: set[str]) -> dict[str, int]:
+        """
+        Map names to primary keys, creating the missing rows.
+        """
+        found = dict(
+            model.objects.filter(name__in=names)
+            .order_by("-pk")
+            .values_list("name", "pk")
+        )
+        missing = [model(name=name) for name in names - found.keys()]
+        model.objects.bulk_create(missing)
+
+        if missing and missing[0].pk is None:
+            return self._resolve(model, names)
+
+        found.update((row.name, row.pk) for row in missing)
+        return found
+
+    def _bulk_create(
+        self,
+        staged: list[tuple[ImportRow, str, str, str]],
+        suppliers: dict[str, int],
+        categories: dict[str, int],
+    ) -> None:
+        products = Product.objects.bulk_create(
+            Product(
+                code=product_code,
+                user=self._user,
+                name=row.name,
+                description=row.description,
+                base_price=row.base_price,
+            )
+            for row, product_code, _, _ in staged
+        )
+        if products and products[0].pk is None:
+            by_code = {
+                row.code: row
+                for row in Product.objects.filter(
+                    code__in=[product.code for product in products]
+                )
+            }
+            products = [by_code[product.code] for product in products]
+
+        stocks = Stock.objects.bulk_create(
+            Stock(
+                code=stock_code,
+                product=product,
+                supplier_id=suppliers.get(row.supplier),
+                quantity=row.quantity,
+                minimal_quantity=row.minimal_quantity,
+                max_quantity=row.max_quantity,
+            )
+            for (row, _, stock_code, _), product in zip(staged, products)
+        )
+        if stocks and stocks[0].pk is None:
+            by_code = {
+                row.code: row
+                for row in Stock.objects.filter(
+                    code__in=[stock.code for stock in stocks]
+                )
+            }
+            stocks = [by_code[stock.code] for stock in stocks]
+
+        StockEntry.objects.bulk_create(
+            StockEntry(
+                code=entry_code,
+                stock=stock,
+                product=product,
+                supplier_id=suppliers.get(row.supplier),
+                quantity=row.quantity,
+            )
+            for (row, _, _, entry_code), product, stock in zip(staged, products, stocks)
+            if row.quantity > 0
+        )
+        MovementAudit.objects.bulk_create(
+            MovementAudit(
+                actor=self._user,
+                stock=stock,
+                product=product,
+                delta=row.quantity,
+                before=0,
+                after=row.quantity,
+                source=MovementAudit.Source.IMPORT,
+            )
+            for (row, _, _, _), product, stock in zip(staged, products, stocks)
+            if row.quantity > 0
+        )
+        Product.categories.through.objects.bulk_create(
+            Product.categories.through(
+                product_id=product.pk,
+                category_id=categories[name],
+            )
+            for (row, _, _, _), product in zip(staged, products)
+            for name in set(row.categories)
+        )
+
+    def _copy(
+        self,
+        staged: list[tuple[ImportRow, str, str, str]],
+        suppliers: dict[str, int],
+        categories: dict[str, int],
+    ) -> None:
+        rows = io.StringIO()
+        writer = csv.writer(rows)
+        links = io.StringIO()
+        links_writer = csv.writer(links)
+
+        for row, product_code, stock_code, entry_code in staged:
+            writer.writerow(
+                (
+                    product_code,
+                    stock_code,
+                    entry_code,
+                    row.name,
+                    row.description,
+                    row.base_price,
+                    suppliers.get(row.supplier),
+                    row.quantity,
+                    row.minimal_quantity,
+                    row.max_quantity,
+                )
+            )
+            for name in set(row.categories):
+                links_writer.writerow((product_code, categories[name]))
+
+        now = timezone.now()
+        product, stock, entry = (
+            TableNames(Product),
+            TableNames(Stock),
+            TableNames(StockEntry),
+        )
+        through = TableNames(Product.categories.through)
+        audit = TableNames(MovementAudit)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMPORARY TABLE import_stock_rows ("
+                " product_code varchar(25), stock_code varchar(25),"
+                " entry_code varchar(25), name varchar(255), description text,"
+                " base_price numeric(10, 2), supplier_id bigint, quantity bigint,"
+                " minimal_quantity bigint, max_quantity bigint"
+                ") ON COMMIT DROP"
+            )
+            cursor.execute(
+                "CREATE TEMPORARY TABLE import_stock_categories ("
+                " product_code varchar(25), category_id bigint"
+                ") ON COMMIT DROP"
+            )
+            _copy_from(cursor, "import_stock_rows", rows)
+            _copy_from(cursor, "import_stock_categories", links)
+
+            columns = product.columns(
+                "code",
+                "created_at",
+                "updated_at",
+                "user",
+                "name",
+                "description",
+                "base_price",
+            )
+            cursor.execute(
+                f"INSERT INTO {product.table} ({columns})"
+                " SELECT product_code, %s, %s, %s, name, description, base_price"
+                " FROM import_stock_rows",
+                (now, now, getattr(self._user, "pk", None)),
+            )
+            columns = stock.columns(
+                "code",
+                "created_at",
+                "updated_at",
+                "product",
+                "supplier",
+                "quantity",
+                "minimal_quantity",
+                "max_quantity",
+            )
+            cursor.execute(
+                f"INSERT INTO {stock.table} ({columns})"
+                f" SELECT r.stock_code, %s, %s, p.{product.column('id')}, r.supplier_id,"
+                " r.quantity, r.minimal_quantity, r.max_quantity"
+                f" FROM import_stock_rows r JOIN {product.table} p"
+                f" ON p.{product.column('code')} = r.product_code",
+                (now, now),
+            )
+            columns = entry.columns(
+                "code",
+                "created_at",
+                "updated_at",
+                "stock",
+                "product",
+                "supplier",
+                "quantity",
+            )
+            cursor.execute(
+                f"INSERT INTO {entry.table} ({columns})"
+                f" SELECT r.entry_code, %s, %s, s.{stock.column('id')},"
+                f" s.{stock.column('product')}, r.supplier_id, r.quantity"
+                f" FROM import_stock_rows r JOIN {stock.table} s"
+                f" ON s.{stock.column('code')} = r.stock_code"
+                " WHERE r.quantity > 0",
+                (now, now),
+            )
+            columns = audit.columns(
+                "actor",
+                "stock",
+                "product",
+                "delta",
+                "before",
+                "after",
+                "source",
+                "created_at",
+            )
+            cursor.execute(
+                f"INSERT INTO {audit.table} ({columns})"
+                f" SELECT %s, s.{stock.column('id')}, s.{stock.column('product')},"
+                " r.quantity, 0, r.quantity, %s, %s"
+                f" FROM import_stock_rows r JOIN {stock.table} s"
+                f" ON s.{stock.column('code')} = r.stock_code"
+                " WHERE r.quantity > 0",
+                (getattr(self._user, "pk", None), MovementAudit.Source.IMPORT, now),
+            )
+            cursor.execute(
+                f"INSERT INTO {through.table} ({through.columns('product', 'category')})"
+                f" SELECT p.{product.column('id')}, c.category_id"
+                f" FROM import_stock_categories c JOIN {product.table} p"
+                f" ON p.{product.column('code')} = c.product_code"
+            )
+
+
+def _copy_from(cursor: Any, table: str, data: io.StringIO) -> None:
+    data.seek(0)
+    sql = f"COPY {table} FROM STDIN WITH (FORMAT csv)"
+    raw = cursor.cursor
+
+    # psycopg2 exposes copy_expert, psycopg 3 a copy() context manager.
+    if hasattr(raw, "copy_expert"):
+        raw.copy_expert(sql, data)
+        return
+
+    with raw.copy(sql) as copy:
+        copy.write(data.getvalue())
+
+
+def _integer(raw: dict[str, Any], key: str, default: int) -> int:
+    value = raw.get(key)
+    if value in (None, ""):
+        return default
+
+    number = int(value)
+    if number < 0:
+        raise ValueError(f"{key} não pode ser negativo")
+    return number
@@ -0,0 +1,111 @@
+from datetime import datetime
+from typing import Any, Iterable, Optional
+
+from django.db import models, transaction
+
+from core.utils import chunked
+from stock.models import Stock, StockCheckpoint
+
+CHUNK_SIZE = 5000
+
+
+class LedgerService:
+    """
+    Point-in-time stock quantities from the entry and exit ledger.
+
+    ``checkpoint`` stores the balance of every stock that moved since its
+    previous checkpoint, so ``quantities_at`` only sums the movements after
+    the nearest checkpoint instead of the whole history. Checkpoints are
+    meant to be taken periodically, e.g. daily by ``checkpoint_stock``.
+    """
+
+    def __init__(self, chunk_size: int = CHUNK_SIZE) -> None:
+        self._chunk_size = chunk_size
+
+    def quantities_at(
+        self,
+        when: datetime,
+        stocks: Optional[Iterable[Any]] = None,
+    ) -> dict[Any, int]:
+        """
+        Ledger quantity of each stock at ``when``.
+        Args:
+            when (datetime): The instant to evaluate.
+            stocks (Iterable, optional): Stocks, primary keys or a queryset.
+                Every stock when omitted.
+        Returns:
+            dict: Quantities keyed by stock primary key.
+        """
+        if stocks is None or isinstance(stocks, models.QuerySet):
+            queryset = Stock.objects.all()
+            if stocks is not None:
+                queryset = queryset.filter(pk__in=stocks.values("pk"))
+            return self._quantities(queryset, when)
+
+        quantities = {}
+        pks = (getattr(stock, "pk", stock) for stock in stocks)
+        for chunk in chunked(pks, self._chunk_size):
+            quantities.update(
+                self._quantities(Stock.objects.filter(pk__in=chunk), when)
+            )
+        return quantities
+
+    @transaction.atomic
+    def checkpoint(self, taken_at: datetime) -> int:
+        """
+        Store the balance at ``taken_at`` of every stock whose balance
+        changed since its previous checkpoint.
+        Returns:
+            int: The number of checkpoints written.
+        """
+        balances = (
+            Stock.objects.with_quantity_at(taken_at)
+            .values_list("pk", "ledger_quantity", "checkpoint_quantity")
+            .iterator(self._chunk_size)
+        )
+        changed = (
+            StockCheckpoint(stock_id=pk, taken_at=taken_at, quantity=quantity)
+            for pk, quantity, previous in balances
+            if quantity != (previous or 0)
+        )
+
+        written = 0
+        for chunk in chunked(changed, self._chunk_size):
+            StockCheckpoint.objects.bulk_create(
+                chunk,
+                update_conflicts=True,
+                unique_fields=("stock", "taken_at"),
+                update_fields=("quantity",),
+            )
+            written += len(chunk)
+
+        return written
+
+    def discard_checkpoints(self, movements: models.QuerySet) -> int:
+        """
+        Delete the checkpoints that ``movements`` are part of, before they are
+        edited or deleted: those of their stocks taken at or after the
+        earliest of them. ``quantities_at`` then starts from an older
+        checkpoint, and the next ``checkpoint`` stores the new balances.
+        Returns:
+            int: The number of checkpoints deleted.
+        """
+        stale = models.Q()
+        for stock_id, since in (
+            movements.order_by()
+            .values("stock")
+            .annotate(since=models.Min("created_at"))
+            .values_list("stock", "since")
+        ):
+            stale |= models.Q(stock=stock_id, taken_at__gte=since)
+
+        if not stale:
+            return 0
+        return StockCheckpoint.objects.filter(stale).delete()[0]
+
+    def _quantities(self, queryset: models.QuerySet, when: datetime) -> dict:
+        return dict(
+            queryset.with_quantity_at(when)
+            .values_list("pk", "ledger_quantity")
+            .iterator(self._chunk_size)
+        )
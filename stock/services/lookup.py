@@ -0,0 +1,227 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import models, transaction
+
+from stock.models import Product, Stock
+from stock.services.dashboard_cache import PROCESS_LOCAL
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "KEY_PREFIX": "lookup",
+    "MAX_ENTRIES": 10_000,
+    "TIMEOUT": 5 * 60,
+    "MAX_CODES": 100,
+    "ALLOW_LOCAL": False,
+}
+
+
+def lookup_options() -> dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "CODE_LOOKUP", {})}
+
+
+class CodeLookupService:
+    """
+    Resolves product and stock codes to JSON snapshots for scanners.
+
+    Snapshots are kept in a per-process LRU cache of ``MAX_ENTRIES`` codes
+    together with the version the code had when they were built. Versions
+    are random tokens in the Django cache configured by the ``CODE_LOOKUP``
+    setting; ``invalidate`` replaces the tokens of the codes whose snapshot
+    changed, so every process sees the change on its next lookup. A batch
+    of codes costs one ``get_many`` of their versions, plus three queries
+    for the codes that are not cached or changed. Versions are read before the
+    queries, so a write committed meanwhile only makes the next lookup miss.
+    Snapshots are also dropped after ``TIMEOUT`` seconds, in case the
+    versions were evicted. Unknown codes are cached as such until a product
+    or stock is created with them.
+
+    A product snapshot lists its stocks and a stock snapshot includes its
+    product, so a change to either invalidates both codes.
+
+    Versions kept in a process-local backend such as locmem are not seen by
+    the other processes, which would serve stale snapshots until they
+    expire. With such a backend every lookup is loaded from the database,
+    unless ``ALLOW_LOCAL`` declares a single-process deployment.
+    """
+
+    _lock = threading.Lock()
+    _entries: OrderedDict = OrderedDict()
+
+    def __init__(self) -> None:
+        self._options = lookup_options()
+        self._cache = caches[self._options["ALIAS"]]
+        self._enabled = self._options["ALLOW_LOCAL"] or not isinstance(
+            self._cache, PROCESS_LOCAL
+        )
+
+    def lookup(self, codes: Iterable[str]) -> dict[str, Optional[dict[str, Any]]]:
+        """
+        Snapshots of ``codes``, in the order given.
+        Returns:
+            dict: The snapshot of each code, or None if no product or stock
+                has it.
+        Raises:
+            ValueError: If more than ``MAX_CODES`` codes are given.
+        """
+        codes = list(dict.fromkeys(codes))
+        if len(codes) > self._options["MAX_CODES"]:
+            raise ValueError(
+                f"No máximo {self._options['MAX_CODES']} códigos por consulta"
+            )
+        if not self._enabled:
+            snapshots = self._load(codes)
+            return {code: snapshots.get(code) for code in codes}
+
+        keys = {code: self._key("version", code) for code in codes}
+        found = self._cache.get_many(keys.values())
+        versions = {code: found.get(key) for code, key in keys.items()}
+        snapshots = self._cached(versions)
+
+        missing = [code for code in codes if code not in snapshots]
+        if missing:
+            # A code without a version gets one now; otherwise an eviction
+            # would bring back the version an old snapshot was built with.
+            for code in missing:
+                if versions[code] is None:
+                    version = uuid.uuid4().hex
+                    if not self._cache.add(keys[code], version, None):
+                        version = self._cache.get(keys[code])
+                    versions[code] = version
+
+            loaded = self._load(missing)
+            self._store({code: (versions[code], loaded.get(code)) for code in missing})
+            snapshots.update(loaded)
+
+        return {code: snapshots.get(code) for code in codes}
+
+    def invalidate(self, codes: Iterable[str]) -> None:
+        """
+        Give new versions to ``codes`` once the current transaction commits,
+        making their cached snapshots stale in every process.
+        """
+        if not self._enabled:
+            return
+
+        codes = set(codes) - {None}
+        if codes:
+            transaction.on_commit(lambda: self._bump(codes))
+
+    def invalidate_products(self, product_ids: Iterable[Any]) -> None:
+        """
+        ``invalidate`` the codes of the products ``product_ids`` and of their
+        stocks.
+        """
+        self.invalidate(
+            Product.objects.filter(pk__in=set(product_ids))
+            .values_list("code", flat=True)
+            .union(
+                Stock.objects.filter(product__in=set(product_ids)).values_list(
+                    "code", flat=True
+                )
+            )
+        )
+
+    def invalidate_stocks(self, stock_ids: Iterable[Any]) -> None:
+        """
+        ``invalidate`` the codes of the stocks ``stock_ids`` and of their
+        products.
+        """
+        self.invalidate(
+            code
+            for codes in Stock.objects.filter(pk__in=set(stock_ids)).values_list(
+                "code", "product__code"
+            )
+            for code in codes
+        )
+
+    @classmethod
+    def clear(cls) -> None:
+        """
+        Empty the cache of this process.
+        """
+        with cls._lock:
+            cls._entries.clear()
+
+    def _cached(self, versions: dict[str, Any]) -> dict[str, Optional[dict[str, Any]]]:
+        expired = time.monotonic() - self._options["TIMEOUT"]
+        snapshots = {}
+
+        with self._lock:
+            for code, version in versions.items():
+                entry = self._entries.get(code)
+                if entry is None:
+                    continue
+                if version is None or entry[0] != version or entry[1] < expired:
+                    del self._entries[code]
+                    continue
+                self._entries.move_to_end(code)
+                snapshots[code] = entry[2]
+        return snapshots
+
+    def _store(self, entries: dict[str, tuple[Any, Optional[dict[str, Any]]]]) -> None:
+        now = time.monotonic()
+        with self._lock:
+            for code, (version, snapshot) in entries.items():
+                self._entries[code] = (version, now, snapshot)
+                self._entries.move_to_end(code)
+            while len(self._entries) > self._options["MAX_ENTRIES"]:
+                self._entries.popitem(last=False)
+
+    def _load(self, codes: list[str]) -> dict[str, dict[str, Any]]:
+        snapshots = {}
+
+        products = Product.objects.filter(code__in=codes).prefetch_related(
+            models.Prefetch(
+                "stocks",
+                queryset=Stock.objects.select_related("supplier").order_by("pk"),
+            )
+        )
+        for product in products:
+            snapshots[product.code] = {
+                "type": "product",
+                **self._product(product),
+                "stocks": [self._stock(stock) for stock in product.stocks.all()],
+            }
+
+        stocks = Stock.objects.filter(code__in=codes).select_related(
+            "product", "supplier"
+        )
+        for stock in stocks:
+            snapshots[stock.code] = {
+                "type": "stock",
+                **self._stock(stock),
+                "product": self._product(stock.product) if stock.product else None,
+            }
+        return snapshots
+
+    def _product(self, product: Product) -> dict[str, Any]:
+        return {
+            "code": product.code,
+            "name": product.name,
+            "base_price": str(product.base_price),
+        }
+
+    def _stock(self, stock: Stock) -> dict[str, Any]:
+        return {
+            "code": stock.code,
+            "quantity": stock.quantity,
+            "minimal_quantity": stock.minimal_quantity,
+            "max_quantity": stock.max_quantity,
+            "state": stock.state,
+            "supplier": stock.supplier.code if stock.supplier else None,
+        }
+
+    def _bump(self, codes: set[str]) -> None:
+        version = uuid.uuid4().hex
+        self._cache.set_many(
+            {self._key("version", code): version for code in codes}, None
+        )
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self._options["KEY_PREFIX"], *parts))
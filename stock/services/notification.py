@@ -0,0 +1,128 @@
+from typing import Any, Optional
+
+from django.db import models, transaction
+from django.db.models.functions import Greatest
+from django.http import HttpRequest
+
+from stock.models import Notification, NotificationCounter
+
+
+class UnreadCounterService:
+    """
+    Maintains the ``NotificationCounter`` rows.
+
+    Changes are applied as ``F()`` increments of the user's row, so
+    concurrent writers never overwrite each other. A user without a row gets
+    one counted from the notifications the first time it is needed, which
+    includes the change being applied. Counters never go below zero.
+    """
+
+    def unread(self, user: Any) -> int:
+        """
+        Number of unread notifications of ``user``.
+        """
+        user_id = getattr(user, "pk", user)
+        if user_id is None:
+            return 0
+
+        unread = (
+            NotificationCounter.objects.filter(user_id=user_id)
+            .values_list("unread", flat=True)
+            .first()
+        )
+        return self.rebuild(user_id) if unread is None else unread
+
+    def for_request(self, request: HttpRequest) -> int:
+        """
+        ``unread`` for the user of ``request``, read once per request.
+        """
+        if not hasattr(request, "_unread_notifications"):
+            request._unread_notifications = (
+                self.unread(request.user) if request.user.is_authenticated else 0
+            )
+        return request._unread_notifications
+
+    def add(self, user_id: Any, delta: int) -> None:
+        if user_id is None or not delta:
+            return
+
+        updated = NotificationCounter.objects.filter(user_id=user_id).update(
+            unread=Greatest(models.F("unread") + delta, 0)
+        )
+        if not updated:
+            self.rebuild(user_id)
+
+    @transaction.atomic
+    def mark_all_read(self, user: Any) -> int:
+        """
+        Mark every unread notification of ``user`` as read with one
+        ``UPDATE``.
+        Returns:
+            int: The number of notifications marked.
+        """
+        user_id = getattr(user, "pk", user)
+        marked = Notification.objects.filter(destination_id=user_id, read=False).update(
+            read=True
+        )
+        # Notifications created meanwhile are counted by their own increment.
+        self.add(user_id, -marked)
+        return marked
+
+    @transaction.atomic
+    def mark_read(self, notifications: models.QuerySet) -> int:
+        """
+        Mark the unread notifications of ``notifications`` as read.
+        Returns:
+            int: The number of notifications marked.
+        """
+        unread = dict(
+            notifications.filter(read=False)
+            .select_for_update(of=("self",))
+            .values_list("pk", "destination_id")
+        )
+        marked = Notification.objects.filter(pk__in=unread, read=False).update(
+            read=True
+        )
+
+        per_user: dict[Any, int] = {}
+        for user_id in unread.values():
+            per_user[user_id] = per_user.get(user_id, 0) + 1
+        for user_id, count in per_user.items():
+            self.add(user_id, -count)
+        return marked
+
+    def rebuild(self, user_id: Optional[Any] = None) -> int:
+        """
+        Recount the unread notifications of one user, or of every user.
+        Returns:
+            int: The unread count of ``user_id``, or the number of counters
+                written.
+        """
+        unread = Notification.objects.filter(
+            read=False,
+            destination__isnull=False,
+        )
+        if user_id is not None:
+            unread = unread.filter(destination_id=user_id)
+
+        counts = dict(
+            unread.values("destination_id")
+            .annotate(total=models.Count("id"))
+            .order_by()
+            .values_list("destination_id", "total")
+        )
+        if user_id is not None:
+            counts.setdefault(user_id, 0)
+        else:
+            NotificationCounter.objects.exclude(user_id__in=counts).update(unread=0)
+
+        NotificationCounter.objects.bulk_create(
+            [
+                NotificationCounter(user_id=key, unread=total)
+                for key, total in counts.items()
+            ],
+            update_conflicts=True,
+            unique_fields=("user",),
+            update_fields=("unread",),
+        )
+        return counts[user_id] if user_id is not None else len(counts)
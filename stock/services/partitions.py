@@ -0,0 +1,348 @@
+import gzip
+import re
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from django.conf import settings
+from django.db import connection as default_connection
+from django.db import transaction
+from django.utils import timezone
+
+from stock.models import StockEntry, StockExit
+
+DEFAULTS = {
+    "MONTHS_AHEAD": 3,
+}
+
+PARTITION_NAME = re.compile(r"_p(\d{4})_(\d{2})$")
+
+
+def partitioning_options() -> dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "STOCK_PARTITIONING", {})}
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class PartitionedTable:
+    """
+    Monthly ``created_at`` range partitions of an append-only table on
+    PostgreSQL.
+
+    ``partition`` rebuilds the table as a partitioned one in place: rows are
+    copied into one partition per month plus a default partition, the
+    primary key becomes ``(id, created_at)`` as PostgreSQL requires the
+    partition key in unique indexes, as do the other unique constraints and
+    indexes, and the indexes, checks and foreign keys are recreated on the
+    parent so every partition inherits them. ``id`` and ``code`` stay unique through their
+    generators. ``unpartition`` reverses it.
+
+    Old months are removed with ``detach``, which only changes the catalog,
+    and ``archive``, which dumps a detached partition to a gzipped CSV file
+    before dropping it.
+    """
+
+    def __init__(self, table: str, connection: Any = None) -> None:
+        self.table = table
+        self.connection = connection or default_connection
+        self._quote = self.connection.ops.quote_name
+
+    @property
+    def default_partition(self) -> str:
+        return f"{self.table}_default"
+
+    def is_partitioned(self) -> bool:
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)",
+                [self._quote(self.table)],
+            )
+            row = cursor.fetchone()
+        return bool(row) and row[0] == "p"
+
+    def partition(self, months_ahead: int = DEFAULTS["MONTHS_AHEAD"]) -> None:
+        """
+        Convert the table to monthly partitions covering its rows and the
+        next ``months_ahead`` months. Does nothing if it already is
+        partitioned.
+        """
+        if self.is_partitioned():
+            return
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT min(created_at), max(created_at) FROM {self._quote(self.table)}"
+            )
+            first, last = cursor.fetchone()
+
+        now = timezone.now()
+        self._rebuild(
+            (
+                self._month(min(first or now, now)),
+                add_months(self._month(max(last or now, now)), months_ahead),
+            )
+        )
+
+    def unpartition(self) -> None:
+        """
+        Convert the table back to a regular table with every row of its
+        partitions. Does nothing if it is not partitioned.
+        """
+        if not self.is_partitioned():
+            return
+
+        self._rebuild(None)
+
+    def partitions(self) -> Iterator[tuple[str, date]]:
+        """
+        Yield the monthly partitions as ``(name, month)``, oldest first.
+        """
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT inhrelid::regclass::text FROM pg_inherits "
+                "WHERE inhparent = to_regclass(%s)",
+                [self._quote(self.table)],
+            )
+            names = [name.strip('"') for name, in cursor.fetchall()]
+
+        months = []
+        for name in names:
+            match = PARTITION_NAME.search(name)
+            if match:
+                months.append((name, date(int(match[1]), int(match[2]), 1)))
+        yield from sorted(months, key=lambda partition: partition[1])
+
+    def ensure(self, first: date, last: date) -> list[str]:
+        """
+        Create the missing partitions for the months from ``first`` to
+        ``last``. Rows already written to the default partition for one of
+        those months are moved into the new partition.
+        Returns:
+            list[str]: The names of the partitions created.
+        """
+        if self._months(first, last) <= self._existing():
+            return []
+
+        with self.connection.cursor() as cursor:
+            # Concurrent callers wait for each other and create each
+            # partition once; the lock is released with the transaction.
+            cursor.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", [self.table])
+
+        existing = self._existing()
+        parent = self._quote(self.table)
+        default = self._quote(self.default_partition)
+        created = []
+
+        month = first.replace(day=1)
+        while month <= last:
+            if month not in existing:
+                name = f"{self.table}_p{month:%Y_%m}"
+                start, end = self._bound(month), self._bound(add_months(month, 1))
+                in_range = f"created_at >= '{start}' AND created_at < '{end}'"
+
+                with self.connection.cursor() as cursor:
+                    cursor.execute(
+                        f"SELECT EXISTS (SELECT 1 FROM {default} WHERE {in_range})"
+                    )
+                    if cursor.fetchone()[0]:
+                        cursor.execute(
+                            f"CREATE TABLE {self._quote(name)} (LIKE {parent} "
+                            "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                        )
+                        cursor.execute(
+                            f"WITH moved AS (DELETE FROM {default} WHERE {in_range} "
+                            f"RETURNING *) INSERT INTO {self._quote(name)} "
+                            "SELECT * FROM moved"
+                        )
+                        cursor.execute(
+                            f"ALTER TABLE {parent} ATTACH PARTITION {self._quote(name)} "
+                            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+                        )
+                    else:
+                        cursor.execute(
+                            f"CREATE TABLE {self._quote(name)} PARTITION OF {parent} "
+                            f"FOR VALUES FROM ('{start}') TO ('{end}')"
+                        )
+                created.append(name)
+            month = add_months(month, 1)
+
+        return created
+
+    def detach(self, before: date) -> list[str]:
+        """
+        Detach the partitions of the months before ``before``. They are kept
+        as regular tables with the same name.
+        Returns:
+            list[str]: The names of the detached partitions.
+        """
+        detached = []
+        with self.connection.cursor() as cursor:
+            for name, month in self.partitions():
+                if month >= before.replace(day=1):
+                    break
+                cursor.execute(
+                    f"ALTER TABLE {self._quote(self.table)} "
+                    f"DETACH PARTITION {self._quote(name)}"
+                )
+                detached.append(name)
+        return detached
+
+    def archive(self, name: str, directory: Path) -> Path:
+        """
+        Dump the detached partition ``name`` to ``directory`` and drop it.
+        Returns:
+            Path: The gzipped CSV file written.
+        """
+        path = Path(directory) / f"{name}.csv.gz"
+        with self.connection.cursor() as cursor, gzip.open(path, "wb") as output:
+            _copy_to(
+                cursor,
+                f"COPY {self._quote(name)} TO STDOUT WITH (FORMAT csv, HEADER)",
+                output,
+            )
+            cursor.execute(f"DROP TABLE {self._quote(name)}")
+        return path
+
+    def _existing(self) -> set[date]:
+        return {month for _, month in self.partitions()}
+
+    def _months(self, first: date, last: date) -> set[date]:
+        months = set()
+        month = first.replace(day=1)
+        while month <= last:
+            months.add(month)
+            month = add_months(month, 1)
+        return months
+
+    def _rebuild(self, months: Optional[tuple[date, date]]) -> None:
+        """
+        Recreate the table with the same columns, indexes and constraints,
+        partitioned over the ``(first, last)`` months or as a regular table.
+        """
+        table = self._quote(self.table)
+        previous = self._quote(f"{self.table}_previous")
+        sequence = self._quote(f"{self.table}_id_seq")
+        primary_key = "id, created_at" if months else "id"
+
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(
+                "SELECT pg_get_indexdef(indexrelid) FROM pg_index "
+                "WHERE indrelid = to_regclass(%s) AND NOT indisprimary "
+                "AND indexrelid NOT IN (SELECT conindid FROM pg_constraint)",
+                [table],
+            )
+            # Indexes of a partitioned table are defined ``ON ONLY`` it.
+            indexes = [
+                self._unique_key(definition.replace(" ON ONLY ", " ON "), bool(months))
+                for definition, in cursor.fetchall()
+            ]
+            cursor.execute(
+                "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+                "WHERE conrelid = to_regclass(%s) AND contype IN ('f', 'u')",
+                [table],
+            )
+            constraints = [
+                (name, self._unique_key(definition, bool(months)))
+                for name, definition in cursor.fetchall()
+            ]
+
+            cursor.execute(f"ALTER TABLE {table} RENAME TO {previous}")
+            cursor.execute(
+                f"CREATE TABLE {table} (LIKE {previous} "
+                "INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                + (" PARTITION BY RANGE (created_at)" if months else "")
+            )
+            if months:
+                cursor.execute(
+                    f"CREATE TABLE {self._quote(self.default_partition)} "
+                    f"PARTITION OF {table} DEFAULT"
+                )
+                self.ensure(*months)
+
+            # Indexes are built after the copy, which is faster than
+            # maintaining them row by row.
+            cursor.execute(f"INSERT INTO {table} SELECT * FROM {previous}")
+            cursor.execute(f"DROP TABLE {previous} CASCADE")
+
+            cursor.execute(f"CREATE SEQUENCE {sequence} OWNED BY {table}.id")
+            cursor.execute(
+                f"SELECT setval('{sequence}', coalesce(max(id), 0) + 1, false) "
+                f"FROM {table}"
+            )
+            cursor.execute(
+                f"ALTER TABLE {table} ALTER COLUMN id "
+                f"SET DEFAULT nextval('{sequence}')"
+            )
+            cursor.execute(
+                f"ALTER TABLE {table} ADD CONSTRAINT "
+                f"{self._quote(self.table + '_pkey')} PRIMARY KEY ({primary_key})"
+            )
+            for definition in indexes:
+                cursor.execute(definition)
+            for name, definition in constraints:
+                cursor.execute(
+                    f"ALTER TABLE {table} ADD CONSTRAINT {self._quote(name)} "
+                    f"{definition}"
+                )
+            cursor.execute(f"ANALYZE {table}")
+
+    def _unique_key(self, definition: str, partitioned: bool) -> str:
+        """
+        Add ``created_at`` to the columns of a unique index or constraint
+        for a partitioned table, or remove it when going back to a regular
+        one.
+        """
+        if " UNIQUE INDEX " not in definition and not definition.startswith("UNIQUE "):
+            return definition
+        if partitioned and not definition.endswith(", created_at)"):
+            return definition[:-1] + ", created_at)"
+        if not partitioned and definition.endswith(", created_at)"):
+            return definition[: -len(", created_at)")] + ")"
+        return definition
+
+    def _month(self, moment: datetime) -> date:
+        return timezone.localtime(moment).date().replace(day=1)
+
+    def _bound(self, month: date) -> str:
+        # Months start at midnight in the project time zone.
+        return timezone.make_aware(datetime.combine(month, time.min)).isoformat()
+
+
+def ensure_movement_partitions(months_ahead: Optional[int] = None) -> list[str]:
+    """
+    Create the partitions of the current month and the next ``months_ahead``
+    ones (``MONTHS_AHEAD`` by default) for the movement tables converted to
+    partitioned tables. Only reads the catalog when they all exist.
+    Returns:
+        list[str]: The names of the partitions created.
+    """
+    if default_connection.vendor != "postgresql":
+        return []
+    if months_ahead is None:
+        months_ahead = partitioning_options()["MONTHS_AHEAD"]
+
+    current = timezone.localdate().replace(day=1)
+    created = []
+    for model in (StockEntry, StockExit):
+        table = PartitionedTable(model._meta.db_table)
+        if table.is_partitioned():
+            with transaction.atomic():
+                created += table.ensure(current, add_months(current, months_ahead))
+    return created
+
+
+def _copy_to(cursor: Any, sql: str, output: Any) -> None:
+    raw = cursor.cursor
+
+    # psycopg2 exposes copy_expert, psycopg 3 a copy() context manager.
+    if hasattr(raw, "copy_expert"):
+        raw.copy_expert(sql, output)
+        return
+
+    with raw.copy(sql) as copy:
+        for data in copy:
+            output.write(data)
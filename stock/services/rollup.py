@@ -0,0 +1,205 @@
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Iterable, NamedTuple, Optional
+
+from django.db import connection, models, transaction
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from core.utils import TableNames, chunked
+from stock.models import MovementRollup, StockEntry, StockExit
+
+PERIODS = (MovementRollup.Period.DAY.value, MovementRollup.Period.MONTH.value)
+
+BATCH_SIZE = 500
+
+
+class RollupDelta(NamedTuple):
+    """
+    Quantities to add to the rollups of a stock for the day of ``created_at``.
+    """
+
+    stock_id: Any
+    created_at: datetime
+    entered: int = 0
+    exited: int = 0
+
+
+def period_start(day: date, period: str) -> date:
+    return day.replace(day=1) if period == MovementRollup.Period.MONTH else day
+
+
+class RollupService:
+    """
+    Maintains the ``MovementRollup`` rows.
+
+    Increments are merged per (period, start, stock) and written with
+    ``INSERT ... ON CONFLICT DO UPDATE`` so concurrent writers add to the
+    same row atomically. Decrements only update existing rows, as they are
+    also issued while a stock and its rollups are being deleted.
+
+    Movement deletes send no signal, so cascades delete them in bulk; the
+    code deleting movements whose stock remains calls ``remove_movements``.
+    """
+
+    def add(self, deltas: Iterable[RollupDelta]) -> None:
+        totals = self._merge(deltas)
+        if not totals:
+            return
+
+        table = TableNames(MovementRollup)
+        columns = table.columns("period", "period_start", "stock", "entered", "exited")
+        entered, exited = table.column("entered"), table.column("exited")
+
+        with connection.cursor() as cursor:
+            for chunk in chunked(sorted(totals.items()), BATCH_SIZE):
+                values = ", ".join(["(%s, %s, %s, %s, %s)"] * len(chunk))
+                cursor.execute(
+                    f"INSERT INTO {table.table} ({columns}) VALUES {values}"
+                    f" ON CONFLICT ({table.columns('period', 'period_start', 'stock')})"
+                    f" DO UPDATE SET {entered} = {table.table}.{entered} + EXCLUDED.{entered},"
+                    f" {exited} = {table.table}.{exited} + EXCLUDED.{exited}",
+                    [value for key, total in chunk for value in (*key, *total)],
+                )
+
+    def remove(self, deltas: Iterable[RollupDelta]) -> None:
+        for (period, start, stock_id), (entered, exited) in self._merge(deltas).items():
+            MovementRollup.objects.filter(
+                period=period,
+                period_start=start,
+                stock_id=stock_id,
+            ).update(
+                entered=models.F("entered") - entered,
+                exited=models.F("exited") - exited,
+            )
+
+    def remove_movements(self, movements: models.QuerySet) -> None:
+        """
+        Subtract the entries or exits of ``movements`` from the rollups,
+        before they are deleted. Quantities are summed per stock and day
+        in the database, so each affected rollup is updated once.
+        """
+        self.remove(_movement_deltas(movements))
+
+    @transaction.atomic
+    def rebuild(self, since: Optional[date] = None) -> int:
+        """
+        Recompute the rollups from the movement tables.
+        Args:
+            since (date, optional): First day to rebuild; the months it
+                touches are rebuilt whole. Every row when omitted.
+        Returns:
+            int: The number of day rollups written.
+        """
+        rollups = MovementRollup.objects.all()
+        if since:
+            since = period_start(since, MovementRollup.Period.MONTH)
+            rollups = rollups.filter(period_start__gte=since)
+        rollups.delete()
+
+        written = 0
+        for model in (StockEntry, StockExit):
+            movements = model.objects.all()
+            if since:
+                movements = movements.filter(
+                    created_at__gte=timezone.make_aware(
+                        datetime.combine(since, datetime.min.time())
+                    )
+                )
+            for chunk in chunked(_movement_deltas(movements), BATCH_SIZE * 10):
+                self.add(chunk)
+                written += len(chunk)
+
+        return written
+
+    def series(
+        self,
+        period: str,
+        since: date,
+        until: date,
+        product: Optional[int] = None,
+        supplier: Optional[int] = None,
+        category: Optional[int] = None,
+    ) -> dict[str, list]:
+        """
+        Entered and exited quantities per period between two dates, with a
+        zero for every period without movements.
+        Returns:
+            dict: ``labels`` (ISO dates), ``entered`` and ``exited`` lists.
+        """
+        rollups = MovementRollup.objects.filter(
+            period=period,
+            period_start__gte=period_start(since, period),
+            period_start__lte=until,
+        )
+        if product:
+            rollups = rollups.filter(stock__product_id=product)
+        if supplier:
+            rollups = rollups.filter(stock__supplier_id=supplier)
+        if category:
+            rollups = rollups.filter(stock__product__categories=category)
+
+        totals = {
+            start: (entered, exited)
+            for start, entered, exited in rollups.values("period_start")
+            .annotate(
+                total_entered=models.Sum("entered"),
+                total_exited=models.Sum("exited"),
+            )
+            .order_by()
+            .values_list("period_start", "total_entered", "total_exited")
+        }
+
+        labels = list(_periods(period, since, until))
+        return {
+            "labels": [start.isoformat() for start in labels],
+            "entered": [totals.get(start, (0, 0))[0] for start in labels],
+            "exited": [totals.get(start, (0, 0))[1] for start in labels],
+        }
+
+    def _merge(
+        self, deltas: Iterable[RollupDelta]
+    ) -> dict[tuple[str, date, Any], list[int]]:
+        totals: dict[tuple[str, date, Any], list[int]] = defaultdict(lambda: [0, 0])
+        for delta in deltas:
+            if delta.stock_id is None or not (delta.entered or delta.exited):
+                continue
+
+            day = timezone.localdate(delta.created_at)
+            for period in PERIODS:
+                total = totals[(period, period_start(day, period), delta.stock_id)]
+                total[0] += delta.entered
+                total[1] += delta.exited
+        return totals
+
+
+def _movement_deltas(movements: models.QuerySet) -> Iterable[RollupDelta]:
+    # One delta per stock and day, summed by the database.
+    field = "entered" if movements.model is StockEntry else "exited"
+    days = (
+        movements.filter(stock__isnull=False)
+        .annotate(day=TruncDate("created_at"))
+        .values("stock_id", "day")
+        .annotate(total=models.Sum("quantity"))
+        .order_by()
+        .values_list("stock_id", "day", "total")
+    )
+    for stock_id, day, total in days.iterator():
+        yield RollupDelta(stock_id, _local_noon(day), **{field: total})
+
+
+def _local_noon(day: date) -> datetime:
+    # Any instant of the day works; noon is far from DST transitions.
+    return timezone.make_aware(
+        datetime.combine(day, datetime.min.time().replace(hour=12))
+    )
+
+
+def _periods(period: str, since: date, until: date) -> Iterable[date]:
+    start = period_start(since, period)
+    while start <= until:
+        yield start
+        if period == MovementRollup.Period.MONTH:
+            start = (start + timedelta(days=32)).replace(day=1)
+        else:
+            start += timedelta(days=1)
@@ -0,0 +1,393 @@
+import hashlib
+import logging
+import secrets
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from django.conf import settings
+from django.db import connections, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from stock.models import MovementAudit, ScanDevice, ScanEvent, Stock, User
+from stock.services.stock import (
+    ENTRY,
+    EXIT,
+    InsufficientStockError,
+    Movement,
+    StockService,
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "MAX_EVENTS": 1000,
+    "MAX_PENDING": 50_000,
+    "RETRY_AFTER": 2,
+    "BATCH_SIZE": 5000,
+    "LINGER": 0.5,
+    "POLL_INTERVAL": 5,
+    "WORKER": True,
+}
+
+
+class ScanBackpressure(Exception):
+    """
+    Raised when more than ``MAX_PENDING`` scans wait to be applied.
+    """
+
+    def __init__(self, retry_after: int) -> None:
+        super().__init__(f"Tente novamente em {retry_after}s")
+        self.retry_after = retry_after
+
+
+class ScanSequenceError(ValueError):
+    """
+    Raised when a device skips a batch; ``expected`` is the one to send.
+    """
+
+    def __init__(self, expected: int) -> None:
+        super().__init__(f"Lote fora de ordem, esperado {expected}")
+        self.expected = expected
+
+
+@dataclass
+class ReceiveResult:
+    accepted: int
+    last_sequence: int
+    duplicate: bool = False
+
+
+@dataclass
+class FlushResult:
+    """
+    Outcome of one ``ScanService.flush`` call.
+    """
+
+    events: int = 0
+    stocks: int = 0
+    movements: int = 0
+    rejected: int = 0
+
+
+class ScanService:
+    """
+    Ingestion of the scans sent by handheld devices.
+
+    ``receive`` buffers a batch of scans in ``ScanEvent`` and ``flush``
+    applies the buffer, which the worker of the process does ``LINGER``
+    seconds after a batch commits, so the scans of every device received
+    meanwhile are applied together. Scans are coalesced into one net
+    movement per stock and user, written with ``StockService.apply_many``:
+    one entry or exit row and one ``UPDATE`` per stock instead of one per
+    scan. If the net exits of a flush take a stock below zero, the scans of
+    that stock are rejected and the other stocks are applied.
+
+    Ordering: each device numbers its batches from 1, and a batch is only
+    accepted right after the previous one. A repeated batch is acknowledged
+    without being buffered again, so retries are safe, and a skipped one is
+    refused with the sequence expected. Flushes lock the buffer in insertion
+    order and run one at a time, so the batches of a device are never
+    applied before the ones it sent earlier.
+
+    Authentication: devices send the token given by ``issue_token``, which
+    ``authenticate`` resolves to the device without a session or CSRF
+    token.
+
+    Backpressure: when ``MAX_PENDING`` scans are waiting, ``receive``
+    refuses batches with ``ScanBackpressure`` until the buffer drains, and
+    devices should retry after ``RETRY_AFTER`` seconds. Options come from
+    the ``SCAN_INGESTION`` setting.
+    """
+
+    def __init__(self) -> None:
+        self._options = {**DEFAULTS, **getattr(settings, "SCAN_INGESTION", {})}
+
+    @property
+    def linger(self) -> float:
+        return self._options["LINGER"]
+
+    @property
+    def poll_interval(self) -> float:
+        return self._options["POLL_INTERVAL"]
+
+    def issue_token(self, device: ScanDevice) -> str:
+        """
+        Give ``device`` a new token, revoking the previous one.
+        Returns:
+            str: The token; only its digest is stored.
+        """
+        token = secrets.token_urlsafe(32)
+        device.token_hash = _token_hash(token)
+        device.save(update_fields=["token_hash", "updated_at"])
+        return token
+
+    def authenticate(self, token: str) -> Optional[ScanDevice]:
+        """
+        The device holding ``token``, if any.
+        """
+        if not token:
+            return None
+        return (
+            ScanDevice.objects.select_related("user")
+            .filter(token_hash=_token_hash(token))
+            .first()
+        )
+
+    def receive(
+        self,
+        device: str,
+        sequence: int,
+        events: list[dict[str, Any]],
+        actor: Optional[Any] = None,
+    ) -> ReceiveResult:
+        """
+        Buffer the batch ``sequence`` of ``device``.
+        Args:
+            device (str): Identifies the device.
+            sequence (int): Number of the batch, starting at 1.
+            events (list[dict]): Scans with a stock ``code``, a non-zero
+                ``delta`` and an ISO 8601 ``scanned_at``.
+            actor: The user the movements are attributed to.
+        Returns:
+            ReceiveResult: The scans buffered and the last batch of the
+                device.
+        Raises:
+            ValueError: If the batch is malformed.
+            ScanSequenceError: If a previous batch is missing.
+            ScanBackpressure: If the buffer is full.
+        """
+        if not isinstance(device, str) or not 0 < len(device) <= 64:
+            raise ValueError("Coletor inválido")
+        if not isinstance(sequence, int) or sequence < 1:
+            raise ValueError("Lote inválido")
+        if len(events) > self._options["MAX_EVENTS"]:
+            raise ValueError(f"No máximo {self._options['MAX_EVENTS']} leituras")
+        scans = [self._parse(event) for event in events]
+
+        if self.pending(self._options["MAX_PENDING"]) >= self._options["MAX_PENDING"]:
+            if self._options["WORKER"]:
+                flusher.wake()
+            raise ScanBackpressure(self._options["RETRY_AFTER"])
+
+        with transaction.atomic():
+            scanner, _ = ScanDevice.objects.get_or_create(name=device)
+            scanner = ScanDevice.objects.select_for_update().get(pk=scanner.pk)
+
+            if sequence <= scanner.last_sequence:
+                return ReceiveResult(0, scanner.last_sequence, duplicate=True)
+            if sequence != scanner.last_sequence + 1:
+                raise ScanSequenceError(scanner.last_sequence + 1)
+
+            ScanEvent.objects.bulk_create(
+                ScanEvent(
+                    device=scanner,
+                    actor=actor,
+                    sequence=sequence,
+                    code=code,
+                    delta=delta,
+                    scanned_at=scanned_at,
+                )
+                for code, delta, scanned_at in scans
+            )
+            ScanDevice.objects.filter(pk=scanner.pk).update(
+                last_sequence=sequence, updated_at=timezone.now()
+            )
+            if self._options["WORKER"]:
+                transaction.on_commit(flusher.wake)
+
+        return ReceiveResult(len(scans), sequence)
+
+    @transaction.atomic
+    def flush(self) -> FlushResult:
+        """
+        Apply up to ``BATCH_SIZE`` buffered scans.
+        Returns:
+            FlushResult: Counters of the scans handled.
+        """
+        scans = list(
+            ScanEvent.objects.select_for_update()
+            .filter(status=ScanEvent.Status.PENDING)
+            .order_by("id")
+            .values_list("id", "code", "delta", "actor_id")[
+                : self._options["BATCH_SIZE"]
+            ]
+        )
+        if not scans:
+            return FlushResult()
+
+        stocks = Stock.objects.select_related("product", "supplier").in_bulk(
+            {code for _, code, _, _ in scans}, field_name="code"
+        )
+        actors = User.objects.in_bulk(
+            {actor_id for _, _, _, actor_id in scans if actor_id}
+        )
+
+        # Net delta and scans of each stock, per user.
+        deltas: dict[Any, dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        scan_ids: dict[tuple[Any, str], list[int]] = defaultdict(list)
+        rejected: dict[str, list[int]] = defaultdict(list)
+        for pk, code, delta, actor_id in scans:
+            if code not in stocks:
+                rejected["Estoque não encontrado"].append(pk)
+                continue
+            deltas[actor_id][code] += delta
+            scan_ids[(actor_id, code)].append(pk)
+
+        result = FlushResult(events=len(scans))
+        for actor_id, per_stock in deltas.items():
+            movements = {
+                code: self._movement(stocks[code], delta)
+                for code, delta in per_stock.items()
+                if delta
+            }
+            try:
+                self._apply(movements.values(), actors.get(actor_id))
+            except InsufficientStockError:
+                # Apply the stocks one by one to find the ones short of units.
+                for code, movement in list(movements.items()):
+                    try:
+                        self._apply([movement], actors.get(actor_id))
+                    except InsufficientStockError as error:
+                        rejected[str(error)] += scan_ids[(actor_id, code)]
+                        del movements[code]
+
+            result.stocks += len(per_stock)
+            result.movements += len(movements)
+
+        for error, ids in rejected.items():
+            result.rejected += ScanEvent.objects.filter(pk__in=ids).update(
+                status=ScanEvent.Status.REJECTED, error=error
+            )
+        ScanEvent.objects.filter(
+            pk__in=[pk for pk, _, _, _ in scans],
+            status=ScanEvent.Status.PENDING,
+        ).delete()
+        return result
+
+    def retry(self, scans: models.QuerySet) -> int:
+        """
+        Buffer the rejected ``scans`` again, e.g. once the missing stock was
+        registered.
+        Returns:
+            int: The number of scans buffered.
+        """
+        count = scans.filter(status=ScanEvent.Status.REJECTED).update(
+            status=ScanEvent.Status.PENDING, error=""
+        )
+        if count and self._options["WORKER"]:
+            transaction.on_commit(flusher.wake)
+        return count
+
+    def pending(self, limit: Optional[int] = None) -> int:
+        """
+        Number of buffered scans, counted up to ``limit``.
+        """
+        scans = ScanEvent.objects.filter(status=ScanEvent.Status.PENDING)
+        if limit is not None:
+            scans = scans.order_by("id")[:limit]
+        return scans.count()
+
+    def stats(self) -> dict[str, Any]:
+        oldest = (
+            ScanEvent.objects.filter(status=ScanEvent.Status.PENDING)
+            .order_by("id")
+            .values_list("received_at", flat=True)
+            .first()
+        )
+        return {
+            "pending": self.pending(),
+            "rejected": ScanEvent.objects.filter(
+                status=ScanEvent.Status.REJECTED
+            ).count(),
+            "oldest_pending": (
+                (timezone.now() - oldest).total_seconds() if oldest else 0.0
+            ),
+        }
+
+    def _parse(self, event: Any) -> tuple[str, int, datetime]:
+        try:
+            code, delta = event["code"], event["delta"]
+            scanned_at = parse_datetime(event["scanned_at"])
+        except (KeyError, TypeError, ValueError) as error:
+            raise ValueError(f"Leitura inválida: {event!r}") from error
+
+        if (
+            not isinstance(code, str)
+            or not 0 < len(code) <= 25
+            or not isinstance(delta, int)
+            or isinstance(delta, bool)
+            or not delta
+            or scanned_at is None
+        ):
+            raise ValueError(f"Leitura inválida: {event!r}")
+
+        if timezone.is_naive(scanned_at):
+            scanned_at = timezone.make_aware(scanned_at)
+        return code, delta, scanned_at
+
+    def _movement(self, stock: Stock, delta: int) -> Movement:
+        if delta > 0:
+            return Movement(stock, stock.product, delta, ENTRY, stock.supplier)
+        return Movement(stock, stock.product, -delta, EXIT)
+
+    def _apply(self, movements: Any, actor: Optional[Any]) -> None:
+        StockService.apply_many(
+            movements,
+            actor=actor,
+            source=MovementAudit.Source.SCAN,
+        )
+
+
+class ScanFlusher:
+    """
+    Background thread applying the scans buffered by the current process.
+
+    It is started by the first batch that commits, waits ``LINGER`` seconds
+    after it is woken up so the batches received meanwhile are coalesced
+    together, and polls every ``POLL_INTERVAL`` seconds for the scans
+    buffered by other processes.
+    """
+
+    def __init__(self) -> None:
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def wake(self) -> None:
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run,
+                    name="scan-flusher",
+                    daemon=True,
+                )
+                self._thread.start()
+        self._event.set()
+
+    def _run(self) -> None:
+        service = ScanService()
+        woken = True
+        while True:
+            if woken:
+                time.sleep(service.linger)
+            self._event.clear()
+            try:
+                while service.flush().events:
+                    pass
+            except Exception:  # pylint: disable=broad-exception-caught
+                logger.exception("Could not apply the buffered scans")
+            finally:
+                connections.close_all()
+            woken = self._event.wait(service.poll_interval)
+
+
+flusher = ScanFlusher()
+
+
+def _token_hash(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,264 @@
+import hashlib
+import re
+from typing import Any, Optional
+
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    SearchVectorField,
+    TrigramSimilarity,
+)
+from django.core.cache import caches
+from django.db import connections, models
+from django.db.models.functions import Collate, Greatest, Upper
+
+from stock.models import Product
+
+DEFAULTS = {
+    "ALIAS": "default",
+    "KEY_PREFIX": "search",
+    "TIMEOUT": 5 * 60,
+    "LIMIT": 10,
+    "CANDIDATES": 50,
+    "MIN_LENGTH": 2,
+}
+
+# Text search configuration of the product search document; changing it
+# requires generating the column again, see migration 0028.
+SEARCH_CONFIG = "portuguese"
+DOCUMENT_COLUMN = "search_document"
+
+WORDS = re.compile(r"\w+")
+
+_trigram: dict[str, bool] = {}
+
+
+def search_options() -> dict[str, Any]:
+    return {**DEFAULTS, **getattr(settings, "PRODUCT_SEARCH", {})}
+
+
+class SearchDocument(models.Expression):
+    """
+    The ``search_document`` column of products on PostgreSQL, the weighted
+    ``tsvector`` of the name, code and description that the database
+    generates on write, see migration 0028. Ranking reads it instead of
+    parsing every matching product again. It is not a model field as other
+    databases have no such column.
+    """
+
+    output_field = SearchVectorField()
+
+    def __init__(self, alias: Optional[str] = None) -> None:
+        super().__init__()
+        self.alias = alias
+
+    def resolve_expression(self, query=None, *args, **kwargs) -> "SearchDocument":
+        return SearchDocument(query.get_initial_alias())
+
+    def relabeled_clone(self, change_map: dict[str, str]) -> "SearchDocument":
+        return SearchDocument(change_map.get(self.alias, self.alias))
+
+    def as_sql(self, compiler, connection) -> tuple[str, list]:
+        alias = compiler.quote_name_unless_alias(self.alias)
+        return f"{alias}.{connection.ops.quote_name(DOCUMENT_COLUMN)}", []
+
+
+def trigram_enabled(alias: str = "default") -> bool:
+    """
+    Whether the ``pg_trgm`` extension is installed in the database
+    ``alias``. It is optional; migration 0028 installs it when the server
+    provides it.
+    """
+    if alias not in _trigram:
+        connection = connections[alias]
+        enabled = False
+        if connection.vendor == "postgresql":
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+                enabled = cursor.fetchone() is not None
+        _trigram[alias] = enabled
+    return _trigram[alias]
+
+
+class ProductSearch:
+    """
+    Ranked product search and name autocompletion.
+
+    On PostgreSQL, every word of the term matches a word of the name, code
+    or description by prefix through the full-text index of
+    ``SearchDocument``, ranked with the name and code above the description;
+    with ``pg_trgm`` installed, names similar to the term also match, so
+    typos still find the product. Other databases fall back to
+    ``icontains`` on the same fields, names starting with the term first.
+
+    Autocompletion suggests the names starting with the term and the codes
+    starting with it, through prefix indexes. Suggestions are cached per
+    term in the Django cache configured by the ``PRODUCT_SEARCH`` setting;
+    when a shorter term already returned every product that starts with it,
+    longer terms are filtered from that entry without a query, so typing a
+    name costs about one query. ``invalidate`` drops the entries when
+    products change.
+    """
+
+    def __init__(self, using: str = "default") -> None:
+        self._options = search_options()
+        self._cache = caches[self._options["ALIAS"]]
+        self._using = using
+
+    def filter(self, queryset: models.QuerySet, term: str) -> models.QuerySet:
+        """
+        The products of ``queryset`` matching ``term``, with their relevance
+        annotated as ``search_rank``.
+        """
+        words = WORDS.findall(term)
+        if not words:
+            return queryset.none().annotate(
+                search_rank=models.Value(0.0, output_field=models.FloatField())
+            )
+
+        if connections[self._using].vendor != "postgresql":
+            matches = models.Q()
+            for word in words:
+                matches &= (
+                    models.Q(name__icontains=word)
+                    | models.Q(code__icontains=word)
+                    | models.Q(description__icontains=word)
+                )
+            return queryset.filter(matches).annotate(
+                search_rank=models.Case(
+                    models.When(name__istartswith=term.strip(), then=1.0),
+                    default=0.5,
+                    output_field=models.FloatField(),
+                )
+            )
+
+        document = SearchDocument()
+        query = SearchQuery(
+            " & ".join(f"{word}:*" for word in words),
+            config=SEARCH_CONFIG,
+            search_type="raw",
+        )
+        matches = models.Q(search_document=query)
+        rank = SearchRank(document, query)
+        if trigram_enabled(self._using):
+            matches |= models.Q(name__trigram_similar=term)
+            rank = Greatest(rank, TrigramSimilarity("name", term))
+
+        return (
+            queryset.alias(search_document=document)
+            .filter(matches)
+            .annotate(search_rank=rank)
+        )
+
+    def search(self, term: str, limit: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        The products matching ``term``, most relevant first.
+        """
+        products = (
+            self.filter(Product.objects.using(self._using), term)
+            .order_by("-search_rank", "name", "pk")
+            .values("code", "name", "base_price", "search_rank")
+        )
+        return [
+            {
+                "code": product["code"],
+                "name": product["name"],
+                "base_price": str(product["base_price"]),
+                "rank": round(product["search_rank"], 4),
+            }
+            for product in products[: limit or self._options["LIMIT"]]
+        ]
+
+    def autocomplete(
+        self, term: str, limit: Optional[int] = None
+    ) -> list[dict[str, str]]:
+        """
+        Up to ``limit`` products whose name starts with ``term``, ordered by
+        name, followed by the ones whose code does. Terms shorter than
+        ``MIN_LENGTH`` suggest nothing.
+        """
+        term = " ".join(term.split()).upper()
+        limit = min(limit or self._options["LIMIT"], self._options["CANDIDATES"])
+        if len(term) < self._options["MIN_LENGTH"]:
+            return []
+
+        generation = self._generation()
+        keys = [
+            self._key("prefix", str(generation), self._digest(term[:length]))
+            for length in range(len(term), self._options["MIN_LENGTH"] - 1, -1)
+        ]
+        found = self._cache.get_many(keys)
+
+        suggestions = found.get(keys[0])
+        if suggestions is None:
+            # The longest cached prefix is the most selective one.
+            shorter = next(
+                (found[key] for key in keys[1:] if key in found),
+                None,
+            )
+            if shorter is not None and shorter["complete"]:
+                suggestions = {
+                    "complete": True,
+                    "items": [
+                        item for item in shorter["items"] if self._starts(item, term)
+                    ],
+                }
+            else:
+                suggestions = self._suggestions(term)
+            self._cache.set(keys[0], suggestions, self._options["TIMEOUT"])
+
+        return [{"code": code, "name": name} for code, name in suggestions["items"]][
+            :limit
+        ]
+
+    def invalidate(self) -> None:
+        key = self._key("generation")
+        if not self._cache.add(key, 1, None):
+            try:
+                self._cache.incr(key)
+            except ValueError:
+                self._cache.set(key, 1, None)
+
+    def _suggestions(self, term: str) -> dict[str, Any]:
+        # Names and codes are matched separately so each query reads its
+        # index in order and stops after CANDIDATES rows.
+        key = Upper("name")
+        if connections[self._using].vendor == "postgresql":
+            key = Collate(key, "C")
+        products = Product.objects.using(self._using)
+        limit = self._options["CANDIDATES"] + 1
+
+        names = list(
+            products.alias(name_key=key)
+            .filter(name_key__startswith=term)
+            .order_by("name_key", "pk")
+            .values_list("code", "name")[:limit]
+        )
+        codes = list(
+            products.filter(code__startswith=term)
+            .order_by("code")
+            .values_list("code", "name")[:limit]
+        )
+        complete = len(names) < limit and len(codes) < limit
+        names, codes = names[: limit - 1], codes[: limit - 1]
+
+        seen = {code for code, _ in names}
+        return {
+            "complete": complete,
+            "items": names + [item for item in codes if item[0] not in seen],
+        }
+
+    def _starts(self, item: tuple[str, str], term: str) -> bool:
+        code, name = item
+        return name.upper().startswith(term) or code.startswith(term)
+
+    def _digest(self, term: str) -> str:
+        # Terms may hold characters cache backends reject in keys.
+        return hashlib.md5(term.encode(), usedforsecurity=False).hexdigest()
+
+    def _generation(self) -> int:
+        return self._cache.get_or_set(self._key("generation"), 0, None)
+
+    def _key(self, *parts: str) -> str:
+        return ":".join((self._options["KEY_PREFIX"], *parts))
@@ -0,0 +1,400 @@
+import os
+import threading
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Any, Callable, Iterable, Optional
+
+from django.db import models, transaction
+
+from stock.models import Category, DashboardSnapshot, DashboardSnapshotShard, Stock
+from stock.services.dashboard import DashboardService, chart_data, percentage
+
+SNAPSHOT_PK = 1
+SHARDS = 16
+
+
+@dataclass(frozen=True)
+class StockState:
+    """
+    The columns of a ``Stock`` row that feed the dashboard snapshot.
+    """
+
+    product_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+    supplier_name: Optional[str] = None
+    quantity: Optional[int] = None
+    price: Optional[Decimal] = None
+
+    @classmethod
+    def load(cls, pk: Any) -> Optional["StockState"]:
+        """
+        Read the current state of a stock from the database.
+        Returns:
+            StockState | None: ``None`` if the stock does not exist.
+        """
+        row = (
+            Stock.objects.filter(pk=pk)
+            .values(
+                "product_id",
+                "supplier_id",
+                "quantity",
+                supplier_name=models.F("supplier__name"),
+                price=models.F("product__base_price"),
+            )
+            .first()
+        )
+        return cls(**row) if row else None
+
+    @property
+    def stocked(self) -> bool:
+        return self.product_id is not None
+
+    @property
+    def valued(self) -> bool:
+        return self.stocked and self.quantity is not None
+
+    @property
+    def value(self) -> Decimal:
+        return self.quantity * self.price if self.valued else Decimal(0)
+
+    @property
+    def supplier_key(self) -> str:
+        return str(self.supplier_id or "")
+
+
+EMPTY = StockState()
+
+
+class DashboardSnapshotService:
+    """
+    Maintains the ``DashboardSnapshot`` row.
+
+    Changes of the stock value add to one of the ``SHARDS``
+    ``DashboardSnapshotShard`` rows with a single ``F()`` update; each
+    thread writes its own shard, so concurrent movements do not serialize on
+    the snapshot row. Changes that touch the category or supplier
+    breakdowns, or the maximum price, also lock the snapshot row and
+    rewrite it; shards are always locked first.
+    Migration 0029 creates the rows; when they do not exist, deltas are
+    ignored and the next read rebuilds them from scratch.
+    """
+
+    def get(self) -> DashboardSnapshot:
+        """
+        Return the snapshot with the value of the shards added, building it
+        on first use.
+        """
+        snapshot = DashboardSnapshot.objects.filter(pk=SNAPSHOT_PK).first()
+        if not snapshot:
+            return self.rebuild()
+
+        pending = DashboardSnapshotShard.objects.aggregate(
+            total=models.Sum("total_value"),
+            valued=models.Sum("valued_stocks"),
+        )
+        snapshot.total_value += pending["total"] or 0
+        snapshot.valued_stocks += pending["valued"] or 0
+        return snapshot
+
+    def context(self) -> dict[str, Any]:
+        """
+        Dashboard template variables read from the snapshot.
+        Returns:
+            dict: ``kpi`` values and the ``charts`` datasets.
+        """
+        snapshot = self.get()
+        return {
+            "kpi": self.kpis(snapshot),
+            "charts": self.charts(snapshot),
+        }
+
+    def kpis(self, snapshot: DashboardSnapshot) -> dict[str, Any]:
+        average = (
+            snapshot.total_value / snapshot.valued_stocks
+            if snapshot.valued_stocks
+            else None
+        )
+        return {
+            "total": snapshot.total_value if snapshot.valued_stocks else None,
+            "count": snapshot.stocked_products,
+            "average": average,
+            "max": snapshot.max_price,
+        }
+
+    def charts(self, snapshot: DashboardSnapshot) -> dict[str, Any]:
+        categories = [
+            snapshot.categories[key] for key in sorted(snapshot.categories, key=int)
+        ]
+        category_total = sum(count for _, count in categories)
+
+        # The live dashboard groups suppliers by name, so merge homonyms.
+        suppliers: dict[Optional[str], int] = {}
+        for name, count in snapshot.suppliers.values():
+            suppliers[name] = suppliers.get(name, 0) + count
+        supplier_total = sum(suppliers.values())
+
+        return chart_data(
+            [
+                {
+                    "category": name,
+                    "products": count,
+                    "percentage": percentage(count, category_total),
+                }
+                for name, count in categories
+            ],
+            [
+                {
+                    "supplier_name": name,
+                    "products": count,
+                    "percentage": percentage(count, supplier_total),
+                }
+                for name, count in sorted(
+                    suppliers.items(), key=lambda item: (item[0] is None, item[0])
+                )
+            ],
+        )
+
+    def compute(self) -> dict[str, Any]:
+        """
+        Recompute every snapshot field from the source tables.
+        """
+        kpis = (
+            Stock.objects.filter(product__isnull=False)
+            .annotate(value=models.F("quantity") * models.F("product__base_price"))
+            .aggregate(
+                total=models.Sum("value"),
+                stocked=models.Count("pk"),
+                valued=models.Count("value"),
+                max=models.Max("product__base_price"),
+            )
+        )
+        categories = Category.objects.annotate(
+            products_count=models.Count("products")
+        ).values_list("pk", "name", "products_count")
+        suppliers = (
+            Stock.objects.filter(product__isnull=False)
+            .values("supplier_id", supplier_name=models.F("supplier__name"))
+            .annotate(products=models.Count("pk"))
+            .order_by()
+        )
+
+        return {
+            "total_value": kpis["total"] or Decimal(0),
+            "stocked_products": kpis["stocked"],
+            "valued_stocks": kpis["valued"],
+            "max_price": kpis["max"],
+            "categories": {str(pk): [name, count] for pk, name, count in categories},
+            "suppliers": {
+                str(row["supplier_id"] or ""): [row["supplier_name"], row["products"]]
+                for row in suppliers
+            },
+        }
+
+    @transaction.atomic
+    def rebuild(self) -> DashboardSnapshot:
+        """
+        Replace the snapshot with a full recomputation and empty the shards.
+        """
+        DashboardSnapshotShard.objects.bulk_create(
+            [DashboardSnapshotShard(pk=shard) for shard in range(SHARDS)],
+            ignore_conflicts=True,
+        )
+        # Wait for the transactions writing a shard, so the recomputation
+        # includes their movements before the shards are emptied.
+        list(
+            DashboardSnapshotShard.objects.select_for_update()
+            .order_by("pk")
+            .values_list("pk", flat=True)
+        )
+        DashboardSnapshot.objects.get_or_create(pk=SNAPSHOT_PK)
+        snapshot = DashboardSnapshot.objects.select_for_update().get(pk=SNAPSHOT_PK)
+
+        for name, value in self.compute().items():
+            setattr(snapshot, name, value)
+        snapshot.save()
+        DashboardSnapshotShard.objects.update(total_value=0, valued_stocks=0)
+        return snapshot
+
+    def verify(self) -> list[str]:
+        """
+        Compare the stored snapshot with what ``DashboardService`` computes live.
+        Returns:
+            list[str]: A description of every mismatch, empty when consistent.
+        """
+        snapshot = self.get()
+        live = DashboardService()
+        errors = []
+
+        stored_kpis = self.kpis(snapshot)
+        for key, value in live.kpis().items():
+            if not _same_amount(stored_kpis[key], value):
+                errors.append(f"kpi {key}: snapshot={stored_kpis[key]} live={value}")
+
+        stored_charts = self.charts(snapshot)
+        for key, dataset in live.charts().items():
+            expected = dict(zip(dataset["labels"], dataset["data"]))
+            stored = dict(zip(stored_charts[key]["labels"], stored_charts[key]["data"]))
+            if expected != stored:
+                errors.append(f"{key}: snapshot={stored} live={expected}")
+
+        return errors
+
+    def stock_changed(
+        self,
+        before: Optional[StockState],
+        after: Optional[StockState],
+    ) -> None:
+        """
+        Apply the difference between two states of the same stock.
+        ``before`` is ``None`` for a new stock and ``after`` for a deleted one.
+        """
+        before = before or EMPTY
+        after = after or EMPTY
+
+        value = after.value - before.value
+        valued = int(after.valued) - int(before.valued)
+
+        self.value_changed(value, valued)
+        if (
+            before.product_id == after.product_id
+            and before.supplier_id == after.supplier_id
+            and before.price == after.price
+        ):
+            return
+
+        def apply(snapshot: DashboardSnapshot) -> None:
+            snapshot.stocked_products += int(after.stocked) - int(before.stocked)
+
+            if before.stocked:
+                _add_count(snapshot.suppliers, before.supplier_key, -1)
+            if after.stocked:
+                _add_count(
+                    snapshot.suppliers, after.supplier_key, 1, after.supplier_name
+                )
+
+            if before.stocked and before.price == snapshot.max_price:
+                snapshot.max_price = _max_price()
+            elif after.stocked and (
+                snapshot.max_price is None or after.price > snapshot.max_price
+            ):
+                snapshot.max_price = after.price
+
+        self._update(apply)
+
+    def value_changed(self, value: Decimal, valued: int = 0) -> None:
+        """
+        Add ``value`` to the total stock value without locking the snapshot
+        row.
+        Args:
+            value (Decimal): Difference in stock value.
+            valued (int): Difference in the number of stocks with a value.
+        """
+        if value or valued:
+            DashboardSnapshotShard.objects.filter(pk=_shard()).update(
+                total_value=models.F("total_value") + value,
+                valued_stocks=models.F("valued_stocks") + valued,
+            )
+
+    def product_price_changed(
+        self,
+        product_id: int,
+        old_price: Decimal,
+        new_price: Decimal,
+    ) -> None:
+        """
+        Reprice every stock of a product.
+        """
+        quantity = Stock.objects.filter(product_id=product_id).aggregate(
+            quantity=models.Sum("quantity"),
+            stocks=models.Count("pk"),
+        )
+        if not quantity["stocks"]:
+            return
+
+        self.value_changed((new_price - old_price) * (quantity["quantity"] or 0))
+
+        def apply(snapshot: DashboardSnapshot) -> None:
+            if old_price == snapshot.max_price and new_price < old_price:
+                snapshot.max_price = _max_price()
+            elif snapshot.max_price is None or new_price > snapshot.max_price:
+                snapshot.max_price = new_price
+
+        self._update(apply)
+
+    def category_saved(self, category: Category) -> None:
+        def apply(snapshot: DashboardSnapshot) -> None:
+            _, count = snapshot.categories.get(str(category.pk), (None, 0))
+            snapshot.categories[str(category.pk)] = [category.name, count]
+
+        self._update(apply)
+
+    def category_deleted(self, category_id: int) -> None:
+        self._update(lambda snapshot: snapshot.categories.pop(str(category_id), None))
+
+    def categories_changed(self, category_ids: Iterable[int], delta: int) -> None:
+        """
+        Add ``delta`` products to each category.
+        """
+        category_ids = list(category_ids)
+        if not category_ids:
+            return
+
+        def apply(snapshot: DashboardSnapshot) -> None:
+            for category_id in category_ids:
+                _add_count(
+                    snapshot.categories, str(category_id), delta, keep_empty=True
+                )
+
+        self._update(apply)
+
+    def supplier_renamed(self, supplier_id: int, name: str) -> None:
+        def apply(snapshot: DashboardSnapshot) -> None:
+            if str(supplier_id) in snapshot.suppliers:
+                snapshot.suppliers[str(supplier_id)][0] = name
+
+        self._update(apply)
+
+    @transaction.atomic
+    def _update(self, apply: Callable[[DashboardSnapshot], Any]) -> None:
+        snapshot = (
+            DashboardSnapshot.objects.select_for_update().filter(pk=SNAPSHOT_PK).first()
+        )
+        if not snapshot:
+            return
+
+        apply(snapshot)
+        snapshot.save()
+
+
+def _add_count(
+    counts: dict[str, list],
+    key: str,
+    delta: int,
+    name: Optional[str] = None,
+    keep_empty: bool = False,
+) -> None:
+    current_name, count = counts.get(key, (name, 0))
+    count += delta
+
+    if count <= 0 and not keep_empty:
+        counts.pop(key, None)
+        return
+
+    counts[key] = [name if name is not None else current_name, count]
+
+
+def _shard() -> int:
+    # A transaction runs in a single thread, so it only ever locks one shard.
+    return hash((os.getpid(), threading.get_ident())) % SHARDS
+
+
+def _max_price() -> Optional[Decimal]:
+    return Stock.objects.filter(product__isnull=False).aggregate(
+        max=models.Max("product__base_price")
+    )["max"]
+
+
+def _same_amount(stored: Any, live: Any) -> bool:
+    if stored is None or live is None:
+        return stored == live
+    return round(Decimal(stored), 2) == round(Decimal(live), 2)
@@ -1,65 +1,440 @@
-from typing import Any
-from stock.models import Product, Stock, Supplier
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from typing import Any, Iterable, NamedTuple, Optional
+
+from django.db import models, transaction
+from django.db.models.functions import Coalesce
+
+from stock.models import (
+    MovementAudit,
+    Notification,
+    Product,
+    Stock,
+    StockEntry,
+    StockExit,
+    Supplier,
+)
+from stock.services.dashboard_cache import invalidate_dashboard
+from stock.services.ledger import LedgerService
+from stock.services.lookup import CodeLookupService
+from stock.services.rollup import RollupDelta, RollupService
+from stock.services.snapshot import DashboardSnapshotService, StockState
+
+ENTRY = "entry"
+EXIT = "exit"
+
+BATCH_SIZE = 1000
+
+
+class InsufficientStockError(ValueError):
+    """Raised when an exit would take a stock below zero."""
+
+
+class Movement(NamedTuple):
+    """
+    One record of a ``StockService.apply_many`` batch.
+    ``kind`` is either ``ENTRY`` or ``EXIT``.
+    """
+
+    stock: Stock
+    product: Product
+    quantity: int
+    kind: str
+    supplier: Optional[Supplier] = None
+
+
+@dataclass
+class BatchResult:
+    entries: list[StockEntry] = field(default_factory=list)
+    exits: list[StockExit] = field(default_factory=list)
+    notifications: list[Notification] = field(default_factory=list)
 
 
 class StockService:
-    def __init__(self, stock: Stock) -> None:
+    """
+    The single mutation path for stock quantities.
+
+    Quantities are changed in the database with ``F()`` expressions inside a
+    transaction, so concurrent entries and exits never overwrite each other.
+    Exits only apply while enough units are available; otherwise
+    ``InsufficientStockError`` is raised and the transaction is rolled back.
+    A notification is raised when a stock crosses into the low or high state
+    and kept in ``notifications`` for the caller. Every quantity change is recorded as a
+    ``MovementAudit`` row attributed to ``actor`` and ``source``.
+    """
+
+    def __init__(
+        self,
+        stock: Stock,
+        actor: Optional[Any] = None,
+        source: str = MovementAudit.Source.SERVICE,
+    ) -> None:
         self._stock = stock
+        self._actor = actor
+        self._source = source
+        self._previous_state: Optional[str] = None
+        self.notifications: list[Notification] = []
 
     def entry(
         self,
         product: Product,
         quantity: int,
-        supplier: Supplier,
-    ):
-        from stock.models import StockEntry
-
-        StockEntry.objects.create(
-            stock=self._stock,
-            product=product,
-            quantity=quantity,
-            supplier=supplier,
-        )
-
-        self._stock.quantity += quantity
-        self._stock.save(update_fields=("quantity",))
-
-        if self._stock.quantity <= self._stock.max_quantity:
-            self._dispatch_events(
-                product.user,
-                f"O estoque para o produto {product}, está acima do configurado",
+        supplier: Optional[Supplier] = None,
+    ) -> StockEntry:
+        return self.register_entry(
+            StockEntry(
+                product=product,
+                quantity=quantity,
+                supplier=supplier,
             )
+        )
 
     def exit(
         self,
         product: Product,
         quantity: int,
-        description: str,
-    ):
-        from stock.models import StockExit
-
-        StockExit.objects.create(
-            stock=self._stock,
-            product=product,
-            quantity=quantity,
-            description=description,
+    ) -> StockExit:
+        return self.register_exit(
+            StockExit(
+                product=product,
+                quantity=quantity,
+            )
+        )
+
+    @transaction.atomic
+    def register_entry(self, stock_entry: StockEntry) -> StockEntry:
+        """
+        Save an entry and add its quantity to the stock.
+        Editing an existing entry only applies the difference.
+        """
+        delta = stock_entry.quantity - self._previous_quantity(stock_entry)
+        self._discard_checkpoints(stock_entry, delta)
+
+        stock_entry.stock = self._stock
+        stock_entry.save()
+        self._change_quantity(delta)
+
+        if self._entered(Stock.State.HIGH):
+            self._dispatch_events(
+                stock_entry.product.user,
+                f'A quantidade do produto "{stock_entry.product}" está acima da quantidade máxima!',
+                Stock.State.HIGH,
+            )
+
+        return stock_entry
+
+    @transaction.atomic
+    def register_exit(self, stock_exit: StockExit) -> StockExit:
+        """
+        Save an exit and remove its quantity from the stock.
+        Editing an existing exit only applies the difference.
+        Raises:
+            InsufficientStockError: If the stock does not hold enough units.
+        """
+        delta = stock_exit.quantity - self._previous_quantity(stock_exit)
+        self._discard_checkpoints(stock_exit, delta)
+
+        stock_exit.stock = self._stock
+        stock_exit.save()
+        self._change_quantity(-delta)
+
+        if self._entered(Stock.State.LOW):
+            self._dispatch_events(
+                stock_exit.product.user,
+                f'A quantidade do produto "{stock_exit.product}" está abaixo da quantidade mínima!',
+                Stock.State.LOW,
+            )
+
+        return stock_exit
+
+    @transaction.atomic
+    def adjust(self, quantity: int) -> StockEntry | StockExit | None:
+        """
+        Set the stock to an absolute quantity, recording the difference as an
+        entry or an exit. The stock row stays locked until the transaction
+        ends so the caller may save the remaining fields safely.
+        Returns:
+            StockEntry | StockExit | None: The movement, if the quantity changed.
+        """
+        current = (
+            Stock.objects.select_for_update()
+            .values_list("quantity", flat=True)
+            .get(pk=self._stock.pk)
+        ) or 0
+        product = self._stock.product
+
+        if quantity > current:
+            return self.register_entry(
+                StockEntry(
+                    product=product,
+                    supplier=self._stock.supplier,
+                    quantity=quantity - current,
+                )
+            )
+        if quantity < current:
+            return self.register_exit(
+                StockExit(
+                    product=product,
+                    quantity=current - quantity,
+                )
+            )
+        return None
+
+    @classmethod
+    @transaction.atomic
+    def apply_many(
+        cls,
+        movements: Iterable[Movement | tuple],
+        actor: Optional[Any] = None,
+        source: str = MovementAudit.Source.BATCH,
+    ) -> BatchResult:
+        """
+        Apply a batch of entries and exits in one transaction.
+
+        Movement rows are inserted with ``bulk_create`` and each affected
+        stock receives a single ``UPDATE`` with its net quantity. Threshold
+        notifications are evaluated once per stock, after every movement is
+        applied. Model signals are not sent for the inserted rows, so the
+        rollups, the code lookup cache and the dashboard are updated here.
+        Args:
+            movements (Iterable[Movement | tuple]): ``(stock, product, quantity,
+                kind[, supplier])`` records.
+            actor: The user the audit rows are attributed to.
+            source (str): The ``MovementAudit.Source`` of the batch.
+        Returns:
+            BatchResult: The created movements and notifications.
+        Raises:
+            InsufficientStockError: If the net result of the batch would take
+                a stock below zero. Nothing is applied in that case.
+            ValueError: If a record has an unknown kind or a non-positive
+                quantity.
+        """
+        result = BatchResult()
+        deltas: dict[Any, int] = defaultdict(int)
+        audits: list[tuple[Movement, int]] = []
+
+        for movement in (Movement(*record) for record in movements):
+            if movement.quantity <= 0:
+                raise ValueError(f"Quantidade inválida: {movement.quantity}")
+
+            if movement.kind == ENTRY:
+                result.entries.append(
+                    StockEntry(
+                        stock=movement.stock,
+                        product=movement.product,
+                        supplier=movement.supplier,
+                        quantity=movement.quantity,
+                    )
+                )
+                deltas[movement.stock.pk] += movement.quantity
+                audits.append((movement, movement.quantity))
+            elif movement.kind == EXIT:
+                result.exits.append(
+                    StockExit(
+                        stock=movement.stock,
+                        product=movement.product,
+                        quantity=movement.quantity,
+                    )
+                )
+                deltas[movement.stock.pk] -= movement.quantity
+                audits.append((movement, -movement.quantity))
+            else:
+                raise ValueError(f"Tipo de movimentação inválido: {movement.kind}")
+
+        StockEntry.objects.bulk_create(result.entries, batch_size=BATCH_SIZE)
+        StockExit.objects.bulk_create(result.exits, batch_size=BATCH_SIZE)
+        RollupService().add(
+            [
+                RollupDelta(entry.stock.pk, entry.created_at, entered=entry.quantity)
+                for entry in result.entries
+            ]
+            + [
+                RollupDelta(exit.stock.pk, exit.created_at, exited=exit.quantity)
+                for exit in result.exits
+            ]
         )
-        self._stock.quantity -= quantity
-        self._stock.save(update_fields=("quantity",))
 
-        if self._stock.quantity <= self._stock.minimal_quantity:
+        # A stable order keeps concurrent batches from deadlocking each other.
+        for pk in sorted(deltas):
+            delta = deltas[pk]
+            stocks = Stock.objects.filter(pk=pk)
+            if delta < 0:
+                stocks = stocks.filter(quantity__gte=-delta)
+
+            if delta and not stocks.update(
+                quantity=Coalesce(models.F("quantity"), 0) + delta,
+            ):
+                raise InsufficientStockError(
+                    f"O estoque {pk} não possui {-delta} unidade(s)"
+                )
+
+        value = Decimal(0)
+        quantities = {}
+        for stock in Stock.objects.filter(pk__in=deltas).select_related(
+            "product__user"
+        ):
+            delta = deltas[stock.pk]
+            quantities[stock.pk] = (stock.quantity or 0) - delta
+            if stock.product:
+                value += delta * stock.product.base_price
+
+            service = cls(stock)
+            service._previous_state = Stock.state_for(
+                quantities[stock.pk], stock.minimal_quantity, stock.max_quantity
+            )
+            if service._entered(Stock.State.HIGH):
+                service._dispatch_events(
+                    stock.product.user,
+                    f'A quantidade do produto "{stock.product}" está acima da quantidade máxima!',
+                    Stock.State.HIGH,
+                )
+            if service._entered(Stock.State.LOW):
+                service._dispatch_events(
+                    stock.product.user,
+                    f'A quantidade do produto "{stock.product}" está abaixo da quantidade mínima!',
+                    Stock.State.LOW,
+                )
+            result.notifications += service.notifications
+
+        # Replay the batch from the starting quantities for the audit trail,
+        # entries first: stocks are checked on their net quantity, so an exit
+        # may come before the entry that covers it.
+        audit_rows = []
+        for movement, delta in sorted(audits, key=lambda audit: audit[1] < 0):
+            before = quantities[movement.stock.pk]
+            quantities[movement.stock.pk] = before + delta
+            audit_rows.append(
+                MovementAudit(
+                    actor=actor,
+                    stock=movement.stock,
+                    product=movement.product,
+                    delta=delta,
+                    before=before,
+                    after=before + delta,
+                    source=source,
+                )
+            )
+        MovementAudit.objects.bulk_create(audit_rows, batch_size=BATCH_SIZE)
+
+        DashboardSnapshotService().value_changed(value)
+        CodeLookupService().invalidate_stocks(deltas)
+        transaction.on_commit(invalidate_dashboard)
+
+        return result
+
+    def stored_state(self) -> Optional[str]:
+        """
+        The state of the stock as currently stored in the database.
+        """
+        return (
+            Stock.objects.filter(pk=self._stock.pk)
+            .values_list("state", flat=True)
+            .first()
+        )
+
+    def check_thresholds(self, previous_state: Optional[str] = None) -> None:
+        """
+        Notify the product owner if the stock left its configured range, e.g.
+        after the thresholds were edited.
+        Args:
+            previous_state (str, optional): The state before the edit, see
+                ``stored_state``. Any state outside the range notifies when
+                omitted.
+        """
+        product = self._stock.product
+
+        # The state is computed by the database on save.
+        self._stock.refresh_from_db(fields=("state",))
+        self._previous_state = previous_state
+
+        if self._entered(Stock.State.LOW):
             self._dispatch_events(
                 product.user,
-                f"O estoque para o produto {product}, está abaixo do configurado",
+                f"A quantidade do produto {product} está abaixo da quantidade mínima!",
+                Stock.State.LOW,
+            )
+        if self._entered(Stock.State.HIGH):
+            self._dispatch_events(
+                product.user,
+                f"A quantidade do produto {product} está acima da quantidade máxima!",
+                Stock.State.HIGH,
+            )
+
+    def _entered(self, state: str) -> bool:
+        # Only the change into a state notifies, not every movement in it.
+        return self._stock.state == state and self._previous_state != state
+
+    def _previous_quantity(self, movement: StockEntry | StockExit) -> int:
+        if not movement.pk:
+            return 0
+
+        return (
+            type(movement)
+            .objects.select_for_update()
+            .values_list("quantity", flat=True)
+            .get(pk=movement.pk)
+        )
+
+    def _discard_checkpoints(
+        self, movement: StockEntry | StockExit, delta: int
+    ) -> None:
+        # An edited movement changes the balance from its date on.
+        if movement.pk and delta:
+            LedgerService().discard_checkpoints(
+                type(movement).objects.filter(pk=movement.pk)
             )
 
-    def _dispatch_events(self, user: Any, message: str):
-        from stock.models import Notification
-        from integrations.utils import notify
+    def _change_quantity(self, delta: int) -> None:
+        if not delta:
+            self._previous_state = self._stock.state
+            return
 
-        notification = Notification.objects.create(
-            destination=user,
-            body=message,
+        stocks = Stock.objects.filter(pk=self._stock.pk)
+        if delta < 0:
+            stocks = stocks.filter(quantity__gte=-delta)
+
+        if not stocks.update(
+            quantity=Coalesce(models.F("quantity"), 0) + delta,
+        ):
+            raise InsufficientStockError(
+                f"O estoque do produto {self._stock} não possui {-delta} unidade(s)"
+            )
+
+        # Read back the state computed by the database and derive the one
+        # the stock was in before this change.
+        quantity, state, minimal_quantity, max_quantity = Stock.objects.values_list(
+            "quantity", "state", "minimal_quantity", "max_quantity"
+        ).get(pk=self._stock.pk)
+        self._stock.quantity, self._stock.state = quantity, state
+        self._previous_state = Stock.state_for(
+            quantity - delta, minimal_quantity, max_quantity
+        )
+
+        # QuerySet.update() bypasses the model signals.
+        after = StockState.load(self._stock.pk)
+        DashboardSnapshotService().stock_changed(
+            replace(after, quantity=after.quantity - delta),
+            after,
         )
+        CodeLookupService().invalidate_stocks([self._stock.pk])
 
-        notify(notification=notification)
+        MovementAudit.objects.create(
+            actor=self._actor,
+            stock_id=self._stock.pk,
+            product_id=after.product_id,
+            delta=delta,
+            before=after.quantity - delta,
+            after=after.quantity,
+            source=self._source,
+        )
+
+    def _dispatch_events(self, user: Any, message: str, state: str):
+        from integrations.services.notification import AlertService
+
+        notification = AlertService().alert(
+            user,
+            f"stock:{self._stock.pk}:{state}",
+            message,
+        )
+        self.notifications.append(notification)
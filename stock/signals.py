@@ -0,0 +1,333 @@
+"""
+Signal receivers that keep the dashboard snapshot, the movement rollups, the
+unread notification counters, the code lookup cache, the product search cache
+and the dashboard cache in sync with model edits, and the receiver creating
+the upcoming partitions of the movement tables after ``migrate``.
+
+Each ``pre_*`` receiver stores the row as it is in the database on the
+instance so the matching ``post_*`` receiver can apply only the difference.
+Bulk ``QuerySet.update``/``bulk_create`` calls bypass these receivers and must
+notify ``DashboardSnapshotService``, ``RollupService``, ``UnreadCounterService``
+and ``CodeLookupService`` themselves.
+"""
+
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.dispatch import receiver
+
+from stock.models import (
+    Category,
+    Notification,
+    Product,
+    Stock,
+    StockEntry,
+    StockExit,
+    Supplier,
+)
+from stock.services.dashboard_cache import invalidate_dashboard
+from stock.services.ledger import LedgerService
+from stock.services.lookup import CodeLookupService
+from stock.services.notification import UnreadCounterService
+from stock.services.partitions import ensure_movement_partitions
+from stock.services.rollup import RollupDelta, RollupService
+from stock.services.search import ProductSearch
+from stock.services.snapshot import DashboardSnapshotService, StockState
+
+
+@receiver(pre_save, sender=Stock)
+def remember_stock_state(sender, instance: Stock, raw: bool, **kwargs):
+    instance._snapshot_state = (
+        StockState.load(instance.pk) if instance.pk and not raw else None
+    )
+
+
+@receiver(post_save, sender=Stock)
+def update_snapshot_for_stock(sender, instance: Stock, raw: bool, **kwargs):
+    if raw:
+        return
+
+    DashboardSnapshotService().stock_changed(
+        getattr(instance, "_snapshot_state", None),
+        StockState.load(instance.pk),
+    )
+
+
+@receiver(pre_delete, sender=Stock)
+def remember_deleted_stock_state(sender, instance: Stock, **kwargs):
+    instance._snapshot_state = StockState.load(instance.pk)
+
+
+@receiver(post_delete, sender=Stock)
+def remove_stock_from_snapshot(sender, instance: Stock, **kwargs):
+    DashboardSnapshotService().stock_changed(
+        getattr(instance, "_snapshot_state", None),
+        None,
+    )
+
+
+@receiver(pre_save, sender=Product)
+def remember_product_price(sender, instance: Product, raw: bool, **kwargs):
+    instance._snapshot_price = (
+        Product.objects.filter(pk=instance.pk)
+        .values_list("base_price", flat=True)
+        .first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=Product)
+def update_snapshot_for_product(sender, instance: Product, created: bool, **kwargs):
+    old_price = getattr(instance, "_snapshot_price", None)
+
+    if created or old_price is None or old_price == instance.base_price:
+        return
+
+    DashboardSnapshotService().product_price_changed(
+        instance.pk,
+        old_price,
+        instance.base_price,
+    )
+
+
+@receiver(pre_delete, sender=Product)
+def remember_product_categories(sender, instance: Product, **kwargs):
+    instance._snapshot_categories = list(
+        instance.categories.values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_snapshot(sender, instance: Product, **kwargs):
+    DashboardSnapshotService().categories_changed(
+        getattr(instance, "_snapshot_categories", ()),
+        -1,
+    )
+
+
+@receiver(m2m_changed, sender=Product.categories.through)
+def update_snapshot_for_product_categories(
+    sender,
+    instance,
+    action: str,
+    reverse: bool,
+    pk_set: set | None,
+    **kwargs,
+):
+    through = Product.categories.through
+    owner, target = "product_id", "category_id"
+    if reverse:
+        owner, target = target, owner
+
+    # Only the links that really exist are removed, whatever pk_set says.
+    if action in ("pre_remove", "pre_clear"):
+        links = through.objects.filter(**{owner: instance.pk})
+        if action == "pre_remove":
+            links = links.filter(**{f"{target}__in": pk_set})
+        instance._snapshot_links = list(links.values_list(target, flat=True))
+        return
+
+    if action == "post_add":
+        linked, delta = pk_set, 1
+    elif action in ("post_remove", "post_clear"):
+        linked, delta = getattr(instance, "_snapshot_links", ()), -1
+    else:
+        return
+
+    service = DashboardSnapshotService()
+    if reverse:
+        service.categories_changed([instance.pk], delta * len(linked))
+    else:
+        service.categories_changed(linked, delta)
+
+
+@receiver(post_save, sender=Category)
+def update_snapshot_for_category(sender, instance: Category, raw: bool, **kwargs):
+    if not raw:
+        DashboardSnapshotService().category_saved(instance)
+
+
+@receiver(post_delete, sender=Category)
+def remove_category_from_snapshot(sender, instance: Category, **kwargs):
+    DashboardSnapshotService().category_deleted(instance.pk)
+
+
+@receiver(post_save, sender=Supplier)
+def update_snapshot_for_supplier(
+    sender, instance: Supplier, created: bool, raw: bool, **kwargs
+):
+    if not created and not raw:
+        DashboardSnapshotService().supplier_renamed(instance.pk, instance.name)
+
+
+@receiver(pre_save, sender=StockEntry)
+@receiver(pre_save, sender=StockExit)
+def remember_movement(sender, instance, raw: bool, **kwargs):
+    instance._rollup_movement = (
+        sender.objects.filter(pk=instance.pk)
+        .values_list("stock_id", "created_at", "quantity")
+        .first()
+        if instance.pk and not raw
+        else None
+    )
+
+
+@receiver(post_save, sender=StockEntry)
+@receiver(post_save, sender=StockExit)
+def update_rollups_for_movement(sender, instance, raw: bool, **kwargs):
+    if raw:
+        return
+
+    service = RollupService()
+    previous = getattr(instance, "_rollup_movement", None)
+    if previous:
+        service.remove([_rollup_delta(sender, *previous)])
+    service.add(
+        [
+            _rollup_delta(
+                sender, instance.stock_id, instance.created_at, instance.quantity
+            )
+        ]
+    )
+
+
+# Movements have no delete receivers, so cascades delete them without loading
+# every row. The rollups and checkpoints of a deleted stock are deleted with it;
+# only the movements of stocks that remain are subtracted from their rollups,
+# and their checkpoints discarded.
+@receiver(pre_delete, sender=Product)
+@receiver(pre_delete, sender=Supplier)
+def remove_cascaded_movements_from_rollups(sender, instance, **kwargs):
+    if sender is Product:
+        field, movement_models = "product", (StockEntry, StockExit)
+    else:
+        field, movement_models = "supplier", (StockEntry,)
+
+    for model in movement_models:
+        movements = model.objects.filter(**{field: instance}).exclude(
+            **{f"stock__{field}": instance}
+        )
+        RollupService().remove_movements(movements)
+        LedgerService().discard_checkpoints(movements)
+
+
+def _rollup_delta(sender, stock_id, created_at, quantity) -> RollupDelta:
+    if sender is StockEntry:
+        return RollupDelta(stock_id, created_at, entered=quantity)
+    return RollupDelta(stock_id, created_at, exited=quantity)
+
+
+@receiver(pre_save, sender=Notification)
+def remember_notification_state(
+    sender, instance: Notification, raw: bool, update_fields=None, **kwargs
+):
+    # Saves that leave destination and read alone keep the count as is.
+    if (
+        raw
+        or instance._state.adding
+        or (update_fields is not None and not {"destination", "read"} & update_fields)
+    ):
+        instance._unread_state = None
+        return
+
+    instance._unread_state = (
+        Notification.objects.filter(pk=instance.pk)
+        .values_list("destination_id", "read")
+        .first()
+    )
+
+
+@receiver(post_save, sender=Notification)
+def update_unread_counter(
+    sender, instance: Notification, created: bool, raw: bool, **kwargs
+):
+    if raw:
+        return
+
+    service = UnreadCounterService()
+    if created:
+        if not instance.read:
+            service.add(instance.destination_id, 1)
+        return
+
+    previous = getattr(instance, "_unread_state", None)
+    if previous is None or previous == (instance.destination_id, instance.read):
+        return
+
+    destination_id, read = previous
+    if not read:
+        service.add(destination_id, -1)
+    if not instance.read:
+        service.add(instance.destination_id, 1)
+
+
+@receiver(post_delete, sender=Notification)
+def remove_notification_from_counter(sender, instance: Notification, **kwargs):
+    if not instance.read:
+        UnreadCounterService().add(instance.destination_id, -1)
+
+
+@receiver(post_save, sender=Product)
+def invalidate_product_lookup(sender, instance: Product, raw: bool, **kwargs):
+    if not raw:
+        CodeLookupService().invalidate_products([instance.pk])
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_lookup(sender, instance: Product, **kwargs):
+    CodeLookupService().invalidate([instance.code])
+
+
+@receiver(post_save, sender=Stock)
+def invalidate_stock_lookup(sender, instance: Stock, raw: bool, **kwargs):
+    if raw:
+        return
+
+    service = CodeLookupService()
+    service.invalidate_stocks([instance.pk])
+
+    # The previous product still lists the stock.
+    previous = getattr(instance, "_snapshot_state", None)
+    if previous and previous.product_id not in (None, instance.product_id):
+        service.invalidate_products([previous.product_id])
+
+
+@receiver(post_delete, sender=Stock)
+def remove_stock_from_lookup(sender, instance: Stock, **kwargs):
+    service = CodeLookupService()
+    service.invalidate([instance.code])
+    if instance.product_id:
+        service.invalidate_products([instance.product_id])
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def schedule_search_invalidation(sender, **kwargs):
+    transaction.on_commit(ProductSearch().invalidate)
+
+
+@receiver(post_save, sender=Stock)
+@receiver(post_delete, sender=Stock)
+@receiver(post_save, sender=StockEntry)
+@receiver(post_save, sender=StockExit)
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+@receiver(m2m_changed, sender=Product.categories.through)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Supplier)
+@receiver(post_delete, sender=Supplier)
+def schedule_dashboard_invalidation(sender, **kwargs):
+    transaction.on_commit(invalidate_dashboard)
+
+
+# Connected by StockConfig.ready, as post_migrate is sent per app config.
+def create_upcoming_partitions(sender, using: str, **kwargs):
+    if using == DEFAULT_DB_ALIAS:
+        ensure_movement_partitions()
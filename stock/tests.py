@@ -1,3 +1,785 @@
-from django.test import TestCase
+import json
+import random
+import threading
+from datetime import timedelta
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models.deletion import Collector
+from django.urls import reverse
+from django.utils import timezone
+from django.test import (
+    Client,
+    RequestFactory,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+
+from integrations.services.events import RetainedEventStorage
+from stock.models import (
+    Category,
+    MovementAudit,
+    MovementRollup,
+    Notification,
+    NotificationCounter,
+    Product,
+    ScanDevice,
+    ScanEvent,
+    Stock,
+    StockCheckpoint,
+    StockEntry,
+    StockExit,
+    Supplier,
+    User,
+)
+from stock.services.dashboard import DashboardService
+from stock.services.dashboard_cache import DashboardCache
+from stock.services.ledger import LedgerService
+from stock.services.lookup import CodeLookupService
+from stock.services.notification import UnreadCounterService
+from stock.services.partitions import (
+    PartitionedTable,
+    add_months,
+    ensure_movement_partitions,
+)
+from stock.services.rollup import RollupService
+from stock.services.scan import ScanService
+from stock.services.search import ProductSearch
+from stock.services.stock import (
+    ENTRY,
+    EXIT,
+    InsufficientStockError,
+    StockService,
+)
+
+
+class DashboardServiceTests(TestCase):
+    def seed(self, size: int) -> None:
+        supplier = Supplier.objects.create(name=f"Fornecedor {size}")
+        categories = [
+            Category.objects.create(name=f"Categoria {size}-{index}")
+            for index in range(size)
+        ]
+        for index in range(size):
+            product = Product.objects.create(
+                name=f"Produto {size}-{index}", base_price=Decimal("2.50")
+            )
+            product.categories.set(categories[: index + 1])
+            Stock.objects.create(product=product, supplier=supplier, quantity=index)
+
+    def test_query_count_does_not_grow_with_the_catalog(self):
+        for size in (0, 3, 30):
+            with self.subTest(size=size):
+                self.seed(size)
+                service = DashboardService()
+
+                with self.assertNumQueries(3):
+                    service.kpis()
+                    service.charts()
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        self.request = RequestFactory().get("/admin/")
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return {"builds": self.builds}
+
+    def test_shipped_settings_share_the_cache(self):
+        DashboardCache().get(self.request, self.build)
+        context = DashboardCache().get(self.request, self.build)
+
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(context, {"builds": 1})
+
+    @override_settings(DASHBOARD_CACHE={"ALIAS": "default"})
+    def test_process_local_cache_builds_every_request(self):
+        DashboardCache().get(self.request, self.build)
+        DashboardCache().get(self.request, self.build)
+
+        self.assertEqual(self.builds, 2)
+
+    @override_settings(DASHBOARD_CACHE={"KEY_PREFIX": "test", "ALLOW_LOCAL": True})
+    def test_single_process_deployment_may_use_a_local_cache(self):
+        DashboardCache().get(self.request, self.build)
+        context = DashboardCache().get(self.request, self.build)
+
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(context, {"builds": 1})
+
+
+@skipUnless(connection.vendor == "postgresql", "SQLite serializes writers")
+class StockServiceConcurrencyTests(TransactionTestCase):
+    THREADS = 8
+    MOVEMENTS = 40
+    INITIAL = 20
+
+    def setUp(self):
+        self.supplier = Supplier.objects.create(name="Fornecedor")
+        self.product = Product.objects.create(name="Produto", base_price=Decimal(3))
+        self.stock = Stock.objects.create(
+            product=self.product,
+            supplier=self.supplier,
+            quantity=self.INITIAL,
+        )
+
+    def run_threads(self, target):
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def run(seed):
+            try:
+                barrier.wait()
+                target(random.Random(seed))
+            except Exception as error:  # pylint: disable=broad-exception-caught
+                errors.append(error)
+            finally:
+                connections.close_all()
+
+        threads = [
+            threading.Thread(target=run, args=(seed,)) for seed in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_concurrent_entries_and_exits_are_not_lost(self):
+        lock = threading.Lock()
+        applied = []
+        refused = []
+
+        def move(rng):
+            stock = Stock.objects.select_related("product").get(pk=self.stock.pk)
+            for _ in range(self.MOVEMENTS):
+                quantity = rng.randint(1, 5)
+                try:
+                    if rng.random() < 0.5:
+                        StockService(stock).entry(stock.product, quantity)
+                        delta = quantity
+                    else:
+                        StockService(stock).exit(stock.product, quantity)
+                        delta = -quantity
+                except InsufficientStockError:
+                    with lock:
+                        refused.append(quantity)
+                    continue
+                with lock:
+                    applied.append(delta)
+
+        self.run_threads(move)
+
+        self.stock.refresh_from_db()
+        audits = MovementAudit.objects.filter(stock=self.stock)
+        self.assertEqual(len(applied) + len(refused), self.THREADS * self.MOVEMENTS)
+        self.assertEqual(self.stock.quantity, self.INITIAL + sum(applied))
+        self.assertEqual(audits.count(), len(applied))
+        self.assertFalse(audits.filter(after__lt=0).exists())
+        self.assertEqual(
+            sorted(audits.values_list("delta", flat=True)), sorted(applied)
+        )
+
+        # Replaying the audit trail in order gives every intermediate quantity.
+        quantity = self.INITIAL
+        for before, delta, after in audits.order_by("pk").values_list(
+            "before", "delta", "after"
+        ):
+            self.assertEqual(before + delta, after)
+            self.assertGreaterEqual(after, 0)
+            quantity += delta
+        self.assertEqual(quantity, self.stock.quantity)
+
+    def test_concurrent_exits_never_take_the_stock_below_zero(self):
+        lock = threading.Lock()
+        applied = []
+
+        def drain(rng):
+            stock = Stock.objects.select_related("product").get(pk=self.stock.pk)
+            for _ in range(self.INITIAL):
+                try:
+                    StockService(stock).exit(stock.product, 1)
+                except InsufficientStockError:
+                    continue
+                with lock:
+                    applied.append(-1)
+
+        self.run_threads(drain)
+
+        self.stock.refresh_from_db()
+        self.assertEqual(self.stock.quantity, 0)
+        self.assertEqual(len(applied), self.INITIAL)
+        self.assertEqual(
+            MovementAudit.objects.filter(stock=self.stock).count(), self.INITIAL
+        )
+
+
+class ProductAdminTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(self.user)
+        self.category = Category.objects.create(name="Ferramentas")
+        self.supplier = Supplier.objects.create(name="Fornecedor")
+
+    def post(self, url, name, stocks=()):
+        data = {
+            "name": name,
+            "description": "",
+            "base_price": "4.00",
+            "categories": [self.category.pk],
+            "stocks-TOTAL_FORMS": str(len(stocks)),
+            "stocks-INITIAL_FORMS": "0",
+            "stocks-MIN_NUM_FORMS": "0",
+            "stocks-MAX_NUM_FORMS": "1000",
+        }
+        for index, quantity in enumerate(stocks):
+            data.update(
+                {
+                    f"stocks-{index}-code": f"{name.upper()}{index}",
+                    f"stocks-{index}-supplier": self.supplier.pk,
+                    f"stocks-{index}-quantity": str(quantity),
+                    f"stocks-{index}-minimal_quantity": "1",
+                    f"stocks-{index}-max_quantity": "25",
+                }
+            )
+        response = self.client.post(url, data)
+        errors = response.context and [
+            response.context["adminform"].form.errors,
+            [
+                inline.formset.errors
+                for inline in response.context["inline_admin_formsets"]
+            ],
+        ]
+        self.assertEqual(response.status_code, 302, errors)
+
+    def test_opening_balance_is_recorded_once(self):
+        self.post(reverse("admin:stock_product_add"), "Martelo", stocks=[7])
+        product = Product.objects.get(name="Martelo")
+        stock = product.stocks.get()
+
+        self.post(reverse("admin:stock_product_change", args=[product.pk]), "Marreta")
+
+        stock.refresh_from_db()
+        self.assertEqual(stock.quantity, 7)
+        self.assertEqual(StockEntry.objects.filter(stock=stock).count(), 1)
+        self.assertEqual(
+            list(
+                MovementAudit.objects.filter(stock=stock).values_list(
+                    "before", "delta", "after", "source"
+                )
+            ),
+            [(0, 7, 7, MovementAudit.Source.ADMIN)],
+        )
+
+    def test_product_without_stock_gets_an_empty_one(self):
+        self.post(reverse("admin:stock_product_add"), "Serrote")
+
+        stock = Product.objects.get(name="Serrote").stocks.get()
+        self.assertEqual(stock.quantity, 0)
+        self.assertFalse(MovementAudit.objects.filter(stock=stock).exists())
+
+
+class MovementDeletionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_superuser("admin", "admin@example.com", "x")
+        self.client.force_login(self.user)
+        self.supplier = Supplier.objects.create(name="Fornecedor")
+        self.other = Supplier.objects.create(name="Outro fornecedor")
+        self.product = Product.objects.create(name="Martelo", base_price=4)
+        self.stock = Stock.objects.create(
+            code="MART", product=self.product, supplier=self.supplier, quantity=0
+        )
+        service = StockService(self.stock)
+        for supplier in (self.supplier, self.other, self.other):
+            service.entry(self.product, 5, supplier)
+        service.exit(self.product, 2)
+
+    def rollups(self):
+        # Subtracting every movement of a day leaves its rollup at zero.
+        return sorted(
+            MovementRollup.objects.exclude(entered=0, exited=0).values_list(
+                "period", "period_start", "stock", "entered", "exited"
+            )
+        )
+
+    def assertRollupsRebuilt(self):
+        rollups = self.rollups()
+        RollupService().rebuild()
+        self.assertEqual(rollups, self.rollups())
+
+    def test_admin_delete_subtracts_the_movement(self):
+        entry = StockEntry.objects.filter(supplier=self.supplier).get()
+        response = self.client.post(
+            reverse("admin:stock_stockentry_delete", args=[entry.pk]), {"post": "yes"}
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertRollupsRebuilt()
+
+    def test_admin_delete_discards_the_checkpoints_after_the_movement(self):
+        taken_at = timezone.now()
+        LedgerService().checkpoint(taken_at)
+        entry = StockEntry.objects.filter(supplier=self.supplier).get()
+
+        self.client.post(
+            reverse("admin:stock_stockentry_delete", args=[entry.pk]), {"post": "yes"}
+        )
+
+        self.assertFalse(StockCheckpoint.objects.exists())
+        self.assertEqual(LedgerService().quantities_at(taken_at)[self.stock.pk], 8)
+
+    def test_admin_bulk_delete_subtracts_the_movements(self):
+        response = self.client.post(
+            reverse("admin:stock_stockexit_changelist"),
+            {
+                "action": "delete_selected",
+                "_selected_action": list(
+                    StockExit.objects.values_list("pk", flat=True)
+                ),
+                "post": "yes",
+            },
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(StockExit.objects.exists())
+        self.assertRollupsRebuilt()
+
+    def test_supplier_delete_subtracts_entries_of_remaining_stocks(self):
+        self.other.delete()
+
+        self.assertEqual(StockEntry.objects.count(), 1)
+        self.assertRollupsRebuilt()
+
+    def test_admin_product_delete_subtracts_movements_of_other_stocks(self):
+        other = Stock.objects.create(
+            product=Product.objects.create(name="Serrote", base_price=4),
+            supplier=self.supplier,
+            quantity=0,
+        )
+        StockService(other).entry(self.product, 3, self.supplier)
+
+        response = self.client.post(
+            reverse("admin:stock_product_delete", args=[self.product.pk]),
+            {"post": "yes"},
+        )
+
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(StockEntry.objects.exists())
+        self.assertRollupsRebuilt()
+
+    def test_cascaded_movements_are_fast_deleted(self):
+        self.assertTrue(Collector(using="default").can_fast_delete(StockEntry))
+        self.assertTrue(Collector(using="default").can_fast_delete(StockExit))
+
+        self.product.delete()
+
+        self.assertFalse(MovementRollup.objects.exists())
+
+
+class StockCheckpointTests(TestCase):
+    def setUp(self):
+        supplier = Supplier.objects.create(name="Fornecedor")
+        product = Product.objects.create(name="Martelo", base_price=4)
+        self.stock = Stock.objects.create(
+            product=product, supplier=supplier, quantity=0
+        )
+        self.entry = StockService(self.stock).entry(product, 5, supplier)
+        self.taken_at = timezone.now()
+        LedgerService().checkpoint(self.taken_at)
+
+    def test_edited_movement_discards_the_checkpoints_after_it(self):
+        self.entry.quantity = 7
+        StockService(self.stock).register_entry(self.entry)
+
+        self.assertFalse(StockCheckpoint.objects.exists())
+        self.assertEqual(LedgerService().quantities_at(self.taken_at)[self.stock.pk], 7)
+
+    def test_new_movement_keeps_the_checkpoints(self):
+        StockService(self.stock).exit(self.entry.product, 2)
+
+        self.assertEqual(StockCheckpoint.objects.get().quantity, 5)
+
+
+class StockBatchTests(TestCase):
+    def setUp(self):
+        supplier = Supplier.objects.create(name="Fornecedor")
+        self.product = Product.objects.create(name="Martelo", base_price=4)
+        self.hammers = Stock.objects.create(
+            product=self.product, supplier=supplier, quantity=5
+        )
+        self.saws = Stock.objects.create(
+            product=self.product, supplier=supplier, quantity=1
+        )
+
+    def quantities(self):
+        return {
+            stock.pk: Stock.objects.get(pk=stock.pk).quantity
+            for stock in (self.hammers, self.saws)
+        }
+
+    def test_stock_short_of_units_rolls_back_the_whole_batch(self):
+        with self.assertRaises(InsufficientStockError):
+            StockService.apply_many(
+                [
+                    (self.hammers, self.product, 3, ENTRY),
+                    (self.hammers, self.product, 1, EXIT),
+                    (self.saws, self.product, 2, EXIT),
+                ]
+            )
+
+        self.assertEqual(self.quantities(), {self.hammers.pk: 5, self.saws.pk: 1})
+        self.assertFalse(StockEntry.objects.exists())
+        self.assertFalse(StockExit.objects.exists())
+        self.assertFalse(MovementAudit.objects.exists())
+        self.assertFalse(MovementRollup.objects.exists())
+
+    def test_stocks_are_checked_on_their_net_quantity(self):
+        result = StockService.apply_many(
+            [
+                (self.saws, self.product, 2, EXIT),
+                (self.saws, self.product, 3, ENTRY),
+            ]
+        )
+
+        self.assertEqual((len(result.entries), len(result.exits)), (1, 1))
+        self.assertEqual(self.quantities(), {self.hammers.pk: 5, self.saws.pk: 2})
+        self.assertEqual(
+            list(MovementAudit.objects.order_by("id").values_list("before", "after")),
+            [(1, 4), (4, 2)],
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitioning requires PostgreSQL")
+class PartitionedTableTests(TestCase):
+    def setUp(self):
+        supplier = Supplier.objects.create(name="Fornecedor")
+        product = Product.objects.create(name="Martelo", base_price=4)
+        stock = Stock.objects.create(
+            code="MART", product=product, supplier=supplier, quantity=0
+        )
+        service = StockService(stock)
+        for _ in range(3):
+            service.entry(product, 5, supplier)
+
+        self.current = timezone.localdate().replace(day=1)
+        old = timezone.now() - timedelta(days=200)
+        self.old = timezone.localdate(old).replace(day=1)
+        StockEntry.objects.filter(
+            pk=StockEntry.objects.order_by("pk").values("pk")[:1]
+        ).update(created_at=old)
+        self.table = PartitionedTable(StockEntry._meta.db_table)
+
+        # The test transaction defers the foreign key checks of the rows
+        # above, which would keep the old table from being dropped.
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+    def test_recent_movements_only_scan_recent_partitions(self):
+        self.table.partition(months_ahead=1)
+
+        plan = StockEntry.objects.filter(
+            created_at__gte=timezone.now() - timedelta(days=7)
+        ).explain()
+
+        self.assertIn(f"{self.table.table}_p{self.current:%Y_%m}", plan)
+        self.assertNotIn(f"{self.table.table}_p{self.old:%Y_%m}", plan)
+        self.assertEqual(StockEntry.objects.count(), 3)
+
+    def test_upcoming_partitions_are_created_once(self):
+        self.table.partition(months_ahead=0)
+
+        created = ensure_movement_partitions(months_ahead=2)
+
+        self.assertEqual(
+            created,
+            [
+                f"{self.table.table}_p{add_months(self.current, months):%Y_%m}"
+                for months in (1, 2)
+            ],
+        )
+        self.assertEqual(ensure_movement_partitions(months_ahead=2), [])
+
+
+class StreamViewTests(TestCase):
+    def test_test_event_uses_the_outbox_payload(self):
+        user = User.objects.create_user("operador", password="x")
+        self.client.force_login(user)
+
+        response = self.client.get(reverse("sse"))
+
+        self.assertEqual(response.status_code, 200)
+        (event,) = RetainedEventStorage().get_events(str(user.pk), 0)
+        # The string sent to the browser, as static/js/sse.js parses it.
+        self.assertEqual(
+            json.loads(event.data), {"messages": [{"text": "hello world"}]}
+        )
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", "operador@example.com")
+        self.other = User.objects.create_user("gerente", "gerente@example.com")
+        for destination in (self.user, self.user, self.other):
+            Notification.objects.create(
+                destination=destination, body="Estoque baixo", read=False
+            )
+
+    def test_mark_all_read_zeroes_the_counter_of_the_user(self):
+        service = UnreadCounterService()
+        self.assertEqual(service.unread(self.user), 2)
+
+        self.assertEqual(service.mark_all_read(self.user), 2)
+
+        self.assertEqual(service.unread(self.user), 0)
+        self.assertEqual(NotificationCounter.objects.get(user=self.user).unread, 0)
+        self.assertFalse(self.user.notifications.filter(read=False).exists())
+        self.assertEqual(service.unread(self.other), 1)
+
+
+@override_settings(SCAN_INGESTION={"WORKER": False, "RETRY_AFTER": 3})
+class ScanIngestionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="x")
+        self.device = ScanDevice.objects.create(name="coletor-1", user=self.user)
+        self.token = ScanService().issue_token(self.device)
+        # Devices send no CSRF token.
+        self.client = Client(enforce_csrf_checks=True)
+
+    def post(self, sequence, token=None, **batch):
+        batch = {
+            "sequence": sequence,
+            "events": [
+                {"code": "MART", "delta": 1, "scanned_at": "2026-10-18T10:00:00Z"}
+            ],
+            **batch,
+        }
+        return self.client.post(
+            reverse("scan-ingestion"),
+            json.dumps(batch),
+            content_type="application/json",
+            headers={"authorization": f"Bearer {token or self.token}"},
+        )
+
+    def test_batches_need_the_token_of_the_device(self):
+        response = self.post(1, token="invalid")
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+        response = self.post(1, device="coletor-2")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(ScanEvent.objects.exists())
+
+    def test_batch_is_buffered_for_the_user_of_the_device(self):
+        response = self.post(1)
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(
+            response.json(), {"accepted": 1, "last_sequence": 1, "duplicate": False}
+        )
+        self.assertEqual(ScanEvent.objects.get().actor, self.user)
+
+    def test_repeated_batch_is_acknowledged_once(self):
+        self.post(1)
+
+        response = self.post(1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(), {"accepted": 0, "last_sequence": 1, "duplicate": True}
+        )
+        self.assertEqual(ScanEvent.objects.count(), 1)
+
+    def test_skipped_batch_is_refused_with_the_expected_one(self):
+        self.post(1)
+
+        response = self.post(3)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()["expected"], 2)
+        self.assertEqual(ScanEvent.objects.count(), 1)
+
+    def test_full_buffer_asks_to_retry_later(self):
+        with self.settings(
+            SCAN_INGESTION={"WORKER": False, "RETRY_AFTER": 3, "MAX_PENDING": 1}
+        ):
+            self.post(1)
+            response = self.post(2)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "3")
+        self.assertEqual(ScanEvent.objects.count(), 1)
+
+
+@override_settings(SCAN_INGESTION={"WORKER": False})
+class ScanFlushTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user("operador", password="x")
+        ScanDevice.objects.create(name="coletor-1", user=self.user)
+        supplier = Supplier.objects.create(name="Fornecedor")
+        product = Product.objects.create(name="Martelo", base_price=4)
+        self.hammers = Stock.objects.create(
+            code="MART", product=product, supplier=supplier, quantity=10
+        )
+        self.saws = Stock.objects.create(
+            code="SERR", product=product, supplier=supplier, quantity=1
+        )
+        self.sequence = 0
+
+    def receive(self, *scans):
+        self.sequence += 1
+        ScanService().receive(
+            "coletor-1",
+            self.sequence,
+            [
+                {"code": code, "delta": delta, "scanned_at": "2026-10-18T10:00:00Z"}
+                for code, delta in scans
+            ],
+            actor=self.user,
+        )
+
+    def quantities(self):
+        return dict(Stock.objects.values_list("code", "quantity"))
+
+    def test_scans_are_coalesced_into_one_movement_per_stock(self):
+        self.receive(("MART", 1), ("MART", 2), ("SERR", -1))
+        self.receive(("MART", -1))
+
+        result = ScanService().flush()
+
+        self.assertEqual((result.events, result.movements), (4, 2))
+        self.assertEqual(
+            list(StockEntry.objects.values_list("stock__code", "quantity")),
+            [("MART", 2)],
+        )
+        self.assertEqual(
+            list(StockExit.objects.values_list("stock__code", "quantity")),
+            [("SERR", 1)],
+        )
+        self.assertEqual(self.quantities(), {"MART": 12, "SERR": 0})
+        self.assertFalse(ScanEvent.objects.exists())
+
+    def test_stock_short_of_units_is_rejected_alone(self):
+        self.receive(("MART", -1), ("SERR", -2))
+
+        result = ScanService().flush()
+
+        self.assertEqual((result.movements, result.rejected), (1, 1))
+        self.assertEqual(StockExit.objects.get().stock, self.hammers)
+        self.assertEqual(self.quantities(), {"MART": 9, "SERR": 1})
+        rejected = ScanEvent.objects.get()
+        self.assertEqual(
+            (rejected.code, rejected.status), ("SERR", ScanEvent.Status.REJECTED)
+        )
+        self.assertIn("não possui 2 unidade(s)", rejected.error)
+
+    def test_unknown_stock_is_rejected(self):
+        self.receive(("MART", 1), ("PREG", 3))
+
+        result = ScanService().flush()
+
+        self.assertEqual((result.movements, result.rejected), (1, 1))
+        self.assertEqual(self.quantities(), {"MART": 11, "SERR": 1})
+        self.assertEqual(
+            list(ScanEvent.objects.values_list("code", "status", "error")),
+            [("PREG", ScanEvent.Status.REJECTED, "Estoque não encontrado")],
+        )
+
+    def test_rejected_scans_are_applied_once_retried(self):
+        self.receive(("PREG", 3))
+        ScanService().flush()
+        nails = Stock.objects.create(
+            code="PREG", product=self.hammers.product, quantity=0
+        )
+
+        self.assertEqual(ScanService().retry(ScanEvent.objects.all()), 1)
+        result = ScanService().flush()
+
+        self.assertEqual((result.movements, result.rejected), (1, 0))
+        self.assertEqual(StockEntry.objects.get().stock, nails)
+        self.assertEqual(Stock.objects.get(pk=nails.pk).quantity, 3)
+        self.assertFalse(ScanEvent.objects.exists())
+
+
+class ProductAutocompleteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for name in ("Martelo", "Marreta", "Serrote"):
+            Product.objects.create(name=name, base_price=Decimal(3))
+
+    def names(self, term):
+        return [item["name"] for item in ProductSearch().autocomplete(term)]
+
+    def test_longer_terms_are_served_from_a_shorter_cached_prefix(self):
+        self.assertEqual(self.names("mar"), ["Marreta", "Martelo"])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.names("mart"), ["Martelo"])
+            self.assertEqual(self.names("marte"), ["Martelo"])
+
+    def test_invalidate_drops_the_cached_suggestions(self):
+        self.names("mar")
+        Product.objects.create(name="Marmita", base_price=Decimal(3))
+        ProductSearch().invalidate()
+
+        self.assertEqual(self.names("marm"), ["Marmita"])
+
+
+class CodeLookupViewTests(TestCase):
+    def setUp(self):
+        CodeLookupService.clear()
+        self.product = Product.objects.create(name="Martelo", base_price=Decimal(3))
+        user = User.objects.create_user("operador", password="x")
+        self.token = ScanService().issue_token(
+            ScanDevice.objects.create(name="coletor-1", user=user)
+        )
+
+    def get(self, **headers):
+        return self.client.get(
+            reverse("code-lookup"), {"code": self.product.code}, headers=headers
+        )
+
+    def test_scan_devices_look_up_codes_with_their_token(self):
+        response = self.get(authorization=f"Bearer {self.token}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["results"][self.product.code]["name"], "Martelo"
+        )
+
+    def test_invalid_token_is_refused(self):
+        response = self.get(authorization="Bearer invalid")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response["WWW-Authenticate"], "Bearer")
+
+    def test_sessions_must_be_staff(self):
+        self.assertEqual(self.get().status_code, 302)
+
+        self.client.force_login(
+            User.objects.create_user("gerente", "gerente@example.com", is_staff=True)
+        )
+        self.assertEqual(self.get().status_code, 200)
+
+
+class CodeLookupServiceTests(TestCase):
+    def setUp(self):
+        CodeLookupService.clear()
+        self.product = Product.objects.create(name="Martelo", base_price=Decimal(3))
+
+    def rename_and_lookup(self):
+        CodeLookupService().lookup([self.product.code])
+        # A write that does not invalidate, as another process's would look.
+        Product.objects.filter(pk=self.product.pk).update(name="Marreta")
+        return CodeLookupService().lookup([self.product.code])[self.product.code]
+
+    def test_process_local_cache_is_bypassed(self):
+        self.assertEqual(self.rename_and_lookup()["name"], "Marreta")
+
+    @override_settings(CODE_LOOKUP={"ALLOW_LOCAL": True})
+    def test_single_process_keeps_snapshots(self):
+        self.assertEqual(self.rename_and_lookup()["name"], "Martelo")
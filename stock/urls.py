@@ -1,8 +1,27 @@
 from django.urls import path
 
-from .views import stream, register
+from .views import (
+    autocomplete_products,
+    ingest_scans,
+    lookup_codes,
+    movement_series,
+    recent_activity,
+    register,
+    search_products,
+    stream,
+)
 
 urlpatterns = [
     path("channel/register/", register, name="register-channel"),
     path("sse/", stream, name="sse"),
+    path("activity/", recent_activity, name="recent-activity"),
+    path("movements/series/", movement_series, name="movement-series"),
+    path("lookup/", lookup_codes, name="code-lookup"),
+    path("scans/", ingest_scans, name="scan-ingestion"),
+    path("products/search/", search_products, name="product-search"),
+    path(
+        "products/autocomplete/",
+        autocomplete_products,
+        name="product-autocomplete",
+    ),
 ]
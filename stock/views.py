@@ -1,8 +1,29 @@
+import json
+from datetime import timedelta
+from typing import Optional
+
+from asgiref.sync import sync_to_async
+from django.contrib.admin.views.decorators import staff_member_required
+from django.contrib.auth.views import redirect_to_login
 from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from stock.models import ScanDevice
+from stock.services.activity import InvalidCursor, RecentActivityService
+from stock.services.dashboard_cache import DashboardCache
+from stock.services.lookup import CodeLookupService
+from stock.services.rollup import PERIODS, RollupService
+from stock.services.scan import ScanBackpressure, ScanSequenceError, ScanService
+from stock.services.search import ProductSearch, search_options
+
+SERIES_FILTERS = ("product", "supplier", "category")
 
 
-def register(request: HttpRequest):
-    user = request.user
+async def register(request: HttpRequest):
+    user = await request.auser()
     return JsonResponse(
         {
             "channel": user.pk,
@@ -10,10 +31,182 @@ def register(request: HttpRequest):
     )
 
 
-def stream(request: HttpRequest):
+async def stream(request: HttpRequest):
     from django_eventstream import send_event
 
-    user = request.user
+    user = await request.auser()
 
-    send_event(str(user.pk), "message", {"text": "hello world"})
+    # Same shape as the batches published by the notification outbox.
+    await sync_to_async(send_event)(
+        str(user.pk), "message", {"messages": [{"text": "hello world"}]}
+    )
     return HttpResponse("Ok")
+
+
+@staff_member_required
+def recent_activity(request: HttpRequest):
+    try:
+        page = RecentActivityService().page(request.GET.get("cursor"))
+    except InvalidCursor:
+        return JsonResponse({"error": "invalid cursor"}, status=400)
+
+    return JsonResponse(page)
+
+
+@staff_member_required
+def movement_series(request: HttpRequest):
+    period = request.GET.get("period", PERIODS[0])
+    try:
+        days = int(request.GET.get("days", 30))
+        filters = {
+            name: int(request.GET[name])
+            for name in SERIES_FILTERS
+            if request.GET.get(name)
+        }
+    except ValueError:
+        return JsonResponse({"error": "invalid parameter"}, status=400)
+    if period not in PERIODS or not 0 < days <= 3660:
+        return JsonResponse({"error": "invalid parameter"}, status=400)
+
+    until = timezone.localdate()
+    since = until - timedelta(days=days - 1)
+    name = ":".join(
+        ["movements", period, since.isoformat(), str(days)]
+        + [f"{key}={value}" for key, value in sorted(filters.items())]
+    )
+    series = DashboardCache().fetch(
+        request,
+        name,
+        lambda: RollupService().series(period, since, until, **filters),
+    )
+    return JsonResponse(series)
+
+
+def _bearer_device(request: HttpRequest) -> Optional[ScanDevice]:
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    return ScanService().authenticate(token) if scheme.lower() == "bearer" else None
+
+
+def _invalid_token() -> JsonResponse:
+    response = JsonResponse({"error": "invalid token"}, status=401)
+    response["WWW-Authenticate"] = "Bearer"
+    return response
+
+
+def lookup_codes(request: HttpRequest):
+    """
+    Product and stock snapshots of the ``code`` parameters, which may repeat
+    or hold comma-separated codes. Open to staff and to scan devices sending
+    their token as ``Authorization: Bearer <token>``.
+    """
+    if "Authorization" in request.headers:
+        if _bearer_device(request) is None:
+            return _invalid_token()
+    elif not (request.user.is_active and request.user.is_staff):
+        return redirect_to_login(request.get_full_path(), reverse("admin:login"))
+
+    codes = [
+        code.strip()
+        for value in request.GET.getlist("code")
+        for code in value.split(",")
+        if code.strip()
+    ]
+    if not codes:
+        return JsonResponse({"error": "missing code"}, status=400)
+
+    try:
+        results = CodeLookupService().lookup(codes)
+    except ValueError:
+        return JsonResponse({"error": "too many codes"}, status=400)
+
+    return JsonResponse({"results": results})
+
+
+@csrf_exempt
+@require_POST
+def ingest_scans(request: HttpRequest):
+    """
+    Buffer a JSON batch of scans ``{"sequence", "events"}`` from the device
+    whose token is sent as ``Authorization: Bearer <token>``, see
+    ``ScanService``. The scans are attributed to the user of the device.
+    """
+    scanner = _bearer_device(request)
+    if scanner is None:
+        return _invalid_token()
+
+    try:
+        batch = json.loads(request.body)
+        sequence, events = batch["sequence"], batch["events"]
+        if not isinstance(events, list):
+            raise TypeError(events)
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({"error": "invalid batch"}, status=400)
+    # The device name is optional, but must be the one of the token.
+    if batch.get("device", scanner.name) != scanner.name:
+        return JsonResponse({"error": "wrong device"}, status=403)
+
+    try:
+        result = ScanService().receive(
+            scanner.name, sequence, events, actor=scanner.user
+        )
+    except ScanBackpressure as error:
+        response = JsonResponse({"error": "busy"}, status=429)
+        response["Retry-After"] = str(error.retry_after)
+        return response
+    except ScanSequenceError as error:
+        return JsonResponse(
+            {"error": "out of order", "expected": error.expected}, status=409
+        )
+    except ValueError as error:
+        return JsonResponse(
+            {"error": "invalid batch", "detail": str(error)}, status=400
+        )
+
+    return JsonResponse(
+        {
+            "accepted": result.accepted,
+            "last_sequence": result.last_sequence,
+            "duplicate": result.duplicate,
+        },
+        status=200 if result.duplicate else 202,
+    )
+
+
+def _search_params(request: HttpRequest) -> tuple[str, int | None]:
+    term = request.GET.get("q", "").strip()
+    if not term:
+        raise ValueError("missing q")
+
+    limit = request.GET.get("limit")
+    if limit is None:
+        return term, None
+    limit = int(limit)
+    if not 0 < limit <= search_options()["CANDIDATES"]:
+        raise ValueError(limit)
+    return term, limit
+
+
+@staff_member_required
+def search_products(request: HttpRequest):
+    """
+    Products matching the ``q`` parameter, most relevant first.
+    """
+    try:
+        term, limit = _search_params(request)
+    except ValueError:
+        return JsonResponse({"error": "invalid parameter"}, status=400)
+
+    return JsonResponse({"results": ProductSearch().search(term, limit)})
+
+
+@staff_member_required
+def autocomplete_products(request: HttpRequest):
+    """
+    Products whose name or code starts with the ``q`` parameter.
+    """
+    try:
+        term, limit = _search_params(request)
+    except ValueError:
+        return JsonResponse({"error": "invalid parameter"}, status=400)
+
+    return JsonResponse({"results": ProductSearch().autocomplete(term, limit)})
@@ -13,7 +13,6 @@ https://docs.djangoproject.com/en/5.1/ref/settings/
 import json
 from pathlib import Path
 
-from django.db import models
 from django.templatetags.static import static
 from django.urls import reverse_lazy
 from django.utils.translation import gettext_lazy as _
@@ -55,6 +54,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.humanize",
+    "django.contrib.postgres",
     "core",
     "stock",
     "integrations",
@@ -148,6 +148,118 @@ STATICFILES_DIRS = [
     BASE_DIR / "static",
 ]
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        # Room for the version of every scanned code, see CODE_LOOKUP.
+        "OPTIONS": {"MAX_ENTRIES": 50_000},
+    },
+    # Seen by every process, for caches invalidated across them. The table is
+    # created by migrate, see core.signals.create_cache_tables.
+    "shared": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "stockwise_cache",
+    },
+}
+
+# Group and permission lookups of the admin, see core.auth.AccessCache. Entries
+# are shared across requests for TIMEOUT seconds (0 disables it) when ALIAS is a
+# cache shared by every process. With a process-local one such as locmem, they
+# only last for the request, so a revoked permission takes effect at once,
+# unless ALLOW_LOCAL is True for a server running a single process.
+AUTH_CACHE = {
+    "ALIAS": "default",
+    "TIMEOUT": 60,
+    "ALLOW_LOCAL": False,
+}
+
+AUTHENTICATION_BACKENDS = ["core.auth.CachedModelBackend"]
+
+# Dashboard context cache, see stock.services.dashboard_cache.DashboardCache.
+# ALIAS must be a cache shared by every process (database, file, Memcached or
+# Redis backends): with a process-local one such as locmem, dashboards are built
+# from the database snapshot on every request, unless ALLOW_LOCAL is True for a
+# server running a single process.
+DASHBOARD_CACHE = {
+    "ALIAS": "shared",
+    "TIMEOUT": 60,
+    "STALE_TIMEOUT": 60 * 60,
+    "ALLOW_LOCAL": False,
+}
+
+# Product and stock snapshots served by /stock/lookup/, see
+# stock.services.lookup.CodeLookupService. Each process keeps up to MAX_ENTRIES
+# codes, validated against versions in the ALIAS cache, which must be shared by
+# every process: with a process-local one such as locmem, every lookup reads the
+# database, unless ALLOW_LOCAL is True for a server running a single process.
+CODE_LOOKUP = {
+    "ALIAS": "default",
+    "MAX_ENTRIES": 10_000,
+    "TIMEOUT": 5 * 60,
+    "MAX_CODES": 100,
+    "ALLOW_LOCAL": False,
+}
+
+# Product search and autocompletion, see stock.services.search.ProductSearch.
+# Autocomplete suggestions are cached for TIMEOUT seconds and dropped whenever a
+# product changes.
+PRODUCT_SEARCH = {
+    "ALIAS": "default",
+    "TIMEOUT": 5 * 60,
+    "LIMIT": 10,
+}
+
+# Scan batches posted to /stock/scans/, see stock.services.scan.ScanService.
+# Devices authenticate with the token issued in the admin, not a session.
+# Batches are refused with 429 while MAX_PENDING scans wait to be applied. Set
+# WORKER to False to apply them only with ``manage.py flush_scans``.
+SCAN_INGESTION = {
+    "MAX_EVENTS": 1000,
+    "MAX_PENDING": 50_000,
+    "LINGER": 0.5,
+    "WORKER": True,
+}
+
+# Monthly partitioning of the stock entry and exit tables on PostgreSQL, see
+# stock.services.partitions.PartitionedTable. The tables are converted once with
+# ``manage.py partition_movements --convert``. The next MONTHS_AHEAD partitions
+# are then created after ``migrate`` and by ``manage.py partition_movements``,
+# which must run daily from cron, e.g.
+#   0 3 * * * cd /app && python manage.py partition_movements
+# Rows of a month without a partition go to the default one, which every
+# query scans.
+STOCK_PARTITIONING = {
+    "MONTHS_AHEAD": 3,
+}
+
+# Notification outbox, see integrations.services.notification.OutboxService.
+# Set WORKER to False to publish only with ``manage.py dispatch_outbox``, which
+# needs EVENTSTREAM_REDIS to reach clients connected to other processes.
+NOTIFICATION_OUTBOX = {
+    "BATCH_SIZE": 200,
+    "MAX_ATTEMPTS": 8,
+    "WORKER": True,
+}
+
+# Repeated alerts for the same stock and state within WINDOW seconds update the
+# unread notification instead of creating a new one.
+NOTIFICATION_ALERTS = {
+    "WINDOW": 30 * 60,
+}
+
+# Events are stored so clients replay what they missed from Last-Event-ID on
+# reconnect, see integrations.services.events.RetainedEventStorage. Each channel
+# keeps at most MAX_EVENTS events, none older than MAX_AGE seconds.
+EVENTSTREAM_STORAGE_CLASS = "integrations.services.events.RetainedEventStorage"
+EVENTSTREAM_CHANNELMANAGER_CLASS = "integrations.services.events.UserChannelManager"
+EVENT_RETENTION = {
+    "MAX_EVENTS": 100,
+    "MAX_AGE": 24 * 60 * 60,
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.1/ref/settings/#default-auto-field
 
@@ -243,10 +355,19 @@ UNFOLD = {
                         "link": reverse_lazy("admin:auth_group_changelist"),
                         "permission": lambda request: request.user.is_superuser,
                     },
+                    {
+                        "title": _("Notificações"),
+                        "icon": "notifications",
+                        "link": reverse_lazy("admin:stock_notification_changelist"),
+                        "badge": "stockwise.settings.badge_callback",
+                        "permission": lambda request: request.user.has_perm(
+                            "stock.view_notification"
+                        ),
+                    },
                     {
                         "title": _("Logs"),
                         "icon": "format_list_bulleted",
-                        "link": reverse_lazy("admin:admin_logentry_changelist"),
+                        "link": reverse_lazy("admin:stock_movementaudit_changelist"),
                         "permission": lambda request: has_permission(
                             request,
                             [
@@ -322,12 +443,12 @@ def has_permission(request, required_groups: list[str]):
     Returns:
         bool: True if the user belongs to any of the required groups, False otherwise.
     """
+    from core.auth import in_groups
+
     if request.user.is_superuser:
         return True
 
-    user_groups = request.user.groups.values_list("name", flat=True)
-
-    return any(group in user_groups for group in required_groups)
+    return in_groups(request.user, required_groups)
 
 
 def dashboard_callback(request, context):
@@ -335,134 +456,38 @@ def dashboard_callback(request, context):
     Callback to prepare custom variables for index template which is used as dashboard
     template. It can be overridden in application by creating custom admin/index.html.
     """
-    from stock.models import Category, Stock, StockEntry, StockExit
-
-    categories = Category.objects.all()
-    labels = [category.name for category in categories]
-    data = [category.products.count() for category in categories]
-    total_products = sum(data)
-    category_percentages = [
-        {
-            "category": category.name,
-            "percentage": (
-                int((category.products.count() / total_products) * 100)
-                if total_products
-                else 0
-            ),
-        }
-        for category in categories
-    ]
-
-    entries_stock_movements = StockEntry.objects.filter(
-        product__isnull=False,
-        stock__isnull=False,
-    ).order_by("-created_at")
-    exit_stock_movements = StockExit.objects.filter(
-        product__isnull=False,
-        stock__isnull=False,
-    ).order_by("-created_at")
-
-    stock_movements = [
-        {
-            "operation_type": 1,
-            "text": f"O usuário {movement.product.user.username} adicionou {movement.quantity} produto(s) no dia {movement.created_at.strftime("%Y/%m/%d %H:%M:%S")}",
-            "created_at": movement.created_at,
-        }
-        for movement in entries_stock_movements
-    ]
-    stock_movements += [
-        {
-            "operation_type": 0,
-            "text": f"O usuário {movement.product.user.username} removeu {movement.quantity} produto(s) no dia {movement.created_at.strftime("%Y/%m/%d %H:%M:%S")}",
-            "created_at": movement.created_at,
-        }
-        for movement in exit_stock_movements
-    ]
-
-    kpis = (
-        Stock.objects.all()
-        .annotate(price_product=models.F("quantity") * models.F("product__base_price"))
-        .aggregate(
-            total=models.Sum("price_product"),
-            count=models.Count("product"),
-            average=models.Avg("price_product"),
-            max=models.Max("product__base_price"),
-        )
-    )
-
-    # Products per supplier quantity
-    products_per_supplier = (
-        Stock.objects.all()
-        .values(supplier_name=models.F("supplier__name"))
-        .annotate(products=models.Count("product"))
-    )
-
-    # Products per supplier percentage
-    total_products_per_supplier = sum(
-        [products["products"] for products in products_per_supplier]
-    )
-    products_per_supplier = [
-        {
-            "supplier_name": products["supplier_name"],
-            "products": products["products"],
-            "percentage": int(
-                (products["products"] / total_products_per_supplier) * 100
-            ),
-        }
-        for products in products_per_supplier
-    ]
-
-    context.update(
-        {
-            "kpi": {
-                "total_products": kpis.get("total"),
-                "average": kpis.get("average"),
-                "max": kpis.get("max"),
-            },
-            "stock_movements": sorted(
-                stock_movements,
-                key=lambda x: x.get("created_at"),
-                reverse=True,
-            )[:4],
-            "data": json.dumps(
-                {
-                    "productQuantity": {
-                        "labels": labels,
-                        "data": data,
-                    },
-                    "productPercentage": {
-                        "labels": [
-                            category["category"] for category in category_percentages
-                        ],
-                        "data": [
-                            category["percentage"] for category in category_percentages
-                        ],
-                    },
-                    "productsPerSupplierQuantity": {
-                        "labels": [
-                            products["supplier_name"]
-                            for products in products_per_supplier
-                        ],
-                        "data": [
-                            products["products"] for products in products_per_supplier
-                        ],
-                    },
-                    "productsPerSupplierPercentage": {
-                        "labels": [
-                            product["supplier_name"]
-                            for product in products_per_supplier
-                        ],
-                        "data": [
-                            product["percentage"] for product in products_per_supplier
-                        ],
-                    },
-                }
-            ),
-        }
-    )
+    from stock.services.dashboard_cache import DashboardCache
+
+    context.update(DashboardCache().get(request, build_dashboard_context))
     return context
 
 
+def build_dashboard_context():
+    """
+    Compute the dashboard variables cached by ``dashboard_callback``.
+    """
+    from stock.services.activity import RecentActivityService
+    from stock.services.dashboard import DashboardService
+    from stock.services.snapshot import DashboardSnapshotService
+
+    dashboard = DashboardSnapshotService().context()
+    stock_movements = RecentActivityService().page()
+
+    kpis = dashboard["kpi"]
+
+    return {
+        "kpi": {
+            "total_products": kpis.get("total"),
+            "average": kpis.get("average"),
+            "max": kpis.get("max"),
+            **DashboardService().stock_alerts(),
+        },
+        "stock_movements": stock_movements["results"],
+        "stock_movements_next": stock_movements["next"],
+        "data": json.dumps(dashboard["charts"]),
+    }
+
+
 def environment_callback(request):
     """
     Callback has to return a list of two values represeting text value and the color
@@ -472,7 +497,12 @@ def environment_callback(request):
 
 
 def badge_callback(request):
-    return 3
+    """
+    Number of unread notifications of the user, shown in the sidebar.
+    """
+    from stock.services.notification import UnreadCounterService
+
+    return UnreadCounterService().for_request(request)
 
 
 def permission_callback(request):
@@ -18,14 +18,11 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import include, path
 
-import django_eventstream
+from integrations.views import events
 
 urlpatterns = [
     path("", include("core.urls")),
     path("admin/", admin.site.urls),
     path("stock/", include("stock.urls")),
-    path(
-        "events/<channel>/",
-        include(django_eventstream.urls),
-    ),
+    path("events/<channel>/", events, name="events"),
 ]